@@ -0,0 +1,288 @@
+"""
+Columnar Archive for Lynx Eye
+Archive locale des items collectés, en colonnes compressées (Parquet), partitionnée par jour
+
+Chaque exécution enregistre aussi les items retenus (après regroupement et score) dans
+.state/archive/day=AAAA-MM-JJ/part-*.parquet (jour de collecte, UTC) : contenu, auteur,
+external_id, date de publication, date de collecte, mots-clés trouvés, catégorie de la
+source, score de pertinence. Compression zstd, chaînes répétées (auteur, catégorie)
+encodées par dictionnaire.
+
+Les analyses historiques (fréquence d'un mot-clé sur plusieurs mois, volume par source)
+se font sans Supabase ni réseau : le lecteur ouvre les fichiers en mémoire mappée, ne
+parcourt que les jours demandés et ne décode que les colonnes utiles. `compact` fusionne
+les fichiers d'un même jour (le daemon et les workers en écrivent un par vidage).
+PyArrow est facultatif : sans lui, l'archive est désactivée.
+
+Usage:
+python archive.py info
+python archive.py keywords --since 2026-01-01 --top 20 [--by month]
+python archive.py sources --since 2026-01-01
+python archive.py compact
+"""
+
+import os
+import time
+import argparse
+from datetime import datetime, timezone
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    from pyarrow import fs
+except ImportError:
+    pa = None
+
+from state import state_path
+from scoring import published_timestamp, source_category
+
+DEFAULT_DIRNAME = 'archive'
+COMPRESSION = 'zstd'
+FLUSH_ROWS = 50000             # lignes en mémoire avant écriture d'un fichier
+FLUSH_SECONDS = 3600           # âge maximal des lignes en mémoire (daemon)
+ROW_GROUP_ROWS = 128 * 1024
+
+COLUMNS = ('external_id', 'content', 'author', 'published_at', 'collected_at',
+           'keywords', 'source_category', 'relevance_score')
+
+
+def archive_schema():
+    return pa.schema([
+        ('external_id', pa.string()),
+        ('content', pa.string()),
+        ('author', pa.string()),
+        ('published_at', pa.timestamp('s', tz='UTC')),
+        ('collected_at', pa.timestamp('s', tz='UTC')),
+        ('keywords', pa.list_(pa.string())),
+        ('source_category', pa.string()),
+        ('relevance_score', pa.float32()),
+    ])
+
+
+def day_of(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d')
+
+
+class ArchiveWriter:
+    """Accumule les items par jour et les écrit en fichiers Parquet (écriture atomique)"""
+
+    def __init__(self, root=None, flush_rows=FLUSH_ROWS, flush_seconds=FLUSH_SECONDS, matcher=None):
+        self.root = root or state_path(DEFAULT_DIRNAME)
+        self.enabled = pa is not None
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.matcher = matcher
+        self.days = {}            # jour -> {colonne: valeurs}
+        self.pending = 0
+        self.oldest = None
+        self.sequence = 0
+        self.stats = {'rows': 0, 'files': 0, 'bytes': 0}
+        if not self.enabled:
+            print("⚠️  pyarrow non installé : archive locale désactivée (pip install pyarrow)")
+
+    def append(self, items, now=None):
+        """Ajoute un lot d'items ; écrit les fichiers si le seuil de lignes ou d'âge est atteint"""
+        if not self.enabled or not items:
+            return
+        if self.matcher is None:
+            from matcher import get_matcher
+            self.matcher = get_matcher()
+        now = int(now or time.time())
+        day = day_of(now)
+        columns = self.days.setdefault(day, {name: [] for name in COLUMNS})
+        if all('_keywords' in item for item in items):
+            # Termes déjà trouvés par l'étape de tendances (trends.py) : pas de second parcours
+            keywords = [[self.matcher.terms[key]['keyword'] for key in item['_keywords']] for item in items]
+        else:
+            keywords = self.matcher.keywords_batch([item.get('content') for item in items])
+        for item, found in zip(items, keywords):
+            columns['external_id'].append(item.get('external_id'))
+            columns['content'].append(item.get('content'))
+            columns['author'].append(item.get('author'))
+            columns['published_at'].append(published_timestamp(item.get('published_at')))
+            columns['collected_at'].append(now)
+            columns['keywords'].append(found)
+            columns['source_category'].append(source_category(item))
+            columns['relevance_score'].append(item.get('relevance_score'))
+        self.pending += len(items)
+        self.oldest = self.oldest or now
+        if self.pending >= self.flush_rows or now - self.oldest >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        """Écrit un fichier par jour en attente"""
+        if not self.enabled or not self.pending:
+            return
+        schema = archive_schema()
+        for day, columns in self.days.items():
+            table = pa.Table.from_pydict(columns, schema=schema)
+            directory = os.path.join(self.root, f"day={day}")
+            os.makedirs(directory, exist_ok=True)
+            self.sequence += 1
+            name = f"part-{time.strftime('%H%M%S', time.gmtime())}-{os.getpid()}-{self.sequence}.parquet"
+            self.stats['bytes'] += write_parquet(table, os.path.join(directory, name))
+            self.stats['rows'] += table.num_rows
+            self.stats['files'] += 1
+        self.days = {}
+        self.pending = 0
+        self.oldest = None
+
+    def close(self):
+        self.flush()
+
+    def report(self):
+        """Ligne de bilan pour la sortie d'exécution"""
+        if not self.enabled:
+            return "🗃  Archive: désactivée (pyarrow non installé)"
+        return (f"🗃  Archive: {self.stats['rows']} item(s) en {self.stats['files']} fichier(s) Parquet "
+                f"({self.stats['bytes'] / 1024:.0f} Ko)")
+
+
+def write_parquet(table, path):
+    """Écriture atomique (fichier temporaire puis renommage) ; retourne la taille du fichier"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp_path, compression=COMPRESSION, row_group_size=ROW_GROUP_ROWS,
+                   use_dictionary=['author', 'source_category', 'keywords.list.element'])
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def open_dataset(root=None):
+    """Dataset de toute l'archive (partitions day=...), fichiers lus en mémoire mappée"""
+    root = root or state_path(DEFAULT_DIRNAME)
+    return ds.dataset(root, format='parquet', partitioning='hive',
+                      filesystem=fs.LocalFileSystem(use_mmap=True), exclude_invalid_files=True,
+                      ignore_prefixes=['.', '_'])
+
+
+def read(columns, since=None, until=None, root=None):
+    """
+    Table PyArrow des colonnes demandées (plus 'day'), jours `since` à `until` inclus (AAAA-MM-JJ)
+    Seuls les fichiers des jours retenus sont ouverts, et seules les colonnes demandées décodées
+    """
+    dataset = open_dataset(root)
+    condition = None
+    for bound, op in ((since, 'ge'), (until, 'le')):
+        if bound:
+            term = getattr(ds.field('day'), f"__{op}__")(bound)
+            condition = term if condition is None else condition & term
+    return dataset.to_table(columns=list(columns) + ['day'], filter=condition)
+
+
+def period_of(days, by):
+    """Jour -> période d'agrégation ('day', 'month', 'year')"""
+    width = {'day': 10, 'month': 7, 'year': 4}[by]
+    return pc.utf8_slice_codeunits(days.cast(pa.string()), 0, width)
+
+
+def keyword_counts(since=None, until=None, top=20, by=None, root=None):
+    """Mots-clés les plus fréquents : [(mot-clé, total)] ou, avec `by`, [(période, mot-clé, total)]"""
+    table = read(['keywords'], since, until, root)
+    flat = pc.list_flatten(table['keywords'])
+    if by is None:
+        counts = pc.value_counts(flat)
+        ranked = sorted(zip(counts.field('values').to_pylist(), counts.field('counts').to_pylist()),
+                        key=lambda pair: pair[1], reverse=True)
+        return ranked[:top]
+    periods = pc.take(period_of(table['day'], by), pc.list_parent_indices(table['keywords']))
+    grouped = pa.table({'period': periods, 'keyword': flat}).group_by(['period', 'keyword']).aggregate(
+        [('keyword', 'count')])
+    rows = sorted(zip(*(grouped[name].to_pylist() for name in ('period', 'keyword', 'keyword_count'))),
+                  key=lambda row: (row[0], -row[2]))
+    result, per_period = [], {}
+    for period, keyword, count in rows:
+        per_period[period] = per_period.get(period, 0) + 1
+        if per_period[period] <= top:
+            result.append((period, keyword, count))
+    return result
+
+
+def source_volume(since=None, until=None, by_author=False, root=None):
+    """Volume par catégorie de source (ou par auteur) : [(source, items, score moyen)]"""
+    key = 'author' if by_author else 'source_category'
+    table = read([key, 'relevance_score'], since, until, root)
+    # mode='all' : les items sans auteur forment leur propre groupe, compté lui aussi
+    grouped = table.group_by(key).aggregate([(key, 'count', pc.CountOptions(mode='all')),
+                                             ('relevance_score', 'mean')])
+    rows = zip(grouped[key].to_pylist(), grouped[f'{key}_count'].to_pylist(),
+               grouped['relevance_score_mean'].to_pylist())
+    return sorted(rows, key=lambda row: row[1], reverse=True)
+
+
+def compact(root=None, days=None):
+    """Fusionne les fichiers de chaque jour en un seul ; retourne le nombre de fichiers supprimés"""
+    root = root or state_path(DEFAULT_DIRNAME)
+    removed = 0
+    for entry in sorted(os.listdir(root)) if os.path.isdir(root) else []:
+        day = entry.partition('=')[2]
+        if not entry.startswith('day=') or (days and day not in days):
+            continue
+        directory = os.path.join(root, entry)
+        parts = sorted(name for name in os.listdir(directory) if name.endswith('.parquet'))
+        if len(parts) < 2:
+            continue
+        paths = [os.path.join(directory, name) for name in parts]
+        table = pa.concat_tables(pq.read_table(path, memory_map=True, schema=archive_schema()) for path in paths)
+        write_parquet(table, os.path.join(directory, f"part-compact-{int(time.time())}-{os.getpid()}.parquet"))
+        # Fichiers lus uniquement : un fichier ajouté pendant la fusion est conservé
+        for path in paths:
+            os.remove(path)
+        removed += len(paths) - 1
+    return removed
+
+
+def info(root=None):
+    """(jours, fichiers, lignes, octets) de l'archive"""
+    dataset = open_dataset(root)
+    files = dataset.files
+    rows = sum(pq.ParquetFile(path, memory_map=True).metadata.num_rows for path in files)
+    days = {os.path.basename(os.path.dirname(path)) for path in files}
+    return len(days), len(files), rows, sum(os.path.getsize(path) for path in files)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Lynx Eye - archive locale des items (Parquet)")
+    parser.add_argument('command', choices=('info', 'keywords', 'sources', 'compact'))
+    parser.add_argument('--since', default=None, help="Premier jour inclus (AAAA-MM-JJ)")
+    parser.add_argument('--until', default=None, help="Dernier jour inclus (AAAA-MM-JJ)")
+    parser.add_argument('--top', type=int, default=20, help="Mots-clés affichés (par période avec --by)")
+    parser.add_argument('--by', choices=('day', 'month', 'year'), default=None,
+                        help="Fréquence des mots-clés par période")
+    parser.add_argument('--authors', action='store_true', help="Volume par média plutôt que par catégorie")
+    parser.add_argument('--root', default=None, help=f"Répertoire de l'archive (défaut: .state/{DEFAULT_DIRNAME})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if pa is None:
+        print("❌ pyarrow non installé (pip install pyarrow)")
+        return
+    root = args.root or state_path(DEFAULT_DIRNAME)
+    if not os.path.isdir(root):
+        print(f"Archive vide ({root})")
+        return
+    started = time.perf_counter()
+    if args.command == 'info':
+        days, files, rows, size = info(root)
+        print(f"🗃  {rows} item(s), {days} jour(s), {files} fichier(s), {size / 1024 / 1024:.1f} Mo")
+    elif args.command == 'keywords':
+        if args.by is None:
+            for keyword, count in keyword_counts(args.since, args.until, args.top, root=root):
+                print(f"   {count:>8}  {keyword}")
+        else:
+            for period, keyword, count in keyword_counts(args.since, args.until, args.top, args.by, root):
+                print(f"   {period}  {count:>8}  {keyword}")
+    elif args.command == 'sources':
+        for source, count, score in source_volume(args.since, args.until, args.authors, root):
+            score = f"{score:.1f}" if score is not None else "-"
+            print(f"   {count:>8}  score moyen {score:>5}  {source or 'inconnu'}")
+    else:
+        print(f"🗜  Compaction: {compact(root)} fichier(s) en moins")
+    print(f"   ({time.perf_counter() - started:.2f}s)")
+
+
+if __name__ == '__main__':
+    main()
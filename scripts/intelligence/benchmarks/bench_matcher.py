@@ -0,0 +1,92 @@
+"""
+Benchmark du filtre de mots-clés (Lynx Eye)
+Compare la boucle historique `any(kw.lower() in content ...)` au matcher compilé
+sur un corpus synthétique de plusieurs milliers d'articles.
+
+Usage:
+python benchmarks/bench_matcher.py --articles 5000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keywords import INTELLIGENCE_KEYWORDS, PRIORITY_KEYWORDS, CITIES  # noqa: E402
+from matcher import get_matcher  # noqa: E402
+
+FILLER = (
+    "le la les des une dans pour avec sur par ordre information gouvernement ministre "
+    "projet réunion national développement population économie forêt route communiqué "
+    "fermeture panier ordonnance grande orientation travaux jeunesse santé école "
+    "Libreville Port-Gentil Franceville annonce décision public accord"
+).split()
+
+
+def generate_corpus(count, seed=42):
+    """Articles titre + résumé, environ un tiers contenant un mot-clé prioritaire"""
+    rng = random.Random(seed)
+    vocabulary = INTELLIGENCE_KEYWORDS + CITIES
+    corpus = []
+    for _ in range(count):
+        words = rng.choices(FILLER, k=rng.randint(40, 90))
+        for _ in range(rng.randint(0, 3)):
+            words.insert(rng.randrange(len(words)), rng.choice(vocabulary))
+        if rng.random() < 0.33:
+            words.insert(rng.randrange(len(words)), rng.choice(PRIORITY_KEYWORDS).upper())
+        corpus.append(" ".join(words))
+    return corpus
+
+
+def legacy_priority(text):
+    """Filtre actuel de scrape_rss_feed"""
+    content = text.lower()
+    return any(kw.lower() in content for kw in PRIORITY_KEYWORDS)
+
+
+def timed(label, func, corpus):
+    started = time.perf_counter()
+    result = [func(text) for text in corpus]
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<45} {elapsed * 1000:8.1f} ms  {len(corpus) / elapsed:10.0f} articles/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du matcher de mots-clés")
+    parser.add_argument('--articles', type=int, default=5000)
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.articles)
+
+    started = time.perf_counter()
+    matcher = get_matcher()
+    print(f"Compilation du matcher: {(time.perf_counter() - started) * 1000:.1f} ms ({len(matcher)} termes)")
+    print(f"Corpus: {len(corpus)} articles\n")
+
+    print("Filtre prioritaire (booléen)")
+    legacy = timed("boucle historique (PRIORITY_KEYWORDS)", legacy_priority, corpus)
+    compiled = timed("matcher.has_priority", matcher.has_priority, corpus)
+
+    print("\nToutes les occurrences (vocabulaire complet)")
+    all_terms = INTELLIGENCE_KEYWORDS + PRIORITY_KEYWORDS + CITIES
+
+    def naive_find(text):
+        content = text.lower()
+        return [kw for kw in all_terms if kw.lower() in content]
+
+    naive_hits = timed("boucle naïve (tous les termes)", naive_find, corpus)
+    hits = timed("matcher.find", matcher.find, corpus)
+
+    disagreements = sum(1 for a, b in zip(legacy, compiled) if a != b)
+    print(f"\nArticles retenus: boucle {sum(legacy)}, matcher {sum(compiled)} "
+          f"({disagreements} divergences : frontières de mots / accents)")
+    print(f"Occurrences: boucle naïve {sum(len(h) for h in naive_hits)}, "
+          f"matcher {sum(len(h) for h in hits)}")
+
+
+if __name__ == '__main__':
+    main()
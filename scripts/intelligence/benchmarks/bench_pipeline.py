@@ -0,0 +1,270 @@
+"""
+Benchmark hors ligne de la chaîne de collecte (Lynx Eye)
+Mesure chaque étape sans accès réseau ni projet Supabase :
+
+- rss      : scrape_rss_feed sur des flux RSS de chaque média de PRESS_URLS
+- filter   : filtre des mots-clés prioritaires (matcher.has_priority)
+- queries  : generate_search_queries
+- web      : scrape_web_news sur des résultats DuckDuckGo synthétiques
+- youtube  : scrape_youtube sur des résultats YouTube synthétiques
+- dedup    : regroupement des reprises (StoryClusterer)
+- score    : score de pertinence par lot (RelevanceScorer)
+- sink     : save_items vers un stub local de l'API Supabase (vraie pile HTTP supabase-py)
+
+Pour chaque taille de corpus : débit (items/s), latence (durée de l'étape, µs/item)
+et pic mémoire (tracemalloc, passe séparée). Les résultats sont écrits en JSON et
+peuvent être comparés à une exécution de référence pour détecter les régressions.
+
+Usage:
+python benchmarks/bench_pipeline.py --sizes 1000 10000 100000 --output bench.json
+python benchmarks/bench_pipeline.py --compare bench.json --tolerance 0.15
+python benchmarks/bench_pipeline.py --fixtures ./flux_enregistres --stages rss filter
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import uuid
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+from contextlib import redirect_stdout
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import fixtures  # noqa: E402
+from supabase_stub import start_stub, STUB_KEY  # noqa: E402
+
+STAGES = ['rss', 'filter', 'queries', 'web', 'youtube', 'dedup', 'score', 'sink']
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_TOLERANCE = 0.15
+
+
+def articles_as_items(articles):
+    """Articles au format des items envoyés à Supabase"""
+    return [{
+        'content': f"{a['title']} - {a['summary']}",
+        'author': a['outlet'],
+        'external_id': a['link'],
+        'published_at': a['published'].isoformat(),
+    } for a in articles]
+
+
+class Bench:
+    """Prépare les entrées de chaque étape hors chronométrage ; run() retourne le nombre d'items sortis"""
+
+    def __init__(self, stub_url, workdir, fixtures_dir=None, batch_size=None):
+        # Imports après configuration de l'environnement (lu par clients.get_supabase)
+        import rss_scraper
+        import web_scraper
+        from keywords import generate_search_queries
+        from matcher import get_matcher
+        from supabase import create_client
+        from supabase_sink import DEFAULT_BATCH_SIZE
+
+        self.rss_scraper = rss_scraper
+        self.web_scraper = web_scraper
+        self.generate_search_queries = generate_search_queries
+        self.matcher = get_matcher()
+        self.client = create_client(stub_url, STUB_KEY)
+        self.workdir = workdir
+        self.fixtures_dir = fixtures_dir
+        self.batch_size = batch_size or DEFAULT_BATCH_SIZE
+
+    def setup_rss(self, size):
+        if self.fixtures_dir:
+            feeds = fixtures.load_recorded_feeds(self.fixtures_dir, size)
+        else:
+            feeds = fixtures.generate_feeds(size)
+        scrape = self.rss_scraper.scrape_rss_feed
+        return lambda: sum(len(scrape(url, name, content=xml)) for name, url, xml in feeds)
+
+    def setup_filter(self, size):
+        texts = [f"{a['title']} {a['summary']}" for a in fixtures.generate_articles(size)]
+        has_priority = self.matcher.has_priority
+        return lambda: sum(1 for text in texts if has_priority(text))
+
+    def setup_queries(self, size):
+        keywords = fixtures.query_keywords(size)
+        return lambda: len(self.generate_search_queries(keywords, max_queries=size))
+
+    def setup_web(self, size):
+        queries = [f"gabon requete {i}" for i in range(max(1, size // 3))]
+        payloads = fixtures.ddg_payloads(queries, per_query=3)
+
+        class OfflineDDGS:
+            def text(self, query, max_results):
+                return payloads[query][:max_results]
+
+        scrape = self.web_scraper.scrape_web_news
+        return lambda: len(scrape(queries, max_results_per_query=3, rate=1e9, session_factory=OfflineDDGS))
+
+    def setup_youtube(self, size):
+        queries = [f"gabon video {i}" for i in range(max(1, size // 2))]
+        payloads = fixtures.youtube_payloads(queries, per_query=2)
+
+        class OfflineVideosSearch:
+            def __init__(self, query, limit):
+                self.query = query
+                self.limit = limit
+
+            def result(self):
+                return {'result': payloads[self.query]['result'][:self.limit]}
+
+        scrape = self.web_scraper.scrape_youtube
+        return lambda: len(scrape(queries, max_results_per_query=2, videos_search=OfflineVideosSearch))
+
+    def setup_dedup(self, size):
+        from dedup import StoryClusterer
+        items = articles_as_items(fixtures.generate_articles(size))
+
+        def run():
+            # État vierge à chaque passe
+            clusterer = StoryClusterer(path=os.path.join(self.workdir, f"dedup-{uuid.uuid4().hex}.sqlite3"),
+                                       max_items=max(size, 1))
+            try:
+                stories = clusterer.collapse(items)
+                clusterer.save()
+            finally:
+                clusterer.close()
+            return len(stories)
+        return run
+
+    def setup_score(self, size):
+        from scoring import RelevanceScorer
+        items = articles_as_items(fixtures.generate_articles(size))
+        scorer = RelevanceScorer(self.matcher)
+        return lambda: len(scorer.rank(items, min_score=1.0))
+
+    def setup_sink(self, size):
+        from supabase_sink import save_items
+        items = articles_as_items(fixtures.generate_articles(size))
+        return lambda: save_items(self.client, items, batch_size=self.batch_size)['saved']
+
+
+def measure(run, size, memory=True):
+    """Chronométrage, puis pic mémoire lors d'une seconde passe sous tracemalloc"""
+    sink = io.StringIO()
+    with redirect_stdout(sink):
+        started = time.perf_counter()
+        output = run()
+        elapsed = time.perf_counter() - started
+    result = {
+        'items': size,
+        'output': output,
+        'seconds': round(elapsed, 4),
+        'items_per_s': round(size / elapsed, 1) if elapsed > 0 else None,
+        'us_per_item': round(elapsed / size * 1e6, 2),
+        'peak_kib': None,
+    }
+    if memory:
+        tracemalloc.start()
+        try:
+            with redirect_stdout(io.StringIO()):
+                run()
+            result['peak_kib'] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Régressions (débit en baisse ou pic mémoire en hausse au-delà de la tolérance)"""
+    reference = {(r['stage'], r['items']): r for r in baseline['results']}
+    regressions = []
+    for r in results:
+        ref = reference.get((r['stage'], r['items']))
+        if not ref:
+            continue
+        if ref['items_per_s'] and r['items_per_s'] and r['items_per_s'] < ref['items_per_s'] * (1 - tolerance):
+            regressions.append((r['stage'], r['items'], 'items/s', ref['items_per_s'], r['items_per_s']))
+        if ref['peak_kib'] and r['peak_kib'] and r['peak_kib'] > ref['peak_kib'] * (1 + tolerance):
+            regressions.append((r['stage'], r['items'], 'pic KiB', ref['peak_kib'], r['peak_kib']))
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark hors ligne de la chaîne de collecte")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Tailles de corpus (nombre d'items)")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--fixtures', help="Dossier de flux RSS enregistrés (*.xml) à rejouer")
+    parser.add_argument('--batch-size', type=int, help="Taille des lots d'upsert (étape sink)")
+    parser.add_argument('--no-memory', action='store_true', help="Sans mesure du pic mémoire")
+    parser.add_argument('--output', help="Fichier JSON de résultats")
+    parser.add_argument('--compare', help="Fichier JSON de référence")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Écart toléré avant de signaler une régression (0.15 = 15%%)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="lynx-bench-")
+    server, stub_url = start_stub()
+    os.environ['SUPABASE_URL'] = stub_url
+    os.environ['SUPABASE_SERVICE_ROLE_KEY'] = STUB_KEY
+    os.environ['LYNX_STATE_DIR'] = workdir
+
+    bench = Bench(stub_url, workdir, fixtures_dir=args.fixtures, batch_size=args.batch_size)
+
+    print(f"{'étape':<9} {'items':>8} {'sortie':>8} {'durée s':>9} {'items/s':>10} {'µs/item':>9} {'pic KiB':>10}")
+    results = []
+    for size in args.sizes:
+        for stage in args.stages:
+            run = getattr(bench, f"setup_{stage}")(size)
+            result = {'stage': stage, **measure(run, size, memory=not args.no_memory)}
+            results.append(result)
+            peak = f"{result['peak_kib']:.0f}" if result['peak_kib'] is not None else "-"
+            print(f"{stage:<9} {size:>8} {result['output']:>8} {result['seconds']:>9.3f} "
+                  f"{result['items_per_s'] or 0:>10.0f} {result['us_per_item']:>9.1f} {peak:>10}")
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'fixtures': args.fixtures or 'generated',
+            'sink_requests': server.stats['requests'],
+        },
+        'results': results,
+    }
+    server.shutdown()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nRésultats écrits dans {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        print(f"\nComparaison avec {args.compare} ({baseline['meta'].get('revision')}), "
+              f"tolérance {args.tolerance:.0%}")
+        for stage, size, metric, before, after in regressions:
+            print(f"  ✗ {stage} ({size} items): {metric} {before} → {after}")
+        if regressions:
+            sys.exit(1)
+        print("  ✓ Aucune régression")
+
+
+if __name__ == '__main__':
+    main()
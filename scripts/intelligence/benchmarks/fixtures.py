@@ -0,0 +1,168 @@
+"""
+Fixtures des benchmarks (Lynx Eye)
+Corpus hors ligne et déterministe : flux RSS par média de PRESS_URLS, résultats
+DuckDuckGo et YouTube synthétiques au format des bibliothèques utilisées.
+
+Des flux enregistrés (curl https://www.gabonreview.com/feed/ > gabonreview.xml) peuvent
+remplacer les flux générés : voir load_recorded_feeds et l'option --fixtures.
+"""
+
+import os
+import sys
+import glob
+import random
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from urllib.parse import urlparse
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keywords import INTELLIGENCE_KEYWORDS, PRIORITY_KEYWORDS, CITIES  # noqa: E402
+from sources import PRESS_URLS  # noqa: E402
+
+FILLER = (
+    "le la les des une dans pour avec sur par ordre information gouvernement ministre "
+    "projet réunion national développement population économie forêt route communiqué "
+    "fermeture panier ordonnance grande orientation travaux jeunesse santé école "
+    "Libreville Port-Gentil Franceville annonce décision public accord"
+).split()
+
+ENTRIES_PER_FEED = 10   # scrape_rss_feed ne lit que les 10 derniers articles
+REPRISE_RATE = 0.2      # part des articles repris par un autre média
+BASE_DATE = datetime(2026, 1, 15, 8, 0, tzinfo=timezone.utc)
+
+
+def outlets():
+    """(catégorie, nom, url) de chaque média de PRESS_URLS"""
+    return [(category, name, url) for category, sources in PRESS_URLS.items() for name, url in sources.items()]
+
+
+def article_text(rng, priority_rate=0.33):
+    """(titre, résumé) d'environ 50 mots, un tiers contenant un mot-clé prioritaire"""
+    words = rng.choices(FILLER, k=rng.randint(40, 90))
+    for _ in range(rng.randint(0, 3)):
+        words.insert(rng.randrange(len(words)), rng.choice(INTELLIGENCE_KEYWORDS + CITIES))
+    if rng.random() < priority_rate:
+        words.insert(rng.randrange(len(words)), rng.choice(PRIORITY_KEYWORDS).capitalize())
+    return " ".join(words[:10]).capitalize(), " ".join(words[10:])
+
+
+def generate_articles(count, seed=42):
+    """Articles {title, summary, link, published, outlet} ; une partie reprend un article précédent"""
+    rng = random.Random(seed)
+    media = outlets()
+    articles = []
+    for i in range(count):
+        _, name, url = media[i % len(media)]
+        host = urlparse(url).netloc
+        if articles and rng.random() < REPRISE_RATE:
+            # Reprise : même dépêche, titre légèrement retouché, autre média
+            original = rng.choice(articles[-200:])
+            title = original['title'] + " selon " + name
+            summary = original['summary']
+        else:
+            title, summary = article_text(rng)
+        articles.append({
+            'title': title,
+            'summary': summary,
+            'link': f"https://{host}/{BASE_DATE.year}/article-{i}/",
+            'published': BASE_DATE - timedelta(minutes=7 * i),
+            'outlet': name,
+        })
+    return articles
+
+
+def rss_document(name, url, articles):
+    """Flux RSS 2.0 au format WordPress (la plupart des médias gabonais)"""
+    items = "".join(
+        "<item>"
+        f"<title>{escape(a['title'])}</title>"
+        f"<link>{escape(a['link'])}</link>"
+        f"<guid isPermaLink=\"true\">{escape(a['link'])}</guid>"
+        f"<pubDate>{format_datetime(a['published'])}</pubDate>"
+        "<dc:creator><![CDATA[Rédaction]]></dc:creator>"
+        "<category><![CDATA[Actualité]]></category>"
+        f"<description><![CDATA[<p>{a['summary']}</p>]]></description>"
+        "</item>"
+        for a in articles
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/">'
+        f"<channel><title>{escape(name)}</title><link>{escape(url)}</link>"
+        "<language>fr-FR</language>"
+        f"{items}</channel></rss>"
+    ).encode('utf-8')
+
+
+def generate_feeds(entries, seed=42):
+    """Flux (nom, url, xml) totalisant `entries` articles, répartis entre les médias"""
+    articles = generate_articles(entries, seed)
+    media = {name: url for _, name, url in outlets()}
+    feeds = []
+    for start in range(0, len(articles), ENTRIES_PER_FEED):
+        chunk = articles[start:start + ENTRIES_PER_FEED]
+        name = chunk[0]['outlet']
+        feeds.append((name, media[name], rss_document(name, media[name], chunk)))
+    return feeds
+
+
+def load_recorded_feeds(directory, entries):
+    """
+    Flux enregistrés (*.xml) rejoués en boucle jusqu'à couvrir `entries` articles
+    (ENTRIES_PER_FEED articles lus par flux)
+    """
+    paths = sorted(glob.glob(os.path.join(directory, '*.xml')))
+    if not paths:
+        raise FileNotFoundError(f"Aucun flux *.xml dans {directory}")
+    recorded = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            name = os.path.splitext(os.path.basename(path))[0]
+            recorded.append((name, f"https://{name}/feed/", f.read()))
+    count = max(1, entries // ENTRIES_PER_FEED)
+    return [recorded[i % len(recorded)] for i in range(count)]
+
+
+def ddg_payloads(queries, per_query=3, seed=7):
+    """Résultats DDGS.text() synthétiques : {query: [{title, href, body}]}"""
+    rng = random.Random(seed)
+    payloads = {}
+    for q, query in enumerate(queries):
+        results = []
+        for r in range(per_query):
+            title, body = article_text(rng, priority_rate=0.5)
+            if rng.random() < 0.7:
+                body += " Gabon"
+            results.append({'title': title, 'href': f"https://example.ga/{q}/{r}",
+                            'link': f"https://example.ga/{q}/{r}", 'body': body})
+        payloads[query] = results
+    return payloads
+
+
+def youtube_payloads(queries, per_query=2, seed=11):
+    """Résultats VideosSearch.result() synthétiques : {query: {'result': [...]}}"""
+    rng = random.Random(seed)
+    payloads = {}
+    for q, query in enumerate(queries):
+        videos = []
+        for r in range(per_query):
+            title, snippet = article_text(rng, priority_rate=0.5)
+            videos.append({
+                'type': 'video', 'id': f"yt{q:06d}{r}", 'title': title,
+                'publishedTime': '2 days ago', 'duration': '4:12',
+                'viewCount': {'text': f"{rng.randint(100, 90000)} views"},
+                'descriptionSnippet': [{'text': snippet}],
+                'channel': {'name': rng.choice(['Gabon 24', 'GMT TV', 'Info241 TV']), 'id': 'UC0'},
+                'link': f"https://www.youtube.com/watch?v=yt{q:06d}{r}",
+            })
+        payloads[query] = {'result': videos}
+    return payloads
+
+
+def query_keywords(count, seed=3):
+    """Liste de mots-clés de base pour generate_search_queries"""
+    rng = random.Random(seed)
+    vocabulary = PRIORITY_KEYWORDS + INTELLIGENCE_KEYWORDS
+    return [rng.choice(vocabulary) for _ in range(count)]
@@ -0,0 +1,70 @@
+"""
+Stub local de l'API REST Supabase (PostgREST) pour les benchmarks (Lynx Eye)
+Accepte les upserts POST /rest/v1/<table> et compte requêtes, lignes et octets reçus.
+Les lignes ne sont pas conservées : seul le coût côté client est mesuré.
+
+Usage autonome:
+python benchmarks/supabase_stub.py --port 54321
+"""
+
+import json
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Clé au format JWT attendue par supabase-py (jamais vérifiée par le stub)
+STUB_KEY = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.c3R1Yg"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        rows = json.loads(body or b'[]')
+        stats = self.server.stats
+        with self.server.lock:
+            stats['requests'] += 1
+            stats['rows'] += len(rows) if isinstance(rows, list) else 1
+            stats['bytes'] += len(body)
+        self.reply(201, b'[]')
+
+    def do_GET(self):
+        with self.server.lock:
+            payload = json.dumps(self.server.stats).encode('utf-8')
+        self.reply(200, payload)
+
+    def reply(self, code, payload):
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(host='127.0.0.1', port=0):
+    """Démarre le stub dans un thread ; retourne (serveur, url de base Supabase)"""
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.stats = {'requests': 0, 'rows': 0, 'bytes': 0}
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, name="supabase-stub", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub local de l'API Supabase")
+    parser.add_argument('--port', type=int, default=54321)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), StubHandler)
+    server.stats = {'requests': 0, 'rows': 0, 'bytes': 0}
+    server.lock = threading.Lock()
+    print(f"Stub Supabase sur http://127.0.0.1:{args.port} (clé: {STUB_KEY})")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Classifier Service for Lynx Eye
+Service local de classification des messages par lots, pour le moniteur WhatsApp
+
+Le moniteur Node (whatsapp_monitor.js) ne garde plus sa propre liste de mots-clés :
+il regroupe les messages reçus et les envoie par lots à ce service, qui applique le
+vocabulaire de keywords.py (matcher.py, termes WhatsApp compris). Pour chaque message :
+pertinent ou non, mots-clés trouvés, catégories, présence d'un mot-clé prioritaire,
+villes citées.
+
+Un lot entier est normalisé puis parcouru en une seule passe de l'automate du
+matcher (KeywordMatcher.scan_batch). Le service écoute en HTTP/1.1 (connexions persistantes)
+sur 127.0.0.1 uniquement :
+- POST /classify  {"messages": [{"id": "...", "text": "..."}, ...]}
+- GET  /health    état du service et taille du vocabulaire
+- GET  /metrics   métriques Prometheus (lynx_classify_*)
+
+Usage:
+python classifier_service.py [--port 8470]
+"""
+
+import json
+import time
+import signal
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import metrics
+from matcher import fold, get_matcher
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8470
+MAX_BATCH = 2000               # messages par requête
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+# Catégories qui ne rendent pas un message pertinent à elles seules ("urgent", "annonce"...)
+CONTEXT_ONLY_CATEGORIES = {'modificateur'}
+CITY_CATEGORY = 'ville'
+
+
+class BatchClassifier:
+    """Classification d'un lot de textes en une passe du matcher partagé"""
+
+    def __init__(self, matcher=None):
+        self.matcher = matcher or get_matcher()
+        self.lock = threading.Lock()
+        self.stats = {'batches': 0, 'messages': 0, 'relevant': 0, 'seconds': 0.0}
+
+    def classify(self, texts):
+        """Une classification par texte : relevant, keywords, categories, priority, cities"""
+        started = time.perf_counter()
+        found = self.matcher.scan_batch([fold(text or '') for text in texts])
+
+        results = []
+        relevant_count = 0
+        for keys in found:
+            keywords, categories, cities = [], [], []
+            priority = False
+            relevant = False
+            for key in keys:
+                info = self.matcher.terms[key]
+                keywords.append(info['keyword'])
+                for category in info['categories']:
+                    if category not in categories:
+                        categories.append(category)
+                if CITY_CATEGORY in info['categories']:
+                    cities.append(info['keyword'])
+                priority = priority or info['priority']
+                relevant = relevant or not CONTEXT_ONLY_CATEGORIES.issuperset(info['categories'])
+            relevant_count += relevant
+            results.append({'relevant': relevant, 'keywords': keywords, 'categories': categories,
+                            'priority': priority, 'cities': cities})
+
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.stats['batches'] += 1
+            self.stats['messages'] += len(texts)
+            self.stats['relevant'] += relevant_count
+            self.stats['seconds'] += elapsed
+        metrics.observe('lynx_classify_seconds', elapsed)
+        metrics.inc('lynx_classify_messages_total', relevant_count, status='relevant')
+        metrics.inc('lynx_classify_messages_total', len(texts) - relevant_count, status='ignored')
+        return results
+
+    def report(self):
+        """Ligne de bilan pour la sortie du service"""
+        rate = self.stats['messages'] / self.stats['seconds'] if self.stats['seconds'] else 0
+        return (f"🏷  Classification: {self.stats['messages']} message(s) en {self.stats['batches']} lot(s) "
+                f"({rate:.0f} messages/s), {self.stats['relevant']} pertinent(s)")
+
+
+def make_handler(classifier):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'   # connexions persistantes : un lot = une requête, sans handshake
+        disable_nagle_algorithm = True  # en-têtes et corps écrits séparément : évite l'attente d'ACK différé (~40 ms)
+
+        def send_body(self, status, body, content_type='application/json'):
+            data = body.encode('utf-8') if isinstance(body, str) else body
+            self.send_response(status)
+            self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def send_json(self, status, payload):
+            self.send_body(status, json.dumps(payload, ensure_ascii=False))
+
+        def do_GET(self):
+            path = self.path.split('?')[0]
+            if path == '/health':
+                with classifier.lock:
+                    stats = dict(classifier.stats)
+                self.send_json(200, {'status': 'ok', 'terms': len(classifier.matcher), **stats})
+            elif path == '/metrics':
+                self.send_body(200, metrics.REGISTRY.render(), 'text/plain; version=0.0.4')
+            else:
+                self.send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path.split('?')[0] != '/classify':
+                self.send_json(404, {'error': 'not found'})
+                return
+            length = int(self.headers.get('Content-Length') or 0)
+            if length > MAX_BODY_BYTES:
+                self.close_connection = True
+                self.send_json(413, {'error': f'corps limité à {MAX_BODY_BYTES} octets'})
+                return
+            try:
+                messages = json.loads(self.rfile.read(length) or b'{}').get('messages')
+                if not isinstance(messages, list):
+                    raise ValueError("champ 'messages' (liste) manquant")
+                if len(messages) > MAX_BATCH:
+                    raise ValueError(f"lot limité à {MAX_BATCH} messages")
+                texts = [message.get('text') if isinstance(message, dict) else message for message in messages]
+                if not all(text is None or isinstance(text, str) for text in texts):
+                    raise ValueError("'text' doit être une chaîne")
+            except (ValueError, AttributeError) as e:
+                self.send_json(400, {'error': str(e)})
+                return
+            results = classifier.classify(texts)
+            for message, result in zip(messages, results):
+                if isinstance(message, dict) and 'id' in message:
+                    result['id'] = message['id']
+            self.send_json(200, {'results': results})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(port=DEFAULT_PORT, host=DEFAULT_HOST, classifier=None):
+    """Démarre le service dans un thread ; retourne le serveur (shutdown() pour l'arrêter)"""
+    classifier = classifier or BatchClassifier()
+    server = ThreadingHTTPServer((host, port), make_handler(classifier))
+    server.daemon_threads = True
+    server.classifier = classifier
+    threading.Thread(target=server.serve_forever, name="classifier-http", daemon=True).start()
+    return server
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Lynx Eye - service de classification des messages")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Port d'écoute")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="Adresse d'écoute (locale par défaut)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = serve(args.port, args.host)
+    print(f"🏷  Service de classification: http://{args.host}:{args.port}/classify "
+          f"({len(server.classifier.matcher)} termes)")
+    stop_event = threading.Event()
+
+    def stop(signum, frame):
+        print(f"\n🛑 Signal {signal.Signals(signum).name} reçu")
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    stop_event.wait()
+    server.shutdown()
+    print(server.classifier.report())
+
+
+if __name__ == '__main__':
+    main()
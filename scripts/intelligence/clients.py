@@ -0,0 +1,35 @@
+"""
+Lazy Clients for Lynx Eye
+Création à la demande du client Supabase (et lecture du .env)
+
+Aucun module n'ouvre de client à l'import : supabase et python-dotenv ne sont
+chargés qu'au premier appel de get_supabase(), par l'étape qui en a besoin.
+"""
+
+import os
+import sys
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def load_env():
+    """Charge le fichier .env (une seule fois)"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+@lru_cache(maxsize=None)
+def get_supabase():
+    """Client Supabase partagé par tout le processus"""
+    load_env()
+    from supabase import create_client
+
+    # Configuration Supabase
+    url = os.getenv('SUPABASE_URL')
+    key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+
+    if not url or not key:
+        print("❌ Erreur: Variables SUPABASE_URL et SUPABASE_SERVICE_ROLE_KEY requises dans .env")
+        sys.exit(1)
+
+    return create_client(url, key)
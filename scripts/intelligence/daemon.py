@@ -0,0 +1,367 @@
+"""
+Lynx Eye Daemon
+Processus de collecte permanent, alternative aux tâches cron de setup_cron.sh
+
+Un seul processus garde le client Supabase, le spool, son flusher et l'index des
+histoires en vie. Chaque flux RSS est interrogé à son propre rythme : l'intervalle
+est déduit du rythme de publication observé (dates des entrées, moyenne mobile
+exponentielle conservée dans feed_state), borné par --min-interval / --max-interval,
+avec une gigue aléatoire pour ne pas interroger tous les flux en même temps.
+Un média très actif est donc relevé souvent, un média calme rarement.
+Les sites sans flux RSS (html_crawler.py) sont crawlés périodiquement (--html-interval),
+avec leur propre état de crawl ; la collecte web/YouTube reste périodique (--web-interval).
+Les métriques (metrics.py) sont exposées en continu sur http://127.0.0.1:9464/metrics.
+
+Usage:
+python daemon.py
+python daemon.py --min-interval 5 --max-interval 360 --html-interval 60 --web-interval 12
+"""
+
+import time
+import random
+import signal
+import argparse
+import threading
+import traceback
+from datetime import datetime
+
+import metrics
+from sources import get_rss_sources
+from feed_state import FeedStateStore, entry_timestamps
+from fetcher import DEFAULT_MAX_WORKERS, DEFAULT_TIMEOUT, DEFAULT_DEADLINE
+from html_crawler import iter_html_items, CrawlState, DEFAULT_MAX_LINKS
+from pipeline import Pipeline, SpoolSink, dedup_stage, scoring_stage, reward_stage, trend_stage, archive_stage
+
+DEFAULT_MIN_INTERVAL = 5        # minutes
+DEFAULT_MAX_INTERVAL = 360      # minutes
+DEFAULT_INTERVAL = 60           # minutes, tant que le rythme d'un flux est inconnu
+DEFAULT_TARGET = 1.0            # nouveaux articles visés par interrogation
+DEFAULT_JITTER = 0.15           # ±15 %
+DEFAULT_HTML_INTERVAL = 60      # minutes (0 : pas de crawl des sites sans RSS)
+DEFAULT_WEB_INTERVAL = 12       # heures (0 : pas de collecte web)
+DEFAULT_FLUSH_TIMEOUT = 120     # secondes, à l'arrêt
+FAILURE_BACKOFF = 60            # secondes avant de relancer une collecte en échec, doublé à chaque échec
+CRON_RSS_INTERVAL = 180         # minutes, fréquence fixe de setup_cron.sh (comparaison)
+DEFAULT_METRICS_PORT = 9464
+
+
+class FeedScheduler:
+    """Prochaine interrogation de chaque flux, persistée dans feed_state (next_poll_at)"""
+
+    def __init__(self, feed_state, rss_sources, min_interval=DEFAULT_MIN_INTERVAL,
+                 max_interval=DEFAULT_MAX_INTERVAL, default_interval=DEFAULT_INTERVAL,
+                 target=DEFAULT_TARGET, jitter=DEFAULT_JITTER, rng=None):
+        self.feed_state = feed_state
+        self.sources = {url: (category, name, url) for category, name, url in rss_sources}
+        self.min_interval = min_interval * 60
+        self.max_interval = max_interval * 60
+        self.default_interval = default_interval * 60
+        self.target = target
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        now = time.time()
+        self.next_at = {}
+        for url in self.sources:
+            # Premier passage réparti sur la première minute
+            self.next_at[url] = feed_state.get(url).get('next_poll_at') or now + self.rng.uniform(0, 60)
+
+    def interval(self, url):
+        """Intervalle de base (secondes) : target / rythme, backoff exponentiel après des échecs"""
+        state = self.feed_state.get(url)
+        failures = state.get('failures', 0)
+        rate = state.get('rate')
+        if failures:
+            base = max(self.default_interval, self.min_interval) * 2 ** (failures - 1)
+        elif rate:
+            base = self.target / rate * 3600
+        else:
+            base = self.default_interval
+        return min(self.max_interval, max(self.min_interval, base))
+
+    def schedule(self, url, now=None):
+        """Planifie la prochaine interrogation avec gigue ; retourne le délai (secondes)"""
+        now = now or time.time()
+        delay = self.interval(url) * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+        delay = min(self.max_interval * (1 + self.jitter), max(self.min_interval, delay))
+        self.next_at[url] = now + delay
+        self.feed_state.get(url)['next_poll_at'] = self.next_at[url]
+        return delay
+
+    def due(self, now=None):
+        """Flux à interroger maintenant (format de get_rss_sources)"""
+        now = now or time.time()
+        return [self.sources[url] for url, at in self.next_at.items() if at <= now]
+
+    def next_due(self):
+        return min(self.next_at.values()) if self.next_at else None
+
+
+class Daemon:
+    def __init__(self, args):
+        # Client Supabase créé une seule fois pour toute la durée du processus
+        from rss_scraper import iter_rss_items, start_flusher
+        from dedup import StoryClusterer
+        from spool import Spool
+        from scoring import RelevanceScorer
+        from health import HealthStore
+        from archive import ArchiveWriter
+        from trends import TrendDetector
+
+        self.args = args
+        self.iter_rss_items = iter_rss_items
+        self.stop_event = threading.Event()
+        self.feed_state = FeedStateStore()
+        self.scheduler = FeedScheduler(self.feed_state, get_rss_sources(), args.min_interval,
+                                       args.max_interval, target=args.target, jitter=args.jitter)
+        self.flusher = start_flusher()
+        self.spool = Spool()
+        self.sink = SpoolSink(self.spool, self.flusher)
+        self.clusterer = StoryClusterer()
+        self.scorer = RelevanceScorer()
+        self.health = HealthStore()
+        self.trends = None if args.no_trends else TrendDetector()
+        self.archive = None if args.no_archive else ArchiveWriter()
+        self.crawl_state = CrawlState() if args.html_interval > 0 else None
+        self.started = time.time()
+        self.next_html_at = time.time() if args.html_interval > 0 else None
+        self.next_web_at = time.time() if args.web_interval > 0 else None
+        self.stats = {'rounds': 0, 'polls': 0, 'new_entries': 0, 'items': 0, 'html_rounds': 0, 'web_rounds': 0,
+                      'failures': 0}
+        self.failures = {'rss': 0, 'html': 0, 'web': 0}     # échecs consécutifs par collecte
+        self.metrics_server = None
+        if args.metrics_port:
+            self.metrics_server = metrics.serve(args.metrics_port, host=args.metrics_host)
+            print(f"📈 Métriques: http://{args.metrics_host}:{args.metrics_port}/metrics")
+
+    def stages(self):
+        stages = [dedup_stage(self.clusterer),
+                  scoring_stage(self.scorer, min_score=self.args.min_score)]
+        if self.trends is not None and self.trends.enabled:
+            stages.append(trend_stage(self.trends))
+        if self.archive is not None and self.archive.enabled:
+            stages.append(archive_stage(self.archive))
+        return stages
+
+    def poll_feeds(self, due):
+        """Une tournée : interroge les flux dus et replanifie chacun d'eux"""
+        names = {url: name for _, name, url in due}
+        new_counts = {}
+        started = time.time()
+
+        def on_feed(url, feed, error):
+            if error:
+                self.feed_state.record_failure(url)
+                new_counts[url] = None
+            else:
+                new_counts[url] = self.feed_state.record_entries(url, entry_timestamps(feed) if feed else [])
+            delay = self.scheduler.schedule(url)
+            metrics.set_gauge('lynx_feed_poll_interval_seconds', delay, source=names[url])
+
+        pipeline = Pipeline(self.sink, stages=self.stages())
+        pipeline.run({
+            'rss': lambda: self.iter_rss_items(
+                max_workers=self.args.workers, timeout=DEFAULT_TIMEOUT, deadline=DEFAULT_DEADLINE,
+                feed_state=self.feed_state, rss_sources=due, on_feed=on_feed, health=self.health
+            ),
+        })
+        self.feed_state.save()
+        self.health.save()
+        if self.trends is not None:
+            self.trends.save()
+        metrics.record_run('rss', started)
+
+        self.stats['rounds'] += 1
+        self.stats['polls'] += len(due)
+        self.stats['new_entries'] += sum(n for n in new_counts.values() if n)
+        self.stats['items'] += pipeline.stats['sunk']
+        for url, new in new_counts.items():
+            state = self.feed_state.get(url)
+            rate = f"{state['rate']:.2f} art/h" if state.get('rate') else "rythme inconnu"
+            status = "échec" if new is None else f"{new} nouveau(x)"
+            delay = (self.scheduler.next_at[url] - time.time()) / 60
+            print(f"   ⏲  {names[url]}: {status}, {rate} → prochain passage dans {delay:.0f} min")
+
+    def crawl_sites(self):
+        """Crawl périodique des sites sans flux RSS, état de crawl conservé entre les tournées"""
+        started = time.time()
+        pipeline = Pipeline(self.sink, stages=self.stages())
+        pipeline.run({
+            'html': lambda: iter_html_items(
+                self.crawl_state, max_workers=self.args.workers, timeout=DEFAULT_TIMEOUT,
+                deadline=DEFAULT_DEADLINE, max_links=self.args.max_links, health=self.health
+            ),
+        })
+        self.health.save()
+        if self.trends is not None:
+            self.trends.save()
+        metrics.record_run('html', started)
+        self.stats['html_rounds'] += 1
+        self.stats['items'] += pipeline.stats['sunk']
+        self.next_html_at = time.time() + self.args.html_interval * 60
+        print(f"   🕸  Sites HTML: {pipeline.stats['sunk']} item(s) en file, "
+              f"prochain crawl dans {self.args.html_interval:.0f} min")
+
+    def collect_web(self):
+        """Collecte web/YouTube périodique, dans le même processus"""
+        from web_scraper import web_sources
+        from query_cache import QueryCache
+        from query_planner import QueryPlanner, RELEVANT_SCORE
+
+        started = time.time()
+        cache = QueryCache()
+        planner = QueryPlanner()
+        try:
+            pipeline = Pipeline(self.sink, stages=self.stages() + [reward_stage(planner, RELEVANT_SCORE)])
+            pipeline.run(web_sources(self.args.max_queries, cache=cache, planner=planner, health=self.health))
+            planner.save()
+            self.health.save()
+            if self.trends is not None:
+                self.trends.save()
+        finally:
+            print(cache.report())
+            print(planner.report())
+            cache.close()
+            planner.close()
+        metrics.record_run('web', started)
+        self.stats['web_rounds'] += 1
+        self.stats['items'] += pipeline.stats['sunk']
+        self.next_web_at = time.time() + self.args.web_interval * 3600
+
+    def attempt(self, collector, action, *args, max_delay):
+        """
+        Exécute une collecte ; une exception est journalisée et comptée sans arrêter le daemon.
+        Retourne None si elle réussit, sinon le délai (secondes) avant le prochain essai
+        """
+        try:
+            action(*args)
+        except Exception as e:
+            self.failures[collector] += 1
+            self.stats['failures'] += 1
+            metrics.inc('lynx_run_failures_total', collector=collector)
+            delay = min(max_delay, FAILURE_BACKOFF * 2 ** (self.failures[collector] - 1))
+            print(f"   ✗ Collecte {collector} en échec ({self.failures[collector]} de suite), "
+                  f"nouvel essai dans {delay / 60:.0f} min: {e}")
+            traceback.print_exc()
+            return delay
+        self.failures[collector] = 0
+        return None
+
+    def run(self):
+        print(f"🦅 Daemon démarré: {len(self.scheduler.sources)} flux, intervalle "
+              f"{self.args.min_interval}-{self.args.max_interval} min, sites HTML toutes les "
+              f"{self.args.html_interval} min, web toutes les {self.args.web_interval}h")
+        while not self.stop_event.is_set():
+            now = time.time()
+            due = self.scheduler.due(now)
+            if due:
+                print(f"\n🔄 [{datetime.now().strftime('%H:%M:%S')}] {len(due)} flux à interroger")
+                delay = self.attempt('rss', self.poll_feeds, due, max_delay=self.args.max_interval * 60)
+                if delay is not None:
+                    # Flux que la tournée interrompue n'a pas replanifiés
+                    for _, _, url in due:
+                        if self.scheduler.next_at[url] <= now:
+                            self.scheduler.next_at[url] = time.time() + delay
+            if self.next_html_at is not None and now >= self.next_html_at:
+                print(f"\n🕸  [{datetime.now().strftime('%H:%M:%S')}] Crawl des sites sans RSS")
+                delay = self.attempt('html', self.crawl_sites, max_delay=self.args.html_interval * 60)
+                if delay is not None:
+                    self.next_html_at = time.time() + delay
+            if self.next_web_at is not None and now >= self.next_web_at:
+                print(f"\n🌐 [{datetime.now().strftime('%H:%M:%S')}] Collecte web")
+                delay = self.attempt('web', self.collect_web, max_delay=self.args.web_interval * 3600)
+                if delay is not None:
+                    self.next_web_at = time.time() + delay
+
+            wake_at = [at for at in (self.scheduler.next_due(), self.next_html_at, self.next_web_at)
+                       if at is not None]
+            wait = min(wake_at) - time.time() if wake_at else 60
+            self.stop_event.wait(max(1.0, min(wait, 60)))
+
+    def shutdown(self):
+        print(f"\n⏳ Arrêt: vidage du spool (max {self.args.flush_timeout:.0f}s)...")
+        self.flusher.stop(timeout=self.args.flush_timeout)
+        print(self.flusher.report())
+        self.clusterer.close()
+        self.spool.close()
+        if self.crawl_state is not None:
+            self.crawl_state.close()
+        self.feed_state.save()
+        self.health.save()
+        self.health.close()
+        if self.archive is not None:
+            self.archive.close()
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+        print(metrics.stage_report())
+        print(self.scorer.report())
+        print(self.health.report())
+        if self.trends is not None:
+            print(self.trends.report())
+        if self.archive is not None:
+            print(self.archive.report())
+        print(self.report())
+
+    def report(self):
+        """Bilan : interrogations effectuées comparées à un relevé fixe toutes les 3h"""
+        hours = (time.time() - self.started) / 3600
+        cron_polls = len(self.scheduler.sources) * hours * 60 / CRON_RSS_INTERVAL
+        return (f"📊 {hours:.1f}h: {self.stats['polls']} interrogation(s) de flux en {self.stats['rounds']} tournée(s) "
+                f"(cron fixe 3h: ~{cron_polls:.0f}), {self.stats['new_entries']} nouvelle(s) entrée(s), "
+                f"{self.stats['items']} item(s) en file, {self.stats['html_rounds']} crawl(s) HTML, "
+                f"{self.stats['web_rounds']} collecte(s) web"
+                + (f", {self.stats['failures']} collecte(s) en échec" if self.stats['failures'] else ""))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Lynx Eye - daemon de collecte")
+    parser.add_argument('--min-interval', type=float, default=DEFAULT_MIN_INTERVAL,
+                        help="Intervalle minimal entre deux interrogations d'un flux (minutes)")
+    parser.add_argument('--max-interval', type=float, default=DEFAULT_MAX_INTERVAL,
+                        help="Intervalle maximal entre deux interrogations d'un flux (minutes)")
+    parser.add_argument('--target', type=float, default=DEFAULT_TARGET,
+                        help="Nombre de nouveaux articles visé par interrogation")
+    parser.add_argument('--jitter', type=float, default=DEFAULT_JITTER,
+                        help="Gigue relative appliquée aux intervalles (0.15 = ±15%%)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS,
+                        help="Nombre de flux téléchargés simultanément")
+    parser.add_argument('--html-interval', type=float, default=DEFAULT_HTML_INTERVAL,
+                        help="Intervalle du crawl des sites sans flux RSS (minutes, 0 pour désactiver)")
+    parser.add_argument('--max-links', type=int, default=DEFAULT_MAX_LINKS,
+                        help="Articles téléchargés au maximum par site et par crawl")
+    parser.add_argument('--web-interval', type=float, default=DEFAULT_WEB_INTERVAL,
+                        help="Intervalle de la collecte web/YouTube (heures, 0 pour désactiver)")
+    parser.add_argument('--max-queries', type=int, default=15,
+                        help="Requêtes web par collecte")
+    parser.add_argument('--flush-timeout', type=float, default=DEFAULT_FLUSH_TIMEOUT,
+                        help="Durée maximale de vidage du spool à l'arrêt (secondes)")
+    parser.add_argument('--min-score', type=float, default=0.0,
+                        help="Score de pertinence minimal (0-100) pour enregistrer un item")
+    parser.add_argument('--no-trends', action='store_true',
+                        help="Ne pas surveiller les pics de mots-clés (trends.py)")
+    parser.add_argument('--no-archive', action='store_true',
+                        help="Ne pas ajouter les items à l'archive locale (archive.py, Parquet)")
+    parser.add_argument('--metrics-port', type=int, default=DEFAULT_METRICS_PORT,
+                        help="Port de l'endpoint Prometheus /metrics (0 pour désactiver)")
+    parser.add_argument('--metrics-host', default='127.0.0.1',
+                        help="Adresse d'écoute de l'endpoint /metrics")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    daemon = Daemon(args)
+
+    def stop(signum, frame):
+        print(f"\n🛑 Signal {signal.Signals(signum).name} reçu")
+        daemon.stop_event.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        daemon.run()
+    finally:
+        daemon.shutdown()
+
+
+if __name__ == '__main__':
+    main()
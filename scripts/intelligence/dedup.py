@@ -0,0 +1,316 @@
+"""
+Story Clustering for Lynx Eye
+Détection des quasi-doublons entre médias (même dépêche reprise par plusieurs sites)
+
+Chaque item reçoit une signature MinHash de l'ensemble des bigrammes de mots de son
+contenu. La signature est découpée en bandes (LSH) : deux contenus proches (Jaccard
+élevé) partagent au moins une bande avec une forte probabilité, les candidats sont
+donc trouvés par table de hachage sans comparaison deux à deux avec toute la fenêtre,
+puis vérifiés par similarité estimée. Seul l'item canonique d'une histoire est
+enregistré, accompagné de la liste de ses sources (story_sources).
+"""
+
+import re
+import json
+import time
+import random
+import sqlite3
+import hashlib
+from array import array
+from collections import deque, Counter
+
+from matcher import fold
+from seen_index import item_key
+from state import state_path
+
+DEFAULT_FILENAME = 'story_clusters.sqlite3'
+DEFAULT_THRESHOLD = 0.5
+DEFAULT_MAX_ITEMS = 50000
+DEFAULT_MAX_AGE_HOURS = 72
+
+# 10 bandes de 3 valeurs : seuil LSH ~ (1/10)^(1/3) = 0.46
+BANDS = 10
+ROWS = 3
+NUM_HASHES = BANDS * ROWS
+
+# Une fonction de hachage par valeur de signature : h XOR sel (sels fixes, pour que
+# les signatures restent comparables d'une exécution à l'autre)
+_rng = random.Random(0x1F9A)
+_SALTS = [_rng.getrandbits(64) for _ in range(NUM_HASHES)]
+
+_WORD_RE = re.compile(r'\w+')
+
+# Mots trop fréquents pour distinguer deux articles
+STOPWORDS = {
+    'le', 'la', 'les', 'un', 'une', 'des', 'de', 'du', 'd', 'l', 'et', 'ou', 'a', 'au', 'aux',
+    'en', 'dans', 'par', 'pour', 'sur', 'avec', 'que', 'qui', 'ce', 'cette', 'ces', 'est',
+    'sont', 'il', 'elle', 'ils', 'se', 'sa', 'son', 'ses', 'leur', 'leurs', 'ne', 'pas', 'plus',
+    'the', 'of', 'and', 'to', 'in', 'is',
+}
+
+
+def shingles(text):
+    """Ensemble des bigrammes de mots (hors mots vides) du texte normalisé, hachés sur 64 bits"""
+    words = [w for w in _WORD_RE.findall(fold(text)) if w not in STOPWORDS]
+    tokens = {f"{a} {b}" for a, b in zip(words, words[1:])} or set(words)
+    return [int.from_bytes(hashlib.blake2b(t.encode('utf-8'), digest_size=8).digest(), 'big')
+            for t in tokens]
+
+
+def minhash(text):
+    """Signature MinHash (NUM_HASHES valeurs), ou None si le texte n'a pas de mots"""
+    hashes = shingles(text)
+    if not hashes:
+        return None
+    return [min(map(salt.__xor__, hashes)) for salt in _SALTS]
+
+
+def band_keys(signature):
+    """Clés LSH : une par bande, l'indice de bande inclus dans la clé"""
+    return [hash((band,) + tuple(signature[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+
+def compact(signature):
+    """Signature réduite à l'octet de poids faible de chaque valeur (b-bit MinHash)"""
+    return bytes(value & 0xFF for value in signature)
+
+
+def similarity(a, b):
+    """Similarité de Jaccard estimée à partir de deux signatures compactes"""
+    agree = sum(1 for x, y in zip(a, b) if x == y) / NUM_HASHES
+    # Correction des collisions fortuites sur 8 bits
+    return max(0.0, (agree - 1 / 256) / (1 - 1 / 256))
+
+
+class StoryClusterer:
+    """
+    Fenêtre glissante (taille et âge bornés) de signatures indexées par bandes LSH.
+    L'état est persisté en SQLite pour être partagé entre exécutions et scrapers ;
+    refresh() y relit les signatures écrites entre-temps par d'autres processus (worker.py).
+    """
+
+    def __init__(self, path=None, threshold=DEFAULT_THRESHOLD, max_items=DEFAULT_MAX_ITEMS,
+                 max_age_hours=DEFAULT_MAX_AGE_HOURS):
+        self.threshold = threshold
+        self.max_items = max_items
+        self.max_age = max_age_hours * 3600
+        self.window = deque()     # (seen_at, entry_id), du plus ancien au plus récent
+        self.entries = {}         # entry_id -> (signature compacte, cluster_id, clés de bandes)
+        self.buckets = {}         # clé de bande -> entry_id, ou liste d'entry_id en cas de collision
+        self.clusters = {}        # cluster_id -> {'canonical': item, 'sources': [...]}
+        self.members = Counter()  # cluster_id -> nombre de signatures dans la fenêtre
+        self.next_id = 0
+        self.last_rowid = 0       # dernière signature de la base déjà intégrée à la fenêtre
+        self.new_entries = []
+        self.touched = set()
+        self.stats = {'items': 0, 'new_stories': 0, 'merged': 0}
+
+        # Partagé par les workers d'une machine : WAL et attente du verrou
+        self.db = sqlite3.connect(path or state_path(DEFAULT_FILENAME), timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(
+            "CREATE TABLE IF NOT EXISTS clusters ("
+            " id TEXT PRIMARY KEY, canonical TEXT NOT NULL, sources TEXT NOT NULL, updated_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS signatures ("
+            " signature BLOB NOT NULL, seen_at REAL NOT NULL, cluster_id TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS signatures_seen_at ON signatures (seen_at);"
+        )
+        self.load()
+
+    def load(self):
+        """Charge la fenêtre récente depuis SQLite"""
+        since = time.time() - self.max_age
+        rows = self.db.execute(
+            "SELECT rowid, signature, seen_at, cluster_id FROM signatures WHERE seen_at >= ?"
+            " ORDER BY seen_at DESC LIMIT ?", (since, self.max_items)
+        ).fetchall()
+        for rowid, blob, seen_at, cluster_id in reversed(rows):
+            self._index(array('Q', blob).tolist(), seen_at, cluster_id)
+            self.last_rowid = max(self.last_rowid, rowid)
+
+        for cluster_id, canonical, sources in self.db.execute(
+                "SELECT id, canonical, sources FROM clusters WHERE updated_at >= ?", (since,)):
+            if cluster_id in self.members:
+                self.clusters[cluster_id] = {'canonical': json.loads(canonical), 'sources': json.loads(sources)}
+
+    def refresh(self):
+        """
+        Intègre les signatures écrites par d'autres processus depuis la dernière lecture et
+        fusionne les sources de leurs histoires ; retourne le nombre de signatures lues
+        """
+        since = time.time() - self.max_age
+        rows = self.db.execute(
+            "SELECT rowid, signature, seen_at, cluster_id FROM signatures WHERE rowid > ? ORDER BY rowid",
+            (self.last_rowid,)
+        ).fetchall()
+        changed = set()
+        for rowid, blob, seen_at, cluster_id in rows:
+            self.last_rowid = rowid
+            if seen_at >= since:
+                self._index(array('Q', blob).tolist(), seen_at, cluster_id)
+                changed.add(cluster_id)
+        changed = list(changed)
+        for start in range(0, len(changed), 500):
+            chunk = changed[start:start + 500]
+            for cluster_id, canonical, sources in self.db.execute(
+                    f"SELECT id, canonical, sources FROM clusters WHERE id IN ({','.join('?' * len(chunk))})", chunk):
+                cluster = self.clusters.get(cluster_id)
+                if cluster is None:
+                    self.clusters[cluster_id] = {'canonical': json.loads(canonical), 'sources': json.loads(sources)}
+                    continue
+                known = {source['external_id'] for source in cluster['sources']}
+                cluster['sources'].extend(source for source in json.loads(sources)
+                                          if source['external_id'] not in known)
+        return len(rows)
+
+    def _index(self, signature, seen_at, cluster_id):
+        entry_id = self.next_id
+        self.next_id += 1
+        keys = band_keys(signature)
+        self.entries[entry_id] = (compact(signature), cluster_id, array('q', keys))
+        self.window.append((seen_at, entry_id))
+        self.members[cluster_id] += 1
+        for key in keys:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                self.buckets[key] = entry_id
+            elif isinstance(bucket, list):
+                bucket.append(entry_id)
+            else:
+                self.buckets[key] = [bucket, entry_id]
+
+    def _evict(self, now):
+        while self.window and (len(self.window) > self.max_items or self.window[0][0] < now - self.max_age):
+            _, entry_id = self.window.popleft()
+            _, cluster_id, keys = self.entries.pop(entry_id)
+            for key in keys:
+                bucket = self.buckets.get(key)
+                if isinstance(bucket, list):
+                    bucket.remove(entry_id)
+                    if len(bucket) == 1:
+                        self.buckets[key] = bucket[0]
+                elif bucket == entry_id:
+                    del self.buckets[key]
+            self.members[cluster_id] -= 1
+            if self.members[cluster_id] <= 0:
+                del self.members[cluster_id]
+                self.clusters.pop(cluster_id, None)
+
+    def find(self, signature):
+        """Histoire la plus proche au-dessus du seuil de similarité, ou None"""
+        candidates = set()
+        for key in band_keys(signature):
+            bucket = self.buckets.get(key)
+            if isinstance(bucket, list):
+                candidates.update(bucket)
+            elif bucket is not None:
+                candidates.add(bucket)
+
+        signature = compact(signature)
+        best = None
+        for entry_id in candidates:
+            candidate, cluster_id, _ = self.entries[entry_id]
+            score = similarity(signature, candidate)
+            if score >= self.threshold and (best is None or score > best[0]):
+                best = (score, cluster_id)
+        return best[1] if best else None
+
+    def add(self, item, now=None, signature=None):
+        """Rattache un item à une histoire existante ou en crée une. Retourne (cluster_id, nouvelle)"""
+        now = now or time.time()
+        self._evict(now)
+        self.stats['items'] += 1
+
+        if signature is None:
+            signature = minhash(item.get('content') or '')
+        cluster_id = self.find(signature) if signature else None
+        source = {'author': item.get('author'), 'external_id': item.get('external_id')}
+
+        if cluster_id is None or cluster_id not in self.clusters:
+            # Un article déjà connu dont le contenu a trop changé reste dans son histoire
+            cluster_id = item_key(item) or f"story:{self.next_id}:{now}"
+
+        is_new = cluster_id not in self.clusters
+        known = False
+        if is_new:
+            self.clusters[cluster_id] = {'canonical': item, 'sources': [source]}
+            self.stats['new_stories'] += 1
+        else:
+            sources = self.clusters[cluster_id]['sources']
+            known = source['external_id'] in (s['external_id'] for s in sources)
+            if not known:
+                sources.append(source)
+                self.stats['merged'] += 1
+
+        # Un contenu vide n'a pas de signature exploitable ; une source déjà rattachée
+        # (article relu à chaque exécution) est déjà indexée
+        if signature and not known:
+            self._index(signature, now, cluster_id)
+            self.new_entries.append((array('Q', signature).tobytes(), now, cluster_id))
+        self.touched.add(cluster_id)
+        return cluster_id, is_new
+
+    def collapse(self, items):
+        """
+        Regroupe les items en histoires et retourne les items à enregistrer :
+        l'item canonique de chaque histoire touchée, avec story_sources s'il a plusieurs sources.
+        `_new_story` indique si l'histoire a été créée par ce lot (utilisé par query_planner.py).
+        """
+        output = {}
+        created = set()
+        for item in items:
+            signature = minhash(item.get('content') or '')
+            if not signature:
+                output[id(item)] = item
+                continue
+            cluster_id, is_new = self.add(item, signature=signature)
+            if is_new:
+                created.add(cluster_id)
+            cluster = self.clusters[cluster_id]
+            is_canonical = item.get('external_id') == cluster['canonical'].get('external_id')
+            if is_canonical:
+                cluster['canonical'] = item
+            if is_canonical or len(cluster['sources']) > 1:
+                canonical = dict(cluster['canonical'])
+                canonical['_new_story'] = cluster_id in created
+                if len(cluster['sources']) > 1:
+                    canonical['story_sources'] = list(cluster['sources'])
+                output[cluster_id] = canonical
+        return list(output.values())
+
+    def save(self):
+        """Persiste les nouvelles signatures et les histoires modifiées, purge la fenêtre expirée"""
+        now = time.time()
+        with self.db:
+            # Verrou d'écriture pris avant la relecture : aucune signature d'un autre processus
+            # ne peut s'intercaler entre celles-ci et les nôtres (last_rowid reste exact)
+            self.db.execute("BEGIN IMMEDIATE")
+            self.refresh()
+            self.db.executemany(
+                "INSERT INTO signatures (signature, seen_at, cluster_id) VALUES (?, ?, ?)",
+                self.new_entries
+            )
+            self.last_rowid = self.db.execute("SELECT COALESCE(MAX(rowid), 0) FROM signatures").fetchone()[0]
+            self.db.executemany(
+                "INSERT INTO clusters (id, canonical, sources, updated_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET canonical = excluded.canonical,"
+                " sources = excluded.sources, updated_at = excluded.updated_at",
+                [
+                    (cluster_id, json.dumps(self._persistable(self.clusters[cluster_id]['canonical']),
+                                            ensure_ascii=False),
+                     json.dumps(self.clusters[cluster_id]['sources'], ensure_ascii=False), now)
+                    for cluster_id in self.touched if cluster_id in self.clusters
+                ]
+            )
+            self.db.execute("DELETE FROM signatures WHERE seen_at < ?", (now - self.max_age,))
+            self.db.execute("DELETE FROM clusters WHERE updated_at < ?", (now - self.max_age,))
+        self.new_entries = []
+        self.touched = set()
+
+    @staticmethod
+    def _persistable(item):
+        return {k: v for k, v in item.items() if not k.startswith('_')}
+
+    def close(self):
+        self.db.close()
+
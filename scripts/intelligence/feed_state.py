@@ -0,0 +1,219 @@
+"""
+Feed State Store for Lynx Eye
+Mémorise pour chaque flux son ETag, son Last-Modified et l'empreinte du contenu
+afin d'envoyer des requêtes conditionnelles et d'éviter de reparser un flux inchangé,
+ainsi que son rythme de publication estimé (utilisé par le planificateur du daemon)
+et son watermark : date de l'entrée la plus récente traitée et derniers GUIDs vus,
+pour arrêter le traitement à la première entrée déjà vue
+"""
+
+import json
+import os
+import math
+import time
+import hashlib
+import calendar
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou entre processus
+    fcntl = None
+
+from state import state_path
+
+DEFAULT_FILENAME = 'feed_state.json'
+
+# Constante de temps (heures) de la moyenne mobile exponentielle du rythme de publication
+RATE_TIME_CONSTANT = 24.0
+
+# GUIDs conservés dans le watermark d'un flux
+WATERMARK_GUIDS = 100
+
+
+def content_hash(content):
+    """Empreinte SHA-256 du contenu brut d'un flux"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def entry_timestamp(entry):
+    """Date de publication (epoch UTC) d'une entrée feedparser, None si absente"""
+    parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+    return calendar.timegm(parsed) if parsed else None
+
+
+def entry_guid(entry):
+    """Identifiant stable d'une entrée : GUID du flux, sinon lien"""
+    return entry.get('id') or entry.get('link') or ''
+
+
+def entry_timestamps(feed):
+    """Dates de publication (epoch UTC) des entrées d'un flux parsé par feedparser"""
+    return [t for t in map(entry_timestamp, feed.entries) if t is not None]
+
+
+def unseen_entries(entries, watermark):
+    """
+    Entrées précédant la première entrée déjà vue (GUID connu ou date antérieure au
+    watermark), dans l'ordre du flux. Retourne (entrées, watermark atteint)
+    """
+    if not watermark:
+        return list(entries), False
+    guids = set(watermark.get('guids', ()))
+    newest = watermark.get('published')
+    fresh = []
+    for entry in entries:
+        published = entry_timestamp(entry)
+        if entry_guid(entry) in guids or (newest is not None and published is not None and published < newest):
+            return fresh, True
+        fresh.append(entry)
+    return fresh, False
+
+
+class FeedStateStore:
+    """Stockage JSON sur disque de l'état de chaque flux, indexé par URL"""
+
+    def __init__(self, path=None):
+        self.path = path or state_path(DEFAULT_FILENAME)
+        self.feeds = {}
+        self.load()
+
+    def read(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f).get('feeds', {})
+        except FileNotFoundError:
+            return {}
+        except (ValueError, OSError) as e:
+            print(f"  ⚠️  État des flux illisible ({e}), réinitialisation")
+            return {}
+
+    def load(self):
+        self.feeds = self.read()
+
+    @contextmanager
+    def file_lock(self):
+        """Verrou exclusif entre processus (workers d'une même machine, voir worker.py)"""
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def save(self, urls=None):
+        """
+        Écriture atomique (fichier temporaire puis renommage)
+        urls : seuls ces flux sont écrits, fusionnés avec l'état sur disque (les autres
+        flux appartiennent à des workers concurrents)
+        """
+        with self.file_lock():
+            feeds = self.feeds
+            if urls is not None:
+                feeds = self.read()
+                feeds.update({url: self.feeds[url] for url in urls if url in self.feeds})
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'feeds': feeds}, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def get(self, url):
+        return self.feeds.setdefault(url, {})
+
+    def conditional_headers(self, url):
+        """En-têtes If-None-Match / If-Modified-Since pour une requête conditionnelle"""
+        state = self.feeds.get(url, {})
+        headers = {}
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+        return headers
+
+    def is_unchanged(self, url, digest):
+        return self.feeds.get(url, {}).get('content_hash') == digest
+
+    def update_validators(self, url, etag=None, last_modified=None):
+        state = self.get(url)
+        if etag:
+            state['etag'] = etag
+        if last_modified:
+            state['last_modified'] = last_modified
+        state['checked_at'] = datetime.now(timezone.utc).isoformat()
+
+    def update_content(self, url, digest):
+        state = self.get(url)
+        state['content_hash'] = digest
+        state['changed_at'] = datetime.now(timezone.utc).isoformat()
+
+    def record_entries(self, url, timestamps, now=None):
+        """
+        Met à jour le rythme de publication estimé (articles/heure) à partir des dates
+        des entrées vues lors d'une interrogation ; un flux inchangé compte pour 0 entrée.
+        Première observation : rythme moyen sur la fenêtre du flux. Ensuite : moyenne
+        mobile exponentielle pondérée par le temps écoulé depuis l'interrogation précédente.
+        Retourne le nombre d'entrées nouvelles
+        """
+        now = now or time.time()
+        state = self.get(url)
+        newest = state.get('newest_entry')
+        times = sorted(t for t in timestamps if t <= now + 3600)
+        new = [t for t in times if newest is None or t > newest]
+
+        polled_at = state.get('polled_at')
+        if state.get('rate') is None:
+            if len(times) >= 2:
+                span = max(times[-1] - times[0], 60)
+                state['rate'] = (len(times) - 1) / (span / 3600)
+        elif polled_at:
+            elapsed = max(now - polled_at, 1) / 3600
+            observed = len(new) / elapsed
+            alpha = 1 - math.exp(-elapsed / RATE_TIME_CONSTANT)
+            state['rate'] = alpha * observed + (1 - alpha) * state['rate']
+
+        if times:
+            state['newest_entry'] = max(times[-1], newest or 0)
+        state['polled_at'] = now
+        state['failures'] = 0
+        return len(new)
+
+    def watermark(self, url):
+        """Watermark du flux ({'published', 'guids'}), None avant le premier traitement"""
+        return self.feeds.get(url, {}).get('watermark')
+
+    def advance_watermark(self, url, entries):
+        """Ajoute des entrées traitées au watermark (GUIDs les plus récents en tête)"""
+        if not entries:
+            return
+        state = self.get(url)
+        previous = state.get('watermark') or {'published': None, 'guids': []}
+        # Nouveau dict : un rattrapage en attente garde le watermark d'avant la panne
+        timestamps = [t for t in map(entry_timestamp, entries) if t is not None]
+        guids = [guid for guid in map(entry_guid, entries) if guid]
+        state['watermark'] = {
+            'published': max(timestamps + [previous['published'] or 0]) if timestamps else previous['published'],
+            'guids': list(dict.fromkeys(guids + previous['guids']))[:WATERMARK_GUIDS],
+        }
+
+    def pending_backfill(self):
+        """{url: watermark à rejoindre} des flux dont le rattrapage n'est pas terminé"""
+        return {url: state['backfill'] for url, state in self.feeds.items() if 'backfill' in state}
+
+    def set_backfill(self, url, watermark):
+        """Mémorise un rattrapage à faire (watermark d'avant la panne), None pour le terminer"""
+        state = self.get(url)
+        if watermark is None:
+            state.pop('backfill', None)
+        else:
+            state['backfill'] = watermark
+
+    def record_failure(self, url, now=None):
+        """Compte les échecs consécutifs (backoff du planificateur)"""
+        state = self.get(url)
+        state['failures'] = state.get('failures', 0) + 1
+        state['polled_at'] = now or time.time()
+        return state['failures']
@@ -0,0 +1,138 @@
+"""
+Concurrent Feed Fetcher for Lynx Eye
+Téléchargement parallèle des flux RSS avec timeouts par hôte et deadline globale
+Le parsing reste confié à feedparser, qui reçoit directement les octets
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from urllib.parse import urlparse
+
+import requests
+
+# Nombre maximum de flux téléchargés simultanément
+DEFAULT_MAX_WORKERS = 8
+
+# (connexion, lecture) en secondes
+DEFAULT_TIMEOUT = (5, 15)
+
+# Temps maximum pour l'ensemble des téléchargements d'une exécution
+DEFAULT_DEADLINE = 60
+
+# Surcharges de timeout pour les hôtes connus pour être lents
+HOST_TIMEOUTS = {
+    "www.jeuneafrique.com": (5, 20),
+}
+
+USER_AGENT = "LynxEye/1.0 (+veille strategique)"
+
+CHUNK_SIZE = 64 * 1024
+
+
+def get_timeout(url, default=DEFAULT_TIMEOUT):
+    """Retourne le couple (connexion, lecture) applicable à une URL"""
+    host = urlparse(url).netloc.lower()
+    return HOST_TIMEOUTS.get(host, default)
+
+
+def fetch_url(session, url, timeout, deadline_at, headers=None, until=None):
+    """
+    Télécharge une URL en streaming et abandonne si la deadline globale est dépassée.
+    Retourne un dict {url, status, content, etag, last_modified, elapsed, error}
+    Une réponse 304 (requête conditionnelle) a un contenu None et pas d'erreur
+    until (octets, en minuscules) : arrête la lecture dès ce marqueur reçu (ex. b"</head>")
+    """
+    started = time.monotonic()
+    result = {'url': url, 'status': None, 'content': None, 'etag': None,
+              'last_modified': None, 'elapsed': 0.0, 'error': None}
+
+    try:
+        with session.get(url, timeout=timeout, stream=True, headers=headers) as response:
+            result['status'] = response.status_code
+            result['etag'] = response.headers.get('ETag')
+            result['last_modified'] = response.headers.get('Last-Modified')
+            if response.status_code == 304:
+                result['elapsed'] = time.monotonic() - started
+                return result
+            response.raise_for_status()
+
+            chunks = []
+            tail = b""
+            for chunk in response.iter_content(CHUNK_SIZE):
+                if time.monotonic() > deadline_at:
+                    raise TimeoutError("deadline globale dépassée")
+                chunks.append(chunk)
+                if until is not None:
+                    if until in (tail + chunk).lower():
+                        break
+                    tail = chunk[-len(until):]
+            result['content'] = b"".join(chunks)
+
+    except Exception as e:
+        result['error'] = str(e) or e.__class__.__name__
+
+    result['elapsed'] = time.monotonic() - started
+    return result
+
+
+def iter_fetch(urls, max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TIMEOUT, deadline=DEFAULT_DEADLINE,
+               headers_for=None, until=None, timeout_for=None):
+    """
+    Télécharge toutes les URLs en parallèle (pool de threads borné) et restitue
+    chaque résultat dès qu'il est disponible (ordre de complétion).
+    La durée totale est bornée par le flux le plus lent ou par la deadline.
+    headers_for(url) peut fournir des en-têtes supplémentaires (requêtes conditionnelles).
+    timeout_for(url) peut remplacer le timeout d'une URL (budget réduit d'une source, health.py).
+    Génère des résultats au format de fetch_url
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return
+
+    started = time.monotonic()
+    deadline_at = started + deadline
+    session = requests.Session()
+    session.headers['User-Agent'] = USER_AGENT
+    adapter = requests.adapters.HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="feed-fetch")
+    futures = {}
+    try:
+        futures = {
+            executor.submit(fetch_url, session, url, timeout_for(url) if timeout_for else get_timeout(url, timeout),
+                            deadline_at,
+                            headers_for(url) if headers_for else None, until): url
+            for url in urls
+        }
+        try:
+            for future in as_completed(futures, timeout=max(0, deadline_at - time.monotonic())):
+                del futures[future]
+                yield future.result()
+        except FuturesTimeout:
+            pass
+
+        for future, url in futures.items():
+            future.cancel()
+            yield {
+                'url': url, 'status': None, 'content': None, 'etag': None,
+                'last_modified': None, 'elapsed': time.monotonic() - started, 'error': "deadline globale dépassée"
+            }
+    finally:
+        # Ne pas attendre les threads encore bloqués : leurs timeouts les libéreront
+        executor.shutdown(wait=False, cancel_futures=True)
+        session.close()
+
+
+def fetch_all(urls, max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TIMEOUT, deadline=DEFAULT_DEADLINE,
+              headers_for=None):
+    """
+    Télécharge toutes les URLs en parallèle et attend la fin de l'ensemble.
+    Retourne un dict url -> résultat (voir fetch_url)
+    """
+    return {
+        result['url']: result
+        for result in iter_fetch(urls, max_workers=max_workers, timeout=timeout, deadline=deadline,
+                                 headers_for=headers_for)
+    }
@@ -0,0 +1,223 @@
+"""
+Source Health for Lynx Eye
+État de santé persistant de chaque source (flux RSS, site HTML) et de chaque moteur
+de recherche (DuckDuckGo, YouTube), et disjoncteurs associés
+
+Pour chaque source : taux de succès (moyenne mobile), latences récentes (percentiles),
+dernière erreur, échecs consécutifs. Après FAILURE_THRESHOLD échecs consécutifs, le
+disjoncteur s'ouvre : la source n'est plus interrogée jusqu'à la fin de sa pause, puis
+une seule tentative (sonde) est faite. Une sonde en échec double la pause (backoff
+exponentiel, plafonné), une sonde réussie referme le disjoncteur. La sonde n'existe
+qu'en mémoire : un processus interrompu pendant une sonde laisse le disjoncteur ouvert.
+Les sources lentes reçoivent un budget réduit : timeout de lecture calé sur leur p95
+pour les flux, moitié des workers pour un moteur dégradé.
+L'état est stocké en SQLite dans .state/ (une ligne par source).
+"""
+
+import json
+import time
+import sqlite3
+import threading
+
+import metrics
+from state import state_path
+
+DEFAULT_FILENAME = 'source_health.sqlite3'
+
+FAILURE_THRESHOLD = 3          # échecs consécutifs avant ouverture
+BACKEND_FAILURE_THRESHOLD = 5  # idem pour un moteur de recherche (requêtes d'une même exécution)
+OPEN_SECONDS = 1800.0          # première pause (30 min), doublée à chaque sonde en échec
+MAX_OPEN_SECONDS = 48 * 3600.0
+SUCCESS_ALPHA = 0.2            # poids du dernier résultat dans le taux de succès
+LATENCY_SAMPLES = 50           # latences conservées pour les percentiles
+MIN_SAMPLES = 5                # latences nécessaires avant d'ajuster un budget
+TIMEOUT_MARGIN = 3.0           # timeout de lecture = p95 x marge (sans dépasser le défaut)
+MIN_READ_TIMEOUT = 3.0
+SLOW_SECONDS = 5.0             # p95 au-delà duquel un moteur est considéré lent
+DEGRADED_SUCCESS = 0.8         # taux de succès en dessous duquel un moteur est dégradé
+
+CLOSED, OPEN = 'closed', 'open'
+
+
+class CircuitOpenError(Exception):
+    """Requête refusée : le disjoncteur de la source est ouvert"""
+
+
+def percentile(values, q):
+    """Percentile (0-100) par rang le plus proche"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+class HealthStore:
+    """Santé et disjoncteurs des sources, clés (type, nom) : ('feed', url), ('site', url), ('backend', 'ddg')"""
+
+    def __init__(self, path=None):
+        self.path = path or state_path(DEFAULT_FILENAME)
+        self.lock = threading.Lock()
+        # Base partagée par les workers (worker.py) : WAL et attente du verrou d'écriture
+        self.db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS health ("
+            " kind TEXT NOT NULL, name TEXT NOT NULL, label TEXT, state TEXT NOT NULL,"
+            " success_rate REAL NOT NULL, failures INTEGER NOT NULL, open_seconds REAL NOT NULL,"
+            " open_until REAL NOT NULL, last_error TEXT, last_error_at REAL, latencies TEXT NOT NULL,"
+            " updated_at REAL NOT NULL, PRIMARY KEY (kind, name))"
+        )
+        self.records = {}
+        for row in self.db.execute("SELECT kind, name, label, state, success_rate, failures, open_seconds,"
+                                   " open_until, last_error, last_error_at, latencies FROM health"):
+            self.records[(row[0], row[1])] = {
+                'label': row[2], 'state': row[3], 'success_rate': row[4], 'failures': row[5],
+                'open_seconds': row[6], 'open_until': row[7], 'last_error': row[8],
+                'last_error_at': row[9], 'latencies': json.loads(row[10]),
+            }
+        self.dirty = set()
+        self.probing = set()   # disjoncteurs ouverts dont la sonde est en cours
+        self.stats = {'skipped': 0, 'probes': 0, 'opened': 0, 'closed': 0}
+
+    def record(self, kind, name, label=None):
+        key = (kind, name)
+        record = self.records.get(key)
+        if record is None:
+            record = self.records[key] = {
+                'label': label, 'state': CLOSED, 'success_rate': 1.0, 'failures': 0,
+                'open_seconds': 0.0, 'open_until': 0.0, 'last_error': None,
+                'last_error_at': None, 'latencies': [],
+            }
+        if label:
+            record['label'] = label
+        return record
+
+    def allow(self, kind, name, now=None):
+        """Vrai si la source peut être interrogée ; un disjoncteur dont la pause est écoulée autorise une sonde"""
+        now = now or time.time()
+        key = (kind, name)
+        with self.lock:
+            record = self.records.get(key)
+            if record is None or record['state'] == CLOSED:
+                return True
+            if now >= record['open_until'] and key not in self.probing:
+                self.probing.add(key)
+                self.stats['probes'] += 1
+                return True
+            self.stats['skipped'] += 1
+            return False
+
+    def is_probing(self, kind, name):
+        return (kind, name) in self.probing
+
+    def is_open(self, kind, name):
+        """Vrai si le disjoncteur est ouvert et qu'aucune sonde n'est en cours"""
+        key = (kind, name)
+        record = self.records.get(key)
+        return record is not None and record['state'] == OPEN and key not in self.probing
+
+    def success(self, kind, name, latency=None, label=None):
+        with self.lock:
+            record = self.record(kind, name, label)
+            self.probing.discard((kind, name))
+            if record['state'] != CLOSED:
+                self.stats['closed'] += 1
+            record.update(state=CLOSED, failures=0, open_seconds=0.0, open_until=0.0)
+            record['success_rate'] = (1 - SUCCESS_ALPHA) * record['success_rate'] + SUCCESS_ALPHA
+            if latency is not None:
+                record['latencies'] = (record['latencies'] + [round(latency, 3)])[-LATENCY_SAMPLES:]
+            self.dirty.add((kind, name))
+        metrics.set_gauge('lynx_circuit_open', 0, kind=kind, source=label or name)
+
+    def failure(self, kind, name, error, latency=None, label=None, threshold=FAILURE_THRESHOLD, now=None):
+        """Enregistre un échec ; retourne True si le disjoncteur vient de s'ouvrir"""
+        now = now or time.time()
+        with self.lock:
+            record = self.record(kind, name, label)
+            record['failures'] += 1
+            record['success_rate'] *= 1 - SUCCESS_ALPHA
+            record['last_error'] = str(error)[:300]
+            record['last_error_at'] = now
+            if latency is not None:
+                record['latencies'] = (record['latencies'] + [round(latency, 3)])[-LATENCY_SAMPLES:]
+            self.dirty.add((kind, name))
+            opened = False
+            if (kind, name) in self.probing:
+                self.probing.discard((kind, name))
+                record['open_seconds'] = min(MAX_OPEN_SECONDS, record['open_seconds'] * 2 or OPEN_SECONDS)
+                opened = True
+            elif record['state'] == CLOSED and record['failures'] >= threshold:
+                record['open_seconds'] = OPEN_SECONDS
+                opened = True
+            if opened:
+                record['state'] = OPEN
+                record['open_until'] = now + record['open_seconds']
+                self.stats['opened'] += 1
+        if opened:
+            metrics.set_gauge('lynx_circuit_open', 1, kind=kind, source=label or name)
+        return opened
+
+    def read_timeout(self, kind, name, default):
+        """Couple (connexion, lecture) : lecture réduite à p95 x TIMEOUT_MARGIN pour une source rapide"""
+        record = self.records.get((kind, name))
+        if record is None or len(record['latencies']) < MIN_SAMPLES:
+            return default
+        p95 = percentile(record['latencies'], 95)
+        return default[0], min(default[1], max(MIN_READ_TIMEOUT, p95 * TIMEOUT_MARGIN))
+
+    def workers(self, kind, name, default):
+        """Workers alloués : moitié pour une source lente (p95 > SLOW_SECONDS) ou dégradée"""
+        record = self.records.get((kind, name))
+        if record is None:
+            return default
+        slow = len(record['latencies']) >= MIN_SAMPLES and percentile(record['latencies'], 95) > SLOW_SECONDS
+        if slow or record['success_rate'] < DEGRADED_SUCCESS:
+            return max(1, default // 2)
+        return default
+
+    def describe(self, kind, name, now=None):
+        """Résumé d'une source pour la sortie d'exécution"""
+        now = now or time.time()
+        record = self.records.get((kind, name), {})
+        wait = max(0.0, record.get('open_until', 0.0) - now) / 3600
+        return (f"{record.get('failures', 0)} échec(s) consécutif(s), prochain essai dans {wait:.1f}h "
+                f"({record.get('last_error') or 'erreur inconnue'})")
+
+    def save(self):
+        """Écrit les sources modifiées"""
+        now = time.time()
+        with self.lock:
+            rows = []
+            for kind, name in self.dirty:
+                r = self.records[(kind, name)]
+                rows.append((kind, name, r['label'], r['state'], r['success_rate'], r['failures'],
+                             r['open_seconds'], r['open_until'], r['last_error'], r['last_error_at'],
+                             json.dumps(r['latencies']), now))
+            self.dirty = set()
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO health (kind, name, label, state, success_rate, failures, open_seconds,"
+                " open_until, last_error, last_error_at, latencies, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def rows(self, now=None):
+        """Toutes les sources : (type, nom, état, taux de succès, p50, p95, échecs, reprise dans (s), erreur)"""
+        now = now or time.time()
+        return [
+            (kind, r['label'] or name, r['state'], r['success_rate'], percentile(r['latencies'], 50),
+             percentile(r['latencies'], 95), r['failures'], max(0.0, r['open_until'] - now), r['last_error'])
+            for (kind, name), r in sorted(self.records.items())
+        ]
+
+    def report(self):
+        """Ligne de bilan pour la sortie d'exécution"""
+        opened = [r['label'] or name for (_, name), r in self.records.items() if r['state'] != CLOSED]
+        names = f" ({', '.join(opened[:5])}{'...' if len(opened) > 5 else ''})" if opened else ""
+        return (f"🩺 Santé: {len(self.records)} source(s) suivie(s), {len(opened)} disjoncteur(s) ouvert(s){names}, "
+                f"{self.stats['skipped']} interrogation(s) évitée(s), {self.stats['probes']} sonde(s), "
+                f"{self.stats['opened']} ouverture(s), {self.stats['closed']} fermeture(s)")
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,500 @@
+"""
+Incremental HTML Crawler for Lynx Eye
+Collecte des sites de presse sans flux RSS (L'Union, AGP Gabon, RFI...)
+
+Chaque exécution :
+1. relit robots.txt une fois par jour (règles d'exclusion, sitemaps déclarés) ;
+2. interroge la page d'accueil (ou de rubrique) et, pour un site entier, ses sitemaps,
+   avec des requêtes conditionnelles : une page inchangée (304, même contenu) ne
+   produit aucun lien ;
+3. ne télécharge que les articles jamais vus, ou dont le lastmod du sitemap a changé
+   (requête conditionnelle avec l'ETag connu) ;
+4. ne lit que l'en-tête HTML de chaque article (jusqu'à </head>) : titre, résumé et date
+   viennent des balises meta (Open Graph, description, article:published_time, JSON-LD).
+Les items passent ensuite par le même filtre de mots-clés et le même sink que le RSS.
+"""
+
+import re
+import time
+import sqlite3
+import hashlib
+import calendar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+from xml.etree import ElementTree
+
+import metrics
+from fetcher import iter_fetch, DEFAULT_MAX_WORKERS, DEFAULT_TIMEOUT, DEFAULT_DEADLINE, USER_AGENT
+from matcher import get_matcher
+from sources import get_html_sources
+from state import state_path
+from urls import normalize_url
+
+DEFAULT_FILENAME = 'crawl_state.sqlite3'
+DEFAULT_MAX_LINKS = 25          # articles téléchargés par site et par exécution
+DEFAULT_MAX_AGE_DAYS = 3        # entrées de sitemap plus anciennes ignorées
+DEFAULT_MAX_ATTEMPTS = 3        # échecs avant d'abandonner un lien
+ROBOTS_TTL = 24 * 3600
+LINK_RETENTION = 90 * 86400     # liens oubliés après 90 jours
+MAX_CHILD_SITEMAPS = 2          # sitemaps les plus récents d'un index
+
+# Segments de chemin qui ne désignent pas un article
+EXCLUDED_SEGMENTS = {
+    'tag', 'tags', 'category', 'categorie', 'rubrique', 'author', 'auteur', 'page', 'feed', 'rss',
+    'search', 'recherche', 'login', 'connexion', 'contact', 'abonnement', 'newsletter',
+    'wp-content', 'wp-json', 'wp-admin', 'wp-login.php', 'cdn-cgi', 'video', 'videos', 'podcasts',
+}
+EXCLUDED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.pdf', '.mp3', '.mp4', '.zip', '.xml')
+
+_YEAR_RE = re.compile(r'/(19|20)\d{2}[/-]')
+_DIGITS_RE = re.compile(r'\d{4,}')
+_CHARSET_RE = re.compile(rb'charset=["\']?([A-Za-z0-9_-]+)')
+_JSONLD_DATE_RE = re.compile(r'"datePublished"\s*:\s*"([^"]+)"')
+_SPACES_RE = re.compile(r'\s+')
+
+# Balises meta, par ordre de préférence
+TITLE_KEYS = ('og:title', 'twitter:title')
+SUMMARY_KEYS = ('og:description', 'description', 'twitter:description')
+DATE_KEYS = ('article:published_time', 'og:article:published_time', 'datepublished',
+             'date', 'pubdate', 'dc.date', 'dc.date.issued', 'sailthru.date')
+
+
+def site_host(url):
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def is_site_root(url):
+    """Page d'accueil d'un site entier (sitemaps utilisés), par opposition à une rubrique"""
+    return urlsplit(url).path in ('', '/')
+
+
+def is_article_link(url, host, section=''):
+    """Lien d'article probable du même site (slug, date ou identifiant dans le chemin)"""
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or site_host(url) != host:
+        return False
+    path = parts.path.lower()
+    if path.endswith(EXCLUDED_EXTENSIONS):
+        return False
+    segments = [segment for segment in path.split('/') if segment]
+    if not segments or any(segment in EXCLUDED_SEGMENTS for segment in segments):
+        return False
+    if section and path.rstrip('/') == section.rstrip('/'):
+        return False
+    last = segments[-1]
+    return (last.count('-') >= 3 or bool(_YEAR_RE.search(path)) or last.endswith(('.html', '.htm'))
+            or bool(_DIGITS_RE.search(last)))
+
+
+def decode_html(content):
+    """Décode une page selon le charset déclaré dans ses premiers octets (UTF-8 par défaut)"""
+    match = _CHARSET_RE.search(content[:2048])
+    encoding = match.group(1).decode('ascii') if match else 'utf-8'
+    try:
+        return content.decode(encoding, errors='replace')
+    except LookupError:
+        return content.decode('utf-8', errors='replace')
+
+
+def parse_date(value):
+    """Date ISO 8601 ou RFC 2822 -> chaîne ISO, None si illisible"""
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).isoformat()
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value).isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+def date_timestamp(value):
+    """Chaîne ISO -> epoch (0 si absente), pour comparer les lastmod"""
+    parsed = parse_date(value)
+    if parsed is None:
+        return 0
+    dt = datetime.fromisoformat(parsed)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return calendar.timegm(dt.utctimetuple())
+
+
+class LinkParser(HTMLParser):
+    """Liens <a href> d'une page, dans l'ordre du document"""
+
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            href = dict(attrs).get('href')
+            if href and not href.startswith(('#', 'mailto:', 'javascript:', 'tel:')):
+                self.links.append(urljoin(self.base_url, href))
+
+
+class HeadParser(HTMLParser):
+    """Titre et balises meta de l'en-tête d'une page"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta = {}
+        self.title = ''
+        self.in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title':
+            self.in_title = True
+        elif tag == 'meta':
+            attrs = dict(attrs)
+            key = attrs.get('property') or attrs.get('name') or attrs.get('itemprop')
+            if key and attrs.get('content'):
+                self.meta.setdefault(key.lower(), attrs['content'])
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self.in_title = False
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title += data
+
+
+def extract_article(content):
+    """{'title', 'summary', 'published'} à partir de l'en-tête HTML d'un article"""
+    html = decode_html(content)
+    parser = HeadParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        pass
+
+    def first(keys):
+        return next((parser.meta[key] for key in keys if parser.meta.get(key)), '')
+
+    published = first(DATE_KEYS)
+    if not published:
+        match = _JSONLD_DATE_RE.search(html)
+        published = match.group(1) if match else ''
+    return {
+        'title': _SPACES_RE.sub(' ', first(TITLE_KEYS) or parser.title).strip(),
+        'summary': _SPACES_RE.sub(' ', first(SUMMARY_KEYS)).strip(),
+        'published': parse_date(published),
+    }
+
+
+def parse_sitemap(content):
+    """
+    Contenu d'un sitemap -> ('index', [(url, lastmod)]) pour un index de sitemaps,
+    ('urlset', [(url, lastmod)]) pour une liste de pages ; (None, []) si illisible
+    """
+    try:
+        root = ElementTree.fromstring(content)
+    except ElementTree.ParseError:
+        return None, []
+    kind = 'index' if root.tag.endswith('sitemapindex') else 'urlset'
+    entries = []
+    for node in root:
+        loc = lastmod = None
+        for child in node:
+            name = child.tag.rsplit('}', 1)[-1]
+            if name == 'loc':
+                loc = (child.text or '').strip()
+            elif name == 'lastmod':
+                lastmod = (child.text or '').strip()
+        if loc:
+            entries.append((loc, lastmod))
+    return kind, entries
+
+
+class CrawlState:
+    """
+    État du crawl en SQLite : robots.txt par hôte, validateurs des pages de découverte,
+    liens d'articles visités (lastmod, ETag, Last-Modified, tentatives) ou en attente
+    (découverts au-delà de max_links, téléchargés aux exécutions suivantes)
+    """
+
+    def __init__(self, path=None):
+        self.path = path or state_path(DEFAULT_FILENAME)
+        # Créé par le thread principal, utilisé par le thread source du pipeline ;
+        # partagé par les workers d'une machine (worker.py), d'où WAL et attente du verrou
+        self.db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(
+            "CREATE TABLE IF NOT EXISTS robots (host TEXT PRIMARY KEY, body TEXT NOT NULL, fetched_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, content_hash TEXT, checked_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS links ("
+            " key TEXT PRIMARY KEY, url TEXT NOT NULL, source TEXT NOT NULL, lastmod TEXT, etag TEXT, last_modified TEXT,"
+            " attempts INTEGER NOT NULL DEFAULT 0, status TEXT, fetched_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS links_fetched_at ON links (fetched_at);"
+        )
+        with self.db:
+            self.db.execute("DELETE FROM links WHERE fetched_at < ?", (time.time() - LINK_RETENTION,))
+
+    def robots(self, host):
+        """Contenu de robots.txt encore valide, ou None"""
+        row = self.db.execute("SELECT body, fetched_at FROM robots WHERE host = ?", (host,)).fetchone()
+        return row[0] if row and row[1] >= time.time() - ROBOTS_TTL else None
+
+    def set_robots(self, host, body):
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO robots (host, body, fetched_at) VALUES (?, ?, ?)",
+                            (host, body, time.time()))
+
+    def page_headers(self, url):
+        """En-têtes conditionnels d'une page de découverte (accueil, sitemap) ou d'un article"""
+        row = self.db.execute("SELECT etag, last_modified FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            row = self.db.execute("SELECT etag, last_modified FROM links WHERE key = ?",
+                                  (normalize_url(url),)).fetchone()
+        headers = {}
+        if row and row[0]:
+            headers['If-None-Match'] = row[0]
+        if row and row[1]:
+            headers['If-Modified-Since'] = row[1]
+        return headers
+
+    def page_changed(self, fetch):
+        """Enregistre les validateurs d'une page ; faux si 304 ou contenu identique"""
+        digest = hashlib.sha256(fetch['content']).hexdigest() if fetch['content'] is not None else None
+        row = self.db.execute("SELECT content_hash FROM pages WHERE url = ?", (fetch['url'],)).fetchone()
+        with self.db:
+            self.db.execute(
+                "INSERT INTO pages (url, etag, last_modified, content_hash, checked_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(url) DO UPDATE SET etag = COALESCE(excluded.etag, etag),"
+                " last_modified = COALESCE(excluded.last_modified, last_modified),"
+                " content_hash = COALESCE(excluded.content_hash, content_hash), checked_at = excluded.checked_at",
+                (fetch['url'], fetch['etag'], fetch['last_modified'], digest, time.time())
+            )
+        return fetch['status'] != 304 and (row is None or row[0] != digest)
+
+    def is_new(self, url, lastmod=None):
+        """Lien à télécharger : jamais visité, en échec réessayable, ou lastmod plus récent"""
+        row = self.db.execute("SELECT lastmod, attempts, status FROM links WHERE key = ?",
+                              (normalize_url(url),)).fetchone()
+        if row is None or row[2] == 'pending':
+            return True
+        if row[2] == 'error':
+            return row[1] < DEFAULT_MAX_ATTEMPTS
+        return bool(lastmod) and date_timestamp(lastmod) > date_timestamp(row[0])
+
+    def queue(self, links, source):
+        """Met en attente des liens découverts mais non téléchargés : [(url, lastmod)]"""
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO links (key, url, source, lastmod, status, fetched_at) VALUES (?, ?, ?, ?, 'pending', ?)"
+                " ON CONFLICT(key) DO UPDATE SET lastmod = COALESCE(excluded.lastmod, lastmod)"
+                " WHERE status = 'pending'",
+                [(normalize_url(url), url, source, lastmod, now) for url, lastmod in links]
+            )
+
+    def pending(self, source):
+        """Liens en attente d'un site : [(url, lastmod)]"""
+        return self.db.execute(
+            "SELECT url, lastmod FROM links WHERE source = ? AND status = 'pending' ORDER BY fetched_at",
+            (source,)
+        ).fetchall()
+
+    def mark(self, url, source, fetch, lastmod=None):
+        """Enregistre la visite d'un article (succès, 304 ou échec)"""
+        status = 'error' if fetch['error'] else ('not_modified' if fetch['status'] == 304 else 'ok')
+        with self.db:
+            self.db.execute(
+                "INSERT INTO links (key, url, source, lastmod, etag, last_modified, attempts, status, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET"
+                " lastmod = COALESCE(excluded.lastmod, lastmod), etag = COALESCE(excluded.etag, etag),"
+                " last_modified = COALESCE(excluded.last_modified, last_modified),"
+                " attempts = CASE WHEN excluded.status = 'error' THEN attempts + 1 ELSE 0 END,"
+                " status = excluded.status, fetched_at = excluded.fetched_at",
+                (normalize_url(url), url, source, lastmod, fetch['etag'], fetch['last_modified'],
+                 1 if status == 'error' else 0, status, time.time())
+            )
+
+    def close(self):
+        self.db.close()
+
+
+def robots_parser(body):
+    parser = RobotFileParser()
+    parser.parse(body.splitlines())
+    return parser
+
+
+def sitemap_urls(body):
+    """Sitemaps déclarés dans robots.txt"""
+    return [line.split(':', 1)[1].strip() for line in body.splitlines()
+            if line.lower().startswith('sitemap:') and ':' in line]
+
+
+def iter_html_items(crawl_state, max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TIMEOUT,
+                    deadline=DEFAULT_DEADLINE, html_sources=None, max_links=DEFAULT_MAX_LINKS,
+                    max_age_days=DEFAULT_MAX_AGE_DAYS, health=None):
+    """
+    Source du pipeline pour les sites sans flux RSS : génère les items des articles
+    nouveaux contenant au moins un mot-clé prioritaire
+    html_sources : tuples (catégorie, nom, url) ; get_html_sources() par défaut
+    health : HealthStore ; un site dont le disjoncteur est ouvert n'est pas crawlé
+    (santé mesurée sur sa page de découverte)
+    """
+    html_sources = html_sources if html_sources is not None else get_html_sources()
+    if health is not None:
+        for category, name, url in html_sources:
+            if not health.allow('site', url):
+                print(f"    ⏸  [{category.upper()}] {name}: disjoncteur ouvert, {health.describe('site', url)}")
+        html_sources = [source for source in html_sources
+                        if not health.is_open('site', source[2])]
+    if not html_sources:
+        return
+    started = time.monotonic()
+    deadline_at = started + deadline
+
+    def remaining():
+        return max(1.0, deadline_at - time.monotonic())
+
+    def fetch(urls, conditional=True, until=None):
+        return iter_fetch(urls, max_workers=max_workers, timeout=timeout, deadline=remaining(),
+                          headers_for=crawl_state.page_headers if conditional else None, until=until)
+
+    print(f"🕸  Crawl HTML de {len(html_sources)} site(s) sans flux RSS...")
+    sites = {url: (category, name, site_host(url)) for category, name, url in html_sources}
+    labels = {url: f"[{category.upper()}] {name}" for url, (category, name, _) in sites.items()}
+
+    # 1. robots.txt (une fois par jour et par hôte)
+    robots = {}
+    stale = {}
+    for url, (_, _, host) in sites.items():
+        body = crawl_state.robots(host)
+        if body is None:
+            stale[f"{urlsplit(url).scheme}://{urlsplit(url).netloc}/robots.txt"] = host
+        else:
+            robots[host] = body
+    for result in fetch(list(stale), conditional=False):
+        # robots.txt absent ou en erreur 4xx : aucune restriction
+        body = decode_html(result['content']) if result['content'] is not None and result['status'] == 200 else ''
+        if result['error'] and not (result['status'] or 0) >= 400:
+            continue
+        robots[stale[result['url']]] = body
+        crawl_state.set_robots(stale[result['url']], body)
+    rules = {host: robots_parser(body) for host, body in robots.items()}
+
+    def allowed(url):
+        parser = rules.get(site_host(url))
+        return parser is None or parser.can_fetch(USER_AGENT, url)
+
+    # 2. Pages de découverte : accueil ou rubrique, et sitemaps des sites entiers
+    discovery = {url: url for url in sites}
+    for url in sites:
+        if is_site_root(url):
+            for sitemap in sitemap_urls(robots.get(site_host(url), '')):
+                discovery[sitemap] = url
+    candidates = {url: {} for url in sites}   # site -> {lien: lastmod}
+    min_lastmod = time.time() - max_age_days * 86400
+    child_sitemaps = {}
+
+    def collect(results):
+        for result in results:
+            site = discovery[result['url']]
+            _, name, host = sites[site]
+            metrics.observe('lynx_fetch_seconds', result['elapsed'], source=name)
+            if health is not None and result['url'] == site:
+                if result['error']:
+                    health.failure('site', site, result['error'], result['elapsed'], label=name)
+                else:
+                    health.success('site', site, result['elapsed'], label=name)
+            if result['error']:
+                metrics.inc('lynx_fetch_total', source=name, status='error')
+                print(f"    ✗ {labels[site]}: {result['url']}: {result['error']}")
+                continue
+            if not crawl_state.page_changed(result):
+                metrics.inc('lynx_fetch_total', source=name,
+                            status='not_modified' if result['status'] == 304 else 'unchanged')
+                continue
+            metrics.inc('lynx_fetch_total', source=name, status='ok')
+            if result['url'] == site:
+                parser = LinkParser(site)
+                try:
+                    parser.feed(decode_html(result['content']))
+                except Exception:
+                    pass
+                section = urlsplit(site).path
+                for link in parser.links:
+                    if is_article_link(link, host, section):
+                        candidates[site].setdefault(link.split('#')[0], None)
+                continue
+            kind, entries = parse_sitemap(result['content'])
+            if kind == 'index':
+                recent = sorted(entries, key=lambda entry: date_timestamp(entry[1]), reverse=True)
+                for loc, lastmod in recent[:MAX_CHILD_SITEMAPS]:
+                    if not lastmod or date_timestamp(lastmod) >= min_lastmod:
+                        child_sitemaps[loc] = site
+            else:
+                for loc, lastmod in entries:
+                    if site_host(loc) == host and (not lastmod or date_timestamp(lastmod) >= min_lastmod):
+                        candidates[site][loc] = lastmod
+
+    collect(fetch([url for url in discovery if allowed(url)]))
+    if child_sitemaps:
+        discovery.update(child_sitemaps)
+        collect(fetch([url for url in child_sitemaps if allowed(url)]))
+
+    # 3. Articles nouveaux (ou modifiés selon le sitemap), au plus max_links par site :
+    #    le reste est mis en attente pour les exécutions suivantes
+    to_fetch = {}
+    for site, links in candidates.items():
+        _, name, _ = sites[site]
+        backlog = {link: lastmod for link, lastmod in crawl_state.pending(name) if link not in links}
+        fresh = [(link, lastmod) for link, lastmod in list(links.items()) + list(backlog.items())
+                 if allowed(link) and crawl_state.is_new(link, lastmod)]
+        # Les plus récents d'abord (lastmod), puis l'ordre de la page
+        fresh.sort(key=lambda entry: -date_timestamp(entry[1]))
+        for link, lastmod in fresh[:max_links]:
+            to_fetch.setdefault(link, (site, lastmod))
+        crawl_state.queue(fresh[max_links:], name)
+        metrics.inc('lynx_crawl_links_total', len(links), source=name, status='discovered')
+        metrics.inc('lynx_crawl_links_total', min(len(fresh), max_links), source=name, status='new')
+        if links or backlog:
+            print(f"    🔗 {labels[site]}: {len(links)} lien(s), {len(fresh)} à télécharger"
+                  + (f" dont {len(backlog)} en attente" if backlog else "")
+                  + (f", {len(fresh) - max_links} reporté(s)" if len(fresh) > max_links else ""))
+
+    matcher = get_matcher()
+    counts = {site: 0 for site in sites}
+    for result in fetch(list(to_fetch), until=b'</head>'):
+        site, lastmod = to_fetch[result['url']]
+        category, name, _ = sites[site]
+        crawl_state.mark(result['url'], name, result, lastmod)
+        if result['error'] or result['content'] is None:
+            continue
+        with metrics.timer('lynx_parse_seconds', source=name):
+            article = extract_article(result['content'])
+        if not article['title']:
+            continue
+        text = f"{article['title']} {article['summary']}"
+        matched = matcher.has_priority(text)
+        metrics.inc('lynx_filter_entries_total', collector='html', source=name)
+        if not matched:
+            continue
+        metrics.inc('lynx_filter_matches_total', collector='html', source=name)
+        counts[site] += 1
+        yield {
+            'content': f"{article['title']} - {article['summary']}",
+            'author': f"{name} ({category})",
+            'external_id': result['url'],
+            'published_at': article['published'] or datetime.now().isoformat()
+        }
+
+    for site, count in counts.items():
+        if count:
+            print(f"    ✓ {labels[site]}: {count} articles")
+    print(f"   ⏱  Crawl HTML: {len(to_fetch)} article(s) téléchargé(s) en {time.monotonic() - started:.2f}s")
@@ -0,0 +1,186 @@
+"""
+Work Leases for Lynx Eye
+Répartition des unités de collecte entre plusieurs workers (processus ou machines) par baux
+
+Une exécution (cycle) est découpée en unités : un flux RSS, un site sans flux RSS,
+une requête web, une requête YouTube. Le premier worker d'un cycle publie ses unités dans une table
+commune ; chaque worker prend ensuite des unités libres par petits lots, sous bail :
+- la prise est atomique (transaction BEGIN IMMEDIATE), une unité n'a qu'un titulaire ;
+- le bail expire après `ttl` secondes s'il n'est pas renouvelé : les unités d'un
+  worker arrêté brutalement sont reprises par un autre ;
+- une unité terminée n'est plus jamais distribuée dans le cycle ; une unité reprise
+  trop souvent (MAX_ATTEMPTS) est abandonnée ;
+- la fin d'une unité n'est acceptée que du titulaire du bail en cours ; un worker
+  dont le lot échoue rend ses unités (release), qui sont reprises par un autre.
+Les workers renouvellent leurs baux tant qu'ils traitent leurs unités : une unité
+n'est traitée deux fois que si un worker reste bloqué au-delà de son bail.
+La table est stockée en SQLite (.state/leases.sqlite3, mode WAL), qui tient lieu de
+table de coordination partagée pour les workers d'une même machine.
+"""
+
+import json
+import time
+import sqlite3
+import threading
+
+from state import state_path
+
+DEFAULT_FILENAME = 'leases.sqlite3'
+DEFAULT_TTL = 300.0            # durée d'un bail (secondes)
+DEFAULT_CYCLE_MINUTES = 180    # un cycle toutes les 3h, comme setup_cron.sh
+MAX_ATTEMPTS = 3               # prises d'une même unité avant abandon
+KEEP_CYCLES_SECONDS = 7 * 24 * 3600
+
+PENDING, LEASED, DONE, FAILED = 'pending', 'leased', 'done', 'failed'
+
+
+def cycle_id(minutes=DEFAULT_CYCLE_MINUTES, now=None):
+    """Identifiant du cycle courant : début de la tranche de `minutes` (UTC), commun à tous les workers"""
+    now = now or time.time()
+    start = int(now // (minutes * 60) * minutes * 60)
+    return time.strftime('%Y%m%dT%H%MZ', time.gmtime(start))
+
+
+class LeaseTable:
+    """Table des unités de chaque cycle et de leurs baux"""
+
+    def __init__(self, path=None, ttl=DEFAULT_TTL, max_attempts=MAX_ATTEMPTS):
+        self.path = path or state_path(DEFAULT_FILENAME)
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        # Transactions explicites : la prise d'unités doit verrouiller la base en écriture dès la lecture
+        self.db = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(
+            "CREATE TABLE IF NOT EXISTS leases ("
+            " cycle TEXT NOT NULL, unit TEXT NOT NULL, kind TEXT NOT NULL, payload TEXT NOT NULL,"
+            " position INTEGER NOT NULL, state TEXT NOT NULL, owner TEXT, expires_at REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL, PRIMARY KEY (cycle, unit));"
+            "CREATE INDEX IF NOT EXISTS leases_state ON leases (cycle, state, expires_at);"
+        )
+
+    def transaction(self):
+        return _Transaction(self)
+
+    def publish(self, cycle, units):
+        """
+        Publie les unités (id, type, données) d'un cycle s'il n'a pas encore été publié ;
+        retourne True si ce worker a publié, False si un autre l'avait déjà fait
+        """
+        now = time.time()
+        with self.transaction() as db:
+            if db.execute("SELECT 1 FROM leases WHERE cycle = ? LIMIT 1", (cycle,)).fetchone():
+                return False
+            db.executemany(
+                "INSERT OR IGNORE INTO leases (cycle, unit, kind, payload, position, state, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(cycle, unit, kind, json.dumps(payload, ensure_ascii=False), position, PENDING, now)
+                 for position, (unit, kind, payload) in enumerate(units)]
+            )
+            db.execute("DELETE FROM leases WHERE updated_at < ? AND cycle != ?", (now - KEEP_CYCLES_SECONDS, cycle))
+        return True
+
+    def acquire(self, cycle, owner, limit, kind=None, now=None):
+        """
+        Prend jusqu'à `limit` unités libres ou dont le bail a expiré (dans l'ordre de publication) ;
+        retourne une liste de (id, type, données)
+        """
+        now = now or time.time()
+        kind_clause = " AND kind = ?" if kind else ""
+        params = (cycle, PENDING, LEASED, now) + ((kind,) if kind else ()) + (limit,)
+        with self.transaction() as db:
+            rows = db.execute(
+                "SELECT unit, kind, payload, state, attempts FROM leases WHERE cycle = ?"
+                " AND (state = ? OR (state = ? AND expires_at < ?))" + kind_clause +
+                " ORDER BY position LIMIT ?", params
+            ).fetchall()
+            taken, abandoned = [], []
+            for unit, unit_kind, payload, state, attempts in rows:
+                if attempts >= self.max_attempts:
+                    abandoned.append((FAILED, now, cycle, unit))
+                else:
+                    taken.append((LEASED, owner, now + self.ttl, now, cycle, unit))
+            db.executemany("UPDATE leases SET state = ?, updated_at = ? WHERE cycle = ? AND unit = ?", abandoned)
+            db.executemany(
+                "UPDATE leases SET state = ?, owner = ?, expires_at = ?, attempts = attempts + 1,"
+                " updated_at = ? WHERE cycle = ? AND unit = ?", taken
+            )
+        return [(unit, unit_kind, json.loads(payload))
+                for unit, unit_kind, payload, _, attempts in rows if attempts < self.max_attempts]
+
+    def renew(self, cycle, owner, units, now=None):
+        """Prolonge les baux encore détenus ; retourne le nombre de baux prolongés"""
+        now = now or time.time()
+        with self.transaction() as db:
+            return db.executemany(
+                "UPDATE leases SET expires_at = ?, updated_at = ? WHERE cycle = ? AND unit = ?"
+                " AND owner = ? AND state = ?",
+                [(now + self.ttl, now, cycle, unit, owner, LEASED) for unit in units]
+            ).rowcount
+
+    def complete(self, cycle, owner, units, now=None):
+        """Marque des unités terminées, si ce worker en détient toujours le bail ; retourne le nombre accepté"""
+        now = now or time.time()
+        with self.transaction() as db:
+            return db.executemany(
+                "UPDATE leases SET state = ?, expires_at = NULL, updated_at = ? WHERE cycle = ? AND unit = ?"
+                " AND owner = ? AND state = ?",
+                [(DONE, now, cycle, unit, owner, LEASED) for unit in units]
+            ).rowcount
+
+    def release(self, cycle, owner, units, now=None):
+        """
+        Rend des unités non traitées (lot en échec) : aussitôt redistribuables, sans attendre
+        l'expiration du bail ; les prises déjà faites comptent toujours pour MAX_ATTEMPTS
+        """
+        now = now or time.time()
+        with self.transaction() as db:
+            return db.executemany(
+                "UPDATE leases SET state = ?, owner = NULL, expires_at = NULL, updated_at = ?"
+                " WHERE cycle = ? AND unit = ? AND owner = ? AND state = ?",
+                [(PENDING, now, cycle, unit, owner, LEASED) for unit in units]
+            ).rowcount
+
+    def progress(self, cycle, now=None):
+        """Nombre d'unités par état ; les baux expirés sont comptés à part ('expired')"""
+        now = now or time.time()
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0, 'expired': 0}
+        with self.lock:
+            rows = self.db.execute("SELECT state, state = ? AND expires_at < ?, COUNT(*) FROM leases"
+                                   " WHERE cycle = ? GROUP BY 1, 2", (LEASED, now, cycle)).fetchall()
+        for state, expired, count in rows:
+            counts['expired' if expired else state] += count
+        return counts
+
+    def next_expiry(self, cycle):
+        """Expiration du plus proche bail en cours (None s'il n'y en a pas)"""
+        with self.lock:
+            return self.db.execute("SELECT MIN(expires_at) FROM leases WHERE cycle = ? AND state = ?",
+                                   (cycle, LEASED)).fetchone()[0]
+
+    def close(self):
+        self.db.close()
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT (ROLLBACK en cas d'erreur), sérialisé entre les threads du processus"""
+
+    def __init__(self, table):
+        self.table = table
+
+    def __enter__(self):
+        self.table.lock.acquire()
+        try:
+            self.table.db.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self.table.lock.release()
+            raise
+        return self.table.db
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.table.db.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.table.lock.release()
+        return False
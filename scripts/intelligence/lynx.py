@@ -0,0 +1,202 @@
+"""
+Lynx Eye CLI
+Point d'entrée unique des collecteurs : un seul processus, import à la demande
+
+Chaque sous-commande n'importe que le module dont elle a besoin, au moment où elle
+s'exécute : `lynx.py --help` ou `lynx.py rss` ne chargent ni la pile web, ni
+supabase tant qu'aucun enregistrement n'est demandé. `all` enchaîne RSS puis web
+dans le même processus (un seul démarrage de l'interpréteur pour le cron).
+
+Usage:
+python lynx.py rss [options de rss_scraper.py]
+python lynx.py web [options de web_scraper.py]
+python lynx.py youtube
+python lynx.py all [--no-spool] [--flush-timeout N]
+python lynx.py dry-run [rss|web|all]
+python lynx.py daemon [options de daemon.py]
+python lynx.py importtime [module]
+python lynx.py health [--open]
+python lynx.py classifier [--port N]
+python lynx.py worker [--processes N]
+python lynx.py archive [info|keywords|sources|compact]
+python lynx.py trends [--top N] [--alerts N]
+python lynx.py spool [--requeue]
+"""
+
+import sys
+import argparse
+import subprocess
+
+COMMANDS = {
+    'rss': "Collecte des flux RSS (rss_scraper.py)",
+    'web': "Recherche web et YouTube (web_scraper.py)",
+    'youtube': "Recherche YouTube seule",
+    'all': "RSS puis web/YouTube dans le même processus",
+    'dry-run': "Collecte sans rien enregistrer (ni Supabase, ni état local)",
+    'daemon': "Processus de collecte permanent (daemon.py)",
+    'importtime': "Mesure le coût d'import d'un module (python -X importtime)",
+    'health': "État des sources et des disjoncteurs (health.py)",
+    'classifier': "Service local de classification des messages WhatsApp (classifier_service.py)",
+    'worker': "Collecte répartie entre plusieurs workers par baux (worker.py)",
+    'trends': "Mots-clés en hausse et dernières alertes de pics (trends.py)",
+    'archive': "Analyses de l'archive locale des items, en Parquet (archive.py)",
+    'spool': "État du spool local ; --requeue remet la dead letter en file (spool.py)",
+}
+
+
+def run_rss(argv):
+    from rss_scraper import main
+    main(argv)
+
+
+def run_web(argv):
+    from web_scraper import main
+    main(argv)
+
+
+def run_youtube(argv):
+    run_web(['--skip-web'] + argv)
+
+
+def run_all(argv):
+    """Options communes aux deux collecteurs uniquement (--no-spool, --flush-timeout, --workers)"""
+    run_rss(argv)
+    run_web(argv)
+
+
+def run_dry_run(argv):
+    target = argv[0] if argv and argv[0] in ('rss', 'web', 'all') else 'all'
+    rest = argv[1:] if argv and argv[0] == target else argv
+    if target in ('rss', 'all'):
+        run_rss(['--dry-run'] + rest)
+    if target in ('web', 'all'):
+        run_web(['--dry-run'] + rest)
+
+
+def run_daemon(argv):
+    from daemon import main
+    main(argv)
+
+
+def run_worker(argv):
+    from worker import main
+    main(argv)
+
+
+def run_classifier(argv):
+    from classifier_service import main
+    main(argv)
+
+
+def run_trends(argv):
+    from trends import main
+    main(argv)
+
+
+def run_archive(argv):
+    from archive import main
+    main(argv)
+
+
+def run_importtime(argv):
+    """Temps d'import cumulé d'un module, mesuré dans un interpréteur neuf"""
+    parser = argparse.ArgumentParser(prog="lynx.py importtime")
+    parser.add_argument('module', nargs='?', default='rss_scraper')
+    parser.add_argument('--top', type=int, default=10, help="Nombre de modules les plus coûteux affichés")
+    args = parser.parse_args(argv)
+
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {args.module}"],
+                          capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace('import time:', '|').split('|'))
+        rows.append((int(cumulative_us), int(self_us), name))
+    if proc.returncode != 0 or not rows:
+        print(f"❌ Import de {args.module} impossible")
+        print(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "")
+        sys.exit(1)
+
+    total = next((cumulative for cumulative, _, name in rows if name == args.module), rows[-1][0])
+    print(f"⏱  import {args.module}: {total / 1000:.0f} ms")
+    for cumulative, self_us, name in sorted(rows, reverse=True)[:args.top]:
+        print(f"   {cumulative / 1000:7.1f} ms  (propre {self_us / 1000:5.1f} ms)  {name}")
+
+
+def run_health(argv):
+    """Tableau de santé : état du disjoncteur, taux de succès, latences p50/p95, dernière erreur"""
+    parser = argparse.ArgumentParser(prog="lynx.py health")
+    parser.add_argument('--open', action='store_true', help="Disjoncteurs ouverts uniquement")
+    args = parser.parse_args(argv)
+
+    from health import HealthStore, OPEN
+    health = HealthStore()
+    rows = [row for row in health.rows() if not args.open or row[2] == OPEN]
+    health.close()
+    if not rows:
+        print("Aucune source suivie")
+        return
+
+    def seconds(value):
+        return f"{value:.2f}s" if value is not None else "-"
+
+    print(f"{'type':<8} {'source':<32} {'état':<7} {'succès':>6} {'p50':>7} {'p95':>7} {'échecs':>6}  reprise / erreur")
+    for kind, name, state, success_rate, p50, p95, failures, wait, error in rows:
+        status = f"dans {wait / 3600:.1f}h, {error}" if state == OPEN else (error or "")
+        print(f"{kind:<8} {name[:32]:<32} {'ouvert' if state == OPEN else 'fermé':<7} {success_rate:>6.0%} "
+              f"{seconds(p50):>7} {seconds(p95):>7} {failures:>6}  {status[:60]}")
+
+
+def run_spool(argv):
+    """Lignes en attente et en dead letter du spool ; --requeue les remet en file"""
+    parser = argparse.ArgumentParser(prog="lynx.py spool")
+    parser.add_argument('--requeue', action='store_true',
+                        help="Remet les lignes de dead letter dans le spool (après correction de la cause)")
+    args = parser.parse_args(argv)
+
+    from spool import Spool
+    spool = Spool()
+    try:
+        if args.requeue:
+            print(f"♻️  {spool.requeue_dead()} ligne(s) remise(s) en file")
+        counts = spool.counts()
+        print(f"📥 Spool: {counts['pending']} ligne(s) en attente, {counts['dead']} en dead letter")
+        for row_id, attempts, error in spool.db.execute(
+                "SELECT id, attempts, last_error FROM dead_letter ORDER BY id DESC LIMIT 10"):
+            print(f"   #{row_id} ({attempts} tentative(s)): {(error or '')[:100]}")
+    finally:
+        spool.close()
+
+
+RUNNERS = {
+    'rss': run_rss,
+    'web': run_web,
+    'youtube': run_youtube,
+    'all': run_all,
+    'dry-run': run_dry_run,
+    'daemon': run_daemon,
+    'importtime': run_importtime,
+    'health': run_health,
+    'classifier': run_classifier,
+    'worker': run_worker,
+    'trends': run_trends,
+    'archive': run_archive,
+    'spool': run_spool,
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(
+        description="Lynx Eye - collecteurs",
+        epilog="\n".join(f"  {name:<11} {help}" for name, help in COMMANDS.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('command', choices=COMMANDS, metavar='command', help="Sous-commande (voir ci-dessous)")
+    args = parser.parse_args(argv[:1])
+    RUNNERS[args.command](argv[1:])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""
+Keyword Matcher for Lynx Eye
+Recherche multi-motifs compilée une seule fois à partir de keywords.py
+
+Les mots-clés sont insérés dans un trie, converti en une unique expression
+régulière (automate équivalent à Aho-Corasick, exécuté en C par le moteur re) :
+chaque texte est parcouru en une seule passe, quel que soit le nombre de termes.
+Texte et mots-clés sont normalisés (casse, accents, apostrophes) et les
+correspondances respectent les frontières de mots ("or" ne matche pas "ordre").
+Un pluriel simple (s/x final) est toléré ; un "*" final rend le terme préfixe.
+"""
+
+import re
+import bisect
+import unicodedata
+from collections import namedtuple
+from functools import lru_cache
+
+from keywords import (
+    KEYWORD_CATEGORIES, PRIORITY_KEYWORDS, MODIFIERS, CITIES,
+    GABON_CONTEXT_KEYWORDS, get_whatsapp_filters
+)
+
+KeywordHit = namedtuple('KeywordHit', 'keyword category categories priority start end')
+
+# Caractères typographiques ramenés à leur forme simple
+_PUNCTUATION = {
+    '\u2019': "'", '\u2018': "'", '\u02bc': "'", '\u00b4': "'",
+    '\u2010': '-', '\u2011': '-', '\u2013': '-', '\u2014': '-',
+    '\u00a0': ' ', '\u202f': ' ',
+}
+
+_PUNCTUATION_RE = re.compile('[' + ''.join(_PUNCTUATION) + ']')
+
+# Diacritiques combinants laissés par la décomposition NFKD
+_COMBINING_RE = re.compile('[\u0300-\u036f]')
+
+# Séparateur des textes d'un lot parcouru en une passe (aucun terme ne le traverse)
+_BATCH_SEPARATOR = '\n\n'
+
+
+def fold(text):
+    """Normalise un texte : minuscules, sans accents, apostrophes et tirets simples"""
+    text = text.lower()
+    if text.isascii():
+        return text
+    text = _PUNCTUATION_RE.sub(lambda m: _PUNCTUATION[m.group()], text)
+    return _COMBINING_RE.sub('', unicodedata.normalize('NFKD', text))
+
+
+def _trie_to_regex(node):
+    """Convertit récursivement un nœud du trie en expression régulière"""
+    branches = [
+        re.escape(char) + _trie_to_regex(node[char])
+        for char in sorted(c for c in node if c is not None)
+    ]
+    # Fin de terme : les branches plus longues sont essayées d'abord
+    if None in node:
+        branches.append('' if node[None] == 'prefix' else r'(?=[sx]?(?!\w))')
+    if len(branches) == 1:
+        return branches[0]
+    return '(?:' + '|'.join(branches) + ')'
+
+
+def _compile(terms):
+    """Compile un ensemble de termes normalisés {terme: 'word'|'prefix'} en regex"""
+    trie = {}
+    for term, mode in terms.items():
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[None] = mode
+    return r'(?<!\w)' + _trie_to_regex(trie) if trie else r'(?!x)x'
+
+
+class KeywordMatcher:
+    """
+    Matcher compilé. entries : itérable de (terme, catégorie, prioritaire).
+    Un même terme peut apparaître dans plusieurs catégories.
+    """
+
+    def __init__(self, entries):
+        self.terms = {}
+        for term, category, priority in entries:
+            mode = 'prefix' if term.endswith('*') else 'word'
+            key = fold(term.rstrip('*')).strip()
+            if not key:
+                continue
+            info = self.terms.setdefault(key, {'keyword': term.rstrip('*'), 'categories': [],
+                                               'priority': False, 'mode': mode})
+            if category not in info['categories']:
+                info['categories'].append(category)
+            info['priority'] = info['priority'] or priority
+            if mode == 'prefix':
+                info['mode'] = 'prefix'
+
+        modes = {key: info['mode'] for key, info in self.terms.items()}
+        body = _compile(modes)
+        self._search = re.compile(body)
+        # Lookahead capturant : toutes les positions de départ, y compris chevauchantes
+        self._scan = re.compile(r'(?=(' + body + '))')
+        self._priority = re.compile(_compile({k: i['mode'] for k, i in self.terms.items() if i['priority']}))
+
+        # Termes plus courts qui sont préfixes d'un terme plus long à une frontière de mot
+        # ("coupure" dans "coupure d'eau") : reportés avec la correspondance la plus longue
+        self._nested = {}
+        for key in self.terms:
+            self._nested[key] = [
+                other for other in self.terms
+                if other != key and key.startswith(other)
+                and (self.terms[other]['mode'] == 'prefix' or not key[len(other)].isalnum())
+            ]
+
+    def __len__(self):
+        return len(self.terms)
+
+    def _hit(self, key, start):
+        info = self.terms[key]
+        return KeywordHit(info['keyword'], info['categories'][0], tuple(info['categories']),
+                          info['priority'], start, start + len(key))
+
+    def scan(self, folded):
+        """Génère (terme normalisé, position) pour chaque occurrence dans un texte déjà normalisé"""
+        for match in self._scan.finditer(folded):
+            matched = match.group(1)
+            start = match.start()
+            key = matched if matched in self.terms else self._longest_prefix(matched)
+            yield key, start
+            for other in self._nested[key]:
+                yield other, start
+
+    def scan_rows(self, folded_texts):
+        """Occurrences (indice du texte, terme normalisé) d'un lot de textes déjà normalisés, en une seule passe"""
+        offsets = []
+        position = 0
+        for text in folded_texts:
+            offsets.append(position)
+            position += len(text) + len(_BATCH_SEPARATOR)
+        for key, start in self.scan(_BATCH_SEPARATOR.join(folded_texts)):
+            yield bisect.bisect_right(offsets, start) - 1, key
+
+    def scan_batch(self, folded_texts):
+        """Termes normalisés distincts de chaque texte déjà normalisé, en une seule passe pour tout le lot"""
+        found = [{} for _ in folded_texts]
+        for row, key in self.scan_rows(folded_texts):
+            found[row].setdefault(key, None)
+        return [list(keys) for keys in found]
+
+    def keywords_batch(self, texts):
+        """keywords() pour un lot de textes"""
+        return [[self.terms[key]['keyword'] for key in keys]
+                for keys in self.scan_batch([fold(text or '') for text in texts])]
+
+    def find(self, text):
+        """Retourne toutes les occurrences (positions dans le texte normalisé)"""
+        return [self._hit(key, start) for key, start in self.scan(fold(text))]
+
+    def _longest_prefix(self, matched):
+        """Pour un terme préfixe ("gabon*"), retrouve le terme dans le texte capturé"""
+        for end in range(len(matched), 0, -1):
+            if matched[:end] in self.terms:
+                return matched[:end]
+        raise KeyError(matched)
+
+    def keywords(self, text):
+        """Mots-clés distincts trouvés, dans l'ordre d'apparition"""
+        return list(dict.fromkeys(hit.keyword for hit in self.find(text)))
+
+    def matches(self, text):
+        """Vrai si au moins un terme est présent (s'arrête à la première occurrence)"""
+        return self._search.search(fold(text)) is not None
+
+    def has_priority(self, text):
+        """Vrai si au moins un mot-clé prioritaire est présent"""
+        return self._priority.search(fold(text)) is not None
+
+
+def keyword_entries():
+    """Vocabulaire complet de keywords.py sous forme de (terme, catégorie, prioritaire)"""
+    priority = {fold(kw) for kw in PRIORITY_KEYWORDS}
+    entries = []
+    for category, terms in KEYWORD_CATEGORIES.items():
+        entries.extend((kw, category, fold(kw) in priority) for kw in terms)
+    entries.extend((kw, 'prioritaire', True) for kw in PRIORITY_KEYWORDS)
+    entries.extend((kw, 'modificateur', fold(kw) in priority) for kw in MODIFIERS)
+    entries.extend((city, 'ville', fold(city) in priority) for city in CITIES)
+    entries.extend((kw, 'whatsapp', fold(kw) in priority) for kw in get_whatsapp_filters())
+    return entries
+
+
+@lru_cache(maxsize=None)
+def get_matcher():
+    """Matcher partagé construit une seule fois sur tout le vocabulaire"""
+    return KeywordMatcher(keyword_entries())
+
+
+@lru_cache(maxsize=None)
+def get_context_matcher():
+    """Matcher du contexte gabonais (filtre des résultats de recherche web)"""
+    return KeywordMatcher((kw, 'contexte', False) for kw in GABON_CONTEXT_KEYWORDS)
@@ -0,0 +1,321 @@
+"""
+Metrics for Lynx Eye
+Compteurs et histogrammes de latence par étape et par source, au format texte Prometheus
+
+Les scrapers enregistrent dans un registre commun au processus : durée de
+téléchargement et de parsing de chaque flux, taux de passage du filtre, latence
+des recherches et des upserts, erreurs. Le registre est exposé :
+- en mode cron, dans un fichier texte écrit en fin d'exécution (collecteur
+  textfile de node_exporter), valeurs de la seule exécution ;
+- en mode daemon, par un endpoint HTTP local (/metrics), valeurs cumulées.
+Profiler (--profile) ajoute une répartition CPU/mémoire par module pour une exécution.
+"""
+
+import os
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+# Bornes des histogrammes de latence (secondes)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Toutes les métriques connues : nom -> (type, aide)
+DEFINITIONS = {
+    'lynx_fetch_seconds': ('histogram', "Durée de téléchargement d'un flux"),
+    'lynx_fetch_total': ('counter', "Téléchargements de flux par statut (ok, not_modified, unchanged, error)"),
+    'lynx_parse_seconds': ('histogram', "Durée de parsing d'un flux"),
+    'lynx_backfill_pages_total': ('counter', "Pages de flux téléchargées lors d'un rattrapage (?paged=N)"),
+    'lynx_filter_entries_total': ('counter', "Entrées soumises au filtre de mots-clés"),
+    'lynx_filter_matches_total': ('counter', "Entrées retenues par le filtre de mots-clés"),
+    'lynx_crawl_links_total': ('counter', "Liens d'articles des sites sans RSS par statut (discovered, new)"),
+    'lynx_search_seconds': ('histogram', "Durée d'une requête de recherche"),
+    'lynx_search_total': ('counter', "Requêtes de recherche par statut (ok, cache, rate_limited, error)"),
+    'lynx_query_yield': ('gauge', "Items nouveaux et pertinents par requête de recherche réseau (dernière exécution)"),
+    'lynx_pipeline_items_total': ('counter', "Items produits par source du pipeline"),
+    'lynx_pipeline_seconds': ('histogram', "Durée de traitement d'un lot (étapes, sink)"),
+    'lynx_pipeline_blocked_total': ('counter', "Attentes de backpressure (file du pipeline pleine)"),
+    'lynx_upsert_seconds': ('histogram', "Durée d'une requête d'upsert Supabase"),
+    'lynx_upsert_rows_total': ('counter', "Lignes traitées par l'upsert par statut (saved, failed, skipped)"),
+    'lynx_upsert_errors_total': ('counter', "Requêtes d'upsert en erreur"),
+    'lynx_classify_seconds': ('histogram', "Durée de classification d'un lot de messages (classifier_service.py)"),
+    'lynx_classify_messages_total': ('counter', "Messages classés par statut (relevant, ignored)"),
+    'lynx_trend_alerts_total': ('counter', "Pics de mentions détectés par mot-clé (trends.py)"),
+    'lynx_circuit_open': ('gauge', "Disjoncteur d'une source ou d'un moteur de recherche (1 ouvert, 0 fermé)"),
+    'lynx_feed_poll_interval_seconds': ('gauge', "Intervalle planifié avant la prochaine interrogation d'un flux"),
+    'lynx_run_duration_seconds': ('gauge', "Durée de la dernière exécution"),
+    'lynx_run_last_success_timestamp_seconds': ('gauge', "Fin de la dernière exécution réussie (epoch)"),
+    'lynx_run_failures_total': ('counter', "Exécutions interrompues par une exception (daemon.py)"),
+}
+
+
+def label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """Valeurs de toutes les métriques, partagées entre threads"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.values = {}       # (nom, labels) -> valeur (compteur, jauge)
+        self.histograms = {}   # (nom, labels) -> [compteurs par borne, somme, nombre]
+
+    def check(self, name, kind):
+        if DEFINITIONS.get(name, (None,))[0] != kind:
+            raise ValueError(f"Métrique {kind} inconnue: {name}")
+
+    def inc(self, name, value=1, **labels):
+        self.check(name, 'counter')
+        key = (name, label_key(labels))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        self.check(name, 'gauge')
+        with self.lock:
+            self.values[(name, label_key(labels))] = value
+
+    def observe(self, name, seconds, **labels):
+        self.check(name, 'histogram')
+        key = (name, label_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, seconds)
+            if index < len(self.buckets):
+                histogram[0][index] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Mesure la durée du bloc dans un histogramme"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def render(self):
+        """Texte au format d'exposition Prometheus (version 0.0.4)"""
+        with self.lock:
+            values = dict(self.values)
+            histograms = {key: (list(h[0]), h[1], h[2]) for key, h in self.histograms.items()}
+        lines = []
+        for name, (kind, help_text) in DEFINITIONS.items():
+            series = sorted(key for key in (values if kind != 'histogram' else histograms) if key[0] == name)
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key in series:
+                labels = key[1]
+                if kind != 'histogram':
+                    lines.append(f"{name}{format_labels(labels)} {format_value(values[key])}")
+                    continue
+                counts, total, count = histograms[key]
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts + [None]):
+                    cumulative = count if bucket_count is None else cumulative + bucket_count
+                    lines.append(f"{name}_bucket{format_labels(labels, [('le', format_value(bound))])} {cumulative}")
+                lines.append(f"{name}_sum{format_labels(labels)} {format_value(total)}")
+                lines.append(f"{name}_count{format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, name, by=None):
+        """{valeur du label `by` (tout si None): (nombre, somme)} pour un histogramme"""
+        result = {}
+        with self.lock:
+            for (metric, labels), (_, total, count) in self.histograms.items():
+                if metric == name:
+                    label = dict(labels).get(by, '') if by else ''
+                    previous = result.get(label, (0, 0.0))
+                    result[label] = (previous[0] + count, previous[1] + total)
+        return result
+
+    def snapshot(self):
+        """Copie des valeurs, transmissible à un autre processus (voir merge)"""
+        with self.lock:
+            return dict(self.values), {key: (list(h[0]), h[1], h[2]) for key, h in self.histograms.items()}
+
+    def merge(self, snapshot):
+        """Ajoute les valeurs d'un autre registre (workers enfants) : compteurs et histogrammes
+        additionnés, jauges remplacées"""
+        values, histograms = snapshot
+        with self.lock:
+            for key, value in values.items():
+                counter = DEFINITIONS.get(key[0], (None,))[0] == 'counter'
+                self.values[key] = self.values.get(key, 0) + value if counter else value
+            for key, (counts, total, count) in histograms.items():
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+                histogram[0] = [a + b for a, b in zip(histogram[0], counts)]
+                histogram[1] += total
+                histogram[2] += count
+
+    def reset(self):
+        with self.lock:
+            self.values.clear()
+            self.histograms.clear()
+
+
+# Registre du processus
+REGISTRY = Registry()
+inc = REGISTRY.inc
+set_gauge = REGISTRY.set
+observe = REGISTRY.observe
+timer = REGISTRY.timer
+
+
+def write_textfile(path, registry=REGISTRY):
+    """Écrit le registre dans un fichier (remplacement atomique, lu par node_exporter)"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(registry.render())
+    os.replace(tmp, path)
+
+
+def record_run(collector, started, registry=REGISTRY):
+    """Durée et horodatage de fin d'une exécution réussie"""
+    registry.set('lynx_run_duration_seconds', time.time() - started, collector=collector)
+    registry.set('lynx_run_last_success_timestamp_seconds', time.time(), collector=collector)
+
+
+def serve(port, host='127.0.0.1', registry=REGISTRY):
+    """Démarre l'endpoint HTTP /metrics dans un thread ; retourne le serveur (shutdown() pour l'arrêter)"""
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/metrics', '/'):
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def module_group(filename):
+    """Regroupe un fichier source par module du projet ou par paquet tiers"""
+    path = filename.replace('\\', '/')
+    if '/site-packages/' in path:
+        return path.split('/site-packages/', 1)[1].split('/', 1)[0].split('.', 1)[0]
+    if path.startswith(os.path.dirname(os.path.abspath(__file__)).replace('\\', '/')):
+        return os.path.splitext(os.path.basename(path))[0]
+    if path.startswith('<') or '/' not in path:
+        return 'builtins'
+    return 'stdlib'
+
+
+class Profiler:
+    """
+    Profil d'une exécution : temps CPU propre (cProfile, horloge CPU de chaque thread, les
+    attentes réseau ne comptent pas) et allocations (tracemalloc) regroupés par module ;
+    les threads du pipeline sont profilés avec le thread principal
+    """
+
+    def __init__(self):
+        import cProfile
+        import tracemalloc
+
+        self.cProfile = cProfile
+        self.tracemalloc = tracemalloc
+        self.profiles = []
+        self.started = None
+
+    def _thread_profile(self, frame, event, arg):
+        import sys
+        sys.setprofile(None)
+        profile = self.cProfile.Profile(time.thread_time)
+        try:
+            profile.enable()
+        except ValueError:
+            # Profileur global (Python 3.12+) : ce thread est déjà couvert
+            return
+        self.profiles.append(profile)
+
+    def start(self):
+        self.tracemalloc.start()
+        threading.setprofile(self._thread_profile)
+        profile = self.cProfile.Profile(time.thread_time)
+        profile.enable()
+        self.profiles.append(profile)
+        self.started = time.perf_counter()
+        return self
+
+    def stop(self, path=None, top=12):
+        """Arrête le profil, écrit les statistiques pstats dans `path` et retourne le bilan"""
+        import pstats
+
+        elapsed = time.perf_counter() - self.started
+        threading.setprofile(None)
+        for profile in self.profiles:
+            profile.disable()
+        snapshot = self.tracemalloc.take_snapshot()
+        _, peak = self.tracemalloc.get_traced_memory()
+        self.tracemalloc.stop()
+
+        stats = pstats.Stats(*self.profiles)
+        if path:
+            stats.dump_stats(path)
+        cpu = {}
+        for (filename, _, _), (_, _, tottime, _, _) in stats.stats.items():
+            group = module_group(filename)
+            cpu[group] = cpu.get(group, 0.0) + tottime
+        memory = {}
+        for stat in snapshot.statistics('filename'):
+            group = module_group(stat.traceback[0].filename)
+            memory[group] = memory.get(group, 0) + stat.size
+
+        total_cpu = sum(cpu.values()) or 1.0
+        lines = [f"🔬 Profil: {elapsed:.2f}s, CPU profilé {total_cpu:.2f}s, pic mémoire {peak / 1024:.0f} Kio"
+                 + (f" (pstats: {path})" if path else "")]
+        for group, seconds in sorted(cpu.items(), key=lambda g: -g[1])[:top]:
+            lines.append(f"   {group:<16} CPU {seconds:7.3f}s ({seconds / total_cpu:4.0%})  "
+                         f"mémoire retenue {memory.get(group, 0) / 1024:8.0f} Kio")
+        return "\n".join(lines)
+
+
+def stage_report(registry=REGISTRY):
+    """Ligne de bilan : temps cumulé et nombre de mesures par étape, issus des histogrammes"""
+    stages = [
+        ('téléchargement', 'lynx_fetch_seconds', None),
+        ('parsing', 'lynx_parse_seconds', None),
+        ('recherche', 'lynx_search_seconds', 'backend'),
+        ('pipeline', 'lynx_pipeline_seconds', 'step'),
+        ('upsert', 'lynx_upsert_seconds', None),
+    ]
+    parts = []
+    for title, name, by in stages:
+        for label, (count, total) in sorted(registry.summary(name, by).items()):
+            parts.append(f"{title} {label}".strip() + f" {total:.2f}s/{count}")
+    return "📈 Étapes (cumul/mesures): " + (", ".join(parts) if parts else "aucune mesure")
@@ -0,0 +1,241 @@
+"""
+Streaming Pipeline for Lynx Eye
+Chaîne de collecte en flux : sources → étapes par lot (dédoublonnage...) → sink
+
+Chaque source (générateur d'items : flux RSS, recherche web, YouTube) tourne dans
+son propre thread et dépose ses items dans une file bornée. Le consommateur forme
+des lots (taille maximale ou délai d'attente), leur applique les étapes puis les
+passe au sink (spool local ou upsert Supabase). Les items sont donc enregistrés dès
+qu'ils ont passé le filtrage, la mémoire reste bornée par la taille de la file, et
+un sink lent bloque les sources (backpressure) au lieu d'accumuler les items.
+"""
+
+import queue
+import threading
+import time
+
+import metrics
+from supabase_sink import save_items, DEFAULT_BATCH_SIZE as DEFAULT_UPSERT_BATCH_SIZE
+
+DEFAULT_QUEUE_SIZE = 500     # items en attente au maximum entre sources et sink
+DEFAULT_BATCH_SIZE = 100     # items par lot passé aux étapes et au sink
+DEFAULT_LINGER = 2.0         # délai maximal (s) avant d'envoyer un lot incomplet
+
+_DONE = object()
+
+
+class Pipeline:
+    """
+    stages : fonctions lot -> lot (ex. StoryClusterer.collapse), appliquées dans l'ordre
+    sink : fonction lot -> None (ex. Spool.append)
+    """
+
+    def __init__(self, sink, stages=(), queue_size=DEFAULT_QUEUE_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                 linger=DEFAULT_LINGER):
+        self.sink = sink
+        self.stages = list(stages)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.linger = linger
+        self.stats = {'sources': {}, 'received': 0, 'sunk': 0, 'batches': 0, 'max_queue': 0,
+                      'blocked': 0, 'stage_seconds': 0.0, 'sink_seconds': 0.0}
+        self.lock = threading.Lock()
+
+    def _produce(self, name, source):
+        """Thread source : dépose chaque item, bloque si la file est pleine"""
+        stats = {'items': 0, 'seconds': 0.0, 'error': None}
+        with self.lock:
+            self.stats['sources'][name] = stats
+        started = time.monotonic()
+        try:
+            for item in source():
+                try:
+                    self.queue.put_nowait(item)
+                except queue.Full:
+                    with self.lock:
+                        self.stats['blocked'] += 1
+                    metrics.inc('lynx_pipeline_blocked_total', source=name)
+                    self.queue.put(item)
+                stats['items'] += 1
+        except Exception as e:
+            stats['error'] = e
+            print(f"  ✗ Source {name} interrompue: {e}")
+        finally:
+            stats['seconds'] = time.monotonic() - started
+            metrics.inc('lynx_pipeline_items_total', stats['items'], source=name)
+            self.queue.put(_DONE)
+
+    def _flush(self, batch):
+        started = time.monotonic()
+        for stage in self.stages:
+            batch = stage(batch)
+            if not batch:
+                break
+        elapsed = time.monotonic() - started
+        self.stats['stage_seconds'] += elapsed
+        metrics.observe('lynx_pipeline_seconds', elapsed, step='stages')
+        if batch:
+            started = time.monotonic()
+            self.sink(batch)
+            elapsed = time.monotonic() - started
+            self.stats['sink_seconds'] += elapsed
+            metrics.observe('lynx_pipeline_seconds', elapsed, step='sink')
+            self.stats['sunk'] += len(batch)
+        self.stats['batches'] += 1
+
+    def run(self, sources):
+        """
+        sources : dict nom -> fonction sans argument retournant un itérable d'items
+        Bloque jusqu'à épuisement de toutes les sources ; retourne les statistiques
+        """
+        threads = [
+            threading.Thread(target=self._produce, args=(name, source), name=f"source-{name}", daemon=True)
+            for name, source in sources.items()
+        ]
+        for thread in threads:
+            thread.start()
+
+        running = len(threads)
+        batch = []
+        batch_started = time.monotonic()
+        while running:
+            timeout = max(0.0, self.linger - (time.monotonic() - batch_started)) if batch else self.linger
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            else:
+                self.stats['max_queue'] = max(self.stats['max_queue'], self.queue.qsize() + 1)
+                if item is _DONE:
+                    running -= 1
+                else:
+                    if not batch:
+                        batch_started = time.monotonic()
+                    batch.append(item)
+                    self.stats['received'] += 1
+
+            if batch and (len(batch) >= self.batch_size or time.monotonic() - batch_started >= self.linger):
+                self._flush(batch)
+                batch = []
+
+        if batch:
+            self._flush(batch)
+        for thread in threads:
+            thread.join()
+        return self.stats
+
+    def report(self):
+        """Lignes de bilan pour la sortie d'exécution"""
+        lines = [
+            f"🔀 Pipeline: {self.stats['received']} item(s) reçu(s), {self.stats['sunk']} transmis au sink "
+            f"en {self.stats['batches']} lot(s), file max {self.stats['max_queue']}/{self.queue.maxsize}, "
+            f"{self.stats['blocked']} attente(s) de backpressure",
+            f"   étapes {self.stats['stage_seconds']:.2f}s, sink {self.stats['sink_seconds']:.2f}s",
+        ]
+        for name, stats in self.stats['sources'].items():
+            status = f", erreur: {stats['error']}" if stats['error'] else ""
+            lines.append(f"   {name}: {stats['items']} item(s) en {stats['seconds']:.2f}s{status}")
+        return "\n".join(lines)
+
+
+def dedup_stage(clusterer):
+    """Étape de regroupement des reprises : collapse par lot, état persisté après chaque lot"""
+    def stage(batch):
+        stories = clusterer.collapse(batch)
+        clusterer.save()
+        return stories
+    return stage
+
+
+def scoring_stage(scorer, min_score=0.0, top_k=None):
+    """Étape de notation : score de pertinence écrit dans l'item, lot trié, seuil et top_k par lot"""
+    def stage(batch):
+        return scorer.rank(batch, min_score=min_score, top_k=top_k)
+    return stage
+
+
+def reward_stage(planner, min_score):
+    """Étape d'attribution : chaque item nouveau et pertinent est crédité à la requête qui l'a trouvé"""
+    def stage(batch):
+        for item in batch:
+            planner.credit(item, min_score=min_score)
+        return batch
+    return stage
+
+
+def trend_stage(detector):
+    """Étape de détection des pics : mentions des mots-clés comptées, alertes écrites au passage du lot"""
+    def stage(batch):
+        detector.observe(batch)
+        return batch
+    return stage
+
+
+def archive_stage(writer):
+    """Étape d'archivage : le lot retenu est ajouté à l'archive locale (archive.ArchiveWriter)"""
+    def stage(batch):
+        writer.append(batch)
+        return batch
+    return stage
+
+
+class SpoolSink:
+    """Sink : écriture dans le spool local, vidé en arrière-plan par le flusher"""
+
+    def __init__(self, spool, flusher=None):
+        self.spool = spool
+        self.flusher = flusher
+        self.queued = 0
+
+    def __call__(self, batch):
+        self.queued += self.spool.append(batch)
+        if self.flusher is not None:
+            self.flusher.notify()
+
+    def report(self):
+        return f"💾 {self.queued} items mis en file locale (spool), envoi vers Supabase en arrière-plan"
+
+
+class SupabaseSink:
+    """Sink : upsert groupé direct dans Supabase (sans spool)"""
+
+    def __init__(self, client, batch_size=DEFAULT_UPSERT_BATCH_SIZE, seen_index=None):
+        self.client = client
+        self.batch_size = batch_size
+        self.seen_index = seen_index
+        self.totals = {'items': 0, 'saved': 0, 'failed': 0, 'duplicates': 0, 'skipped': 0, 'requests': 0}
+
+    def __call__(self, batch):
+        report = save_items(self.client, batch, batch_size=self.batch_size, seen_index=self.seen_index)
+        self.totals['items'] += len(batch)
+        for key in ('saved', 'failed', 'duplicates', 'skipped', 'requests'):
+            self.totals[key] += report[key]
+
+    def report(self):
+        totals = self.totals
+        lines = [f"  {totals['requests']} requête(s), {totals['duplicates']} doublon(s) ignoré(s), "
+                 f"{totals['failed']} échec(s)"]
+        if self.seen_index is not None:
+            lines.append(f"  🗂  Index local: {totals['skipped']} écriture(s) évitée(s) (items déjà enregistrés)")
+        lines.append(f"✅ {totals['saved']}/{totals['items'] - totals['skipped']} items sauvegardés avec succès")
+        return "\n".join(lines)
+
+
+class PrintSink:
+    """Sink de démonstration (--dry-run) : affiche les items sans rien enregistrer"""
+
+    def __init__(self, limit=20):
+        self.limit = limit
+        self.count = 0
+
+    def __call__(self, batch):
+        for item in batch:
+            self.count += 1
+            if self.count <= self.limit:
+                score = f"{item['relevance_score']:5.1f} " if 'relevance_score' in item else ""
+                print(f"  • {score}[{item.get('author')}] {(item.get('content') or '')[:100]}")
+
+    def report(self):
+        hidden = max(0, self.count - self.limit)
+        return f"🧪 Dry run: {self.count} item(s) collecté(s), rien n'a été enregistré" + (
+            f" ({hidden} non affiché(s))" if hidden else "")
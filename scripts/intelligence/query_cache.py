@@ -0,0 +1,134 @@
+"""
+Query Result Cache for Lynx Eye
+Cache persistant des résultats de recherche (DuckDuckGo, YouTube)
+
+generate_search_queries produit souvent les mêmes requêtes d'une exécution à
+l'autre (mots-clés prioritaires, listes courtes de modificateurs et de villes).
+Une requête déjà posée il y a moins de TTL (par moteur) est servie localement :
+le budget de requêtes réseau ainsi libéré va à des requêtes jamais vues.
+Clé : (moteur, requête normalisée, max_results). Taille bornée, éviction LRU.
+Partageable entre threads (sources web et YouTube du pipeline).
+"""
+
+import re
+import json
+import time
+import sqlite3
+import threading
+
+from matcher import fold
+from state import state_path
+
+DEFAULT_FILENAME = 'query_cache.sqlite3'
+DEFAULT_MAX_ENTRIES = 5000
+
+# Durée de validité par moteur, en heures
+DEFAULT_TTLS = {
+    'ddg': 6,
+    'youtube': 24,
+}
+DEFAULT_TTL = 6
+
+_SPACES_RE = re.compile(r'\s+')
+
+
+def normalize_query(query):
+    """Requête normalisée : casse, accents et espaces ignorés"""
+    return _SPACES_RE.sub(' ', fold(query)).strip()
+
+
+class QueryCache:
+    """Résultats de requêtes stockés en JSON dans SQLite, avec TTL par moteur et borne LRU"""
+
+    def __init__(self, path=None, ttls=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path or state_path(DEFAULT_FILENAME)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0, 'bytes_saved': 0, 'evicted': 0}
+        self.lock = threading.Lock()
+        # Base partagée par les workers (worker.py) : WAL et attente du verrou d'écriture
+        self.db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " backend TEXT NOT NULL, query TEXT NOT NULL, max_results INTEGER NOT NULL,"
+            " payload TEXT NOT NULL, stored_at REAL NOT NULL, used_at REAL NOT NULL,"
+            " PRIMARY KEY (backend, query, max_results));"
+            "CREATE INDEX IF NOT EXISTS results_used_at ON results (used_at);"
+        )
+
+    def ttl(self, backend):
+        return self.ttls.get(backend, DEFAULT_TTL) * 3600
+
+    def get(self, backend, query, max_results, now=None):
+        """Résultats en cache encore valides, ou None"""
+        now = now or time.time()
+        key = (backend, normalize_query(query), max_results)
+        with self.lock:
+            row = self.db.execute(
+                "SELECT payload FROM results WHERE backend = ? AND query = ? AND max_results = ?"
+                " AND stored_at >= ?", key + (now - self.ttl(backend),)
+            ).fetchone()
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            with self.db:
+                self.db.execute(
+                    "UPDATE results SET used_at = ? WHERE backend = ? AND query = ? AND max_results = ?",
+                    (now,) + key
+                )
+            self.stats['hits'] += 1
+            self.stats['bytes_saved'] += len(row[0].encode('utf-8'))
+        return json.loads(row[0])
+
+    def contains(self, backend, query, max_results, now=None):
+        """Vrai si la requête est en cache et valide (sans compter de hit)"""
+        now = now or time.time()
+        with self.lock:
+            return self.db.execute(
+                "SELECT 1 FROM results WHERE backend = ? AND query = ? AND max_results = ? AND stored_at >= ?",
+                (backend, normalize_query(query), max_results, now - self.ttl(backend))
+            ).fetchone() is not None
+
+    def put(self, backend, query, max_results, results, now=None):
+        """Enregistre les résultats d'une requête réussie"""
+        now = now or time.time()
+        payload = json.dumps(results, ensure_ascii=False, default=str)
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT INTO results (backend, query, max_results, payload, stored_at, used_at)"
+                " VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(backend, query, max_results) DO UPDATE SET"
+                " payload = excluded.payload, stored_at = excluded.stored_at, used_at = excluded.used_at",
+                (backend, normalize_query(query), max_results, payload, now, now)
+            )
+            self.stats['stored'] += 1
+
+    def prune(self, now=None):
+        """Supprime les entrées expirées puis les moins récemment utilisées au-delà de max_entries"""
+        now = now or time.time()
+        with self.lock, self.db:
+            evicted = 0
+            for backend, in self.db.execute("SELECT DISTINCT backend FROM results").fetchall():
+                evicted += self.db.execute(
+                    "DELETE FROM results WHERE backend = ? AND stored_at < ?",
+                    (backend, now - self.ttl(backend))
+                ).rowcount
+            evicted += self.db.execute(
+                "DELETE FROM results WHERE rowid IN ("
+                " SELECT rowid FROM results ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+        self.stats['evicted'] += evicted
+
+    def hit_rate(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / lookups if lookups else 0.0
+
+    def report(self):
+        """Ligne de bilan pour la sortie d'exécution"""
+        return (f"🗄  Cache requêtes: {self.stats['hits']} hit(s), {self.stats['misses']} miss, "
+                f"taux {self.hit_rate():.0%}, {self.stats['bytes_saved'] / 1024:.1f} Ko économisés")
+
+    def close(self):
+        self.prune()
+        self.db.close()
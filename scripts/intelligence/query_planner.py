@@ -0,0 +1,192 @@
+"""
+Query Planner for Lynx Eye
+Répartition du budget de requêtes web/YouTube selon le rendement observé de chaque requête
+
+Chaque requête est une combinaison mot-clé × modificateur × ville (modificateur et
+ville facultatifs). Pour chacune, le planificateur mémorise le nombre de requêtes
+réseau envoyées et le nombre d'items nouveaux (nouvelle histoire dans dedup.py) et
+pertinents (score suffisant) qu'elles ont rapportés. Le budget de l'exécution suivante
+est attribué par un bandit UCB :
+- rendement estimé = items nouveaux / requête, lissé vers un a priori calculé à partir
+  du rendement de chaque composante (mot-clé, modificateur, ville), ce qui permet de
+  classer les combinaisons jamais essayées ;
+- bonus d'exploration décroissant avec le nombre d'essais de la combinaison ;
+- statistiques amorties à chaque exécution enregistrée (l'actualité change, une
+  requête stérile peut redevenir productive).
+Seules les réponses réseau sont attribuées à leur requête : une réponse servie par le
+cache ne consomme pas de budget et a déjà été comptée.
+Les statistiques sont stockées en SQLite dans .state/.
+"""
+
+import math
+import sqlite3
+import threading
+import time
+
+import metrics
+from state import state_path
+
+DEFAULT_FILENAME = 'query_planner.sqlite3'
+
+EXPLORATION = 1.0          # poids du bonus d'exploration UCB
+PRIOR_STRENGTH = 2.0       # nombre de requêtes "fictives" de l'a priori
+PRIORITY_BOOST = 1.5       # a priori des mots-clés prioritaires
+DISCOUNT = 0.97            # amortissement des statistiques à chaque exécution
+MAX_PER_KEYWORD = 2        # requêtes d'un même mot-clé par planification
+RELEVANT_SCORE = 20.0      # score minimal d'un item compté comme pertinent
+
+
+def compose(keyword, modifier=None, city=None):
+    """Texte de la requête d'une combinaison"""
+    return " ".join(part for part in (keyword, modifier, city) if part)
+
+
+class QueryPlanner:
+    """Bandit UCB sur les combinaisons mot-clé × modificateur × ville, par moteur (web, youtube)"""
+
+    def __init__(self, path=None, keywords=None, modifiers=None, cities=None, priority=None,
+                 exploration=EXPLORATION, discount=DISCOUNT):
+        from keywords import INTELLIGENCE_KEYWORDS, PRIORITY_KEYWORDS, MODIFIERS, CITIES
+
+        self.path = path or state_path(DEFAULT_FILENAME)
+        self.keywords = list(dict.fromkeys(keywords or PRIORITY_KEYWORDS + INTELLIGENCE_KEYWORDS))
+        self.modifiers = [None] + list(modifiers or MODIFIERS)
+        self.cities = [None] + list(cities or CITIES)
+        self.priority = set(priority if priority is not None else PRIORITY_KEYWORDS)
+        self.exploration = exploration
+        self.discount = discount
+        self.lock = threading.Lock()
+        self.planned = {}      # (moteur, requête) -> (mot-clé, modificateur, ville)
+        self.pending = {}      # (moteur, requête) -> [requêtes réseau, items nouveaux]
+        self.stats = {'requests': 0, 'new_items': 0, 'explore': 0, 'exploit': 0}
+        # Base partagée par les workers (worker.py) : WAL et attente du verrou d'écriture
+        self.db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS arms ("
+            " backend TEXT NOT NULL, query TEXT NOT NULL, keyword TEXT NOT NULL,"
+            " modifier TEXT NOT NULL, city TEXT NOT NULL, requests REAL NOT NULL,"
+            " new_items REAL NOT NULL, last_used REAL NOT NULL, PRIMARY KEY (backend, query))"
+        )
+
+    def _component_rates(self, rows, rate):
+        """Rendement lissé de chaque mot-clé, modificateur et ville, relatif au rendement global"""
+        totals = ({}, {}, {})
+        for keyword, modifier, city, requests, new_items in rows:
+            for table, value in zip(totals, (keyword, modifier, city)):
+                previous = table.get(value, (0.0, 0.0))
+                table[value] = (previous[0] + requests, previous[1] + new_items)
+        return [
+            {value: (new + PRIOR_STRENGTH * rate) / (requests + PRIOR_STRENGTH) / rate
+             for value, (requests, new) in table.items()}
+            for table in totals
+        ]
+
+    def plan(self, count, backend='web'):
+        """Les `count` requêtes de plus fort indice UCB (au plus MAX_PER_KEYWORD par mot-clé)"""
+        rows = self.db.execute("SELECT query, keyword, modifier, city, requests, new_items FROM arms"
+                               " WHERE backend = ?", (backend,)).fetchall()
+        arms = {query: (requests, new_items) for query, _, _, _, requests, new_items in rows}
+        total_requests = sum(requests for requests, _ in arms.values())
+        total_new = sum(new_items for _, new_items in arms.values())
+        # Rendement global, avec un a priori d'un item nouveau par requête tant que rien n'est mesuré
+        rate = (total_new + PRIOR_STRENGTH) / (total_requests + PRIOR_STRENGTH)
+        keyword_rates, modifier_rates, city_rates = self._component_rates(
+            [(k, m, c, r, n) for _, k, m, c, r, n in rows], rate)
+        log_total = math.log(total_requests + 1)
+
+        candidates = []
+        for keyword in self.keywords:
+            keyword_lift = keyword_rates.get(keyword, 1.0) * (PRIORITY_BOOST if keyword in self.priority else 1.0)
+            for modifier in self.modifiers:
+                modifier_lift = modifier_rates.get(modifier or '', 1.0)
+                for city in self.cities:
+                    query = compose(keyword, modifier, city)
+                    prior = rate * keyword_lift * modifier_lift * city_rates.get(city or '', 1.0)
+                    requests, new_items = arms.get(query, (0.0, 0.0))
+                    mean = (new_items + PRIOR_STRENGTH * prior) / (requests + PRIOR_STRENGTH)
+                    # Bonus UCB à variance de Poisson (la variance du nombre d'items vaut sa moyenne)
+                    bonus = self.exploration * math.sqrt(max(mean, rate) * log_total / (requests + 1))
+                    candidates.append((mean + bonus, query, keyword, modifier, city, requests > 0 and mean >= bonus))
+        candidates.sort(reverse=True)
+
+        queries = []
+        per_keyword = {}
+        for _, query, keyword, modifier, city, exploit in candidates:
+            if len(queries) >= count:
+                break
+            if per_keyword.get(keyword, 0) >= MAX_PER_KEYWORD:
+                continue
+            per_keyword[keyword] = per_keyword.get(keyword, 0) + 1
+            queries.append(query)
+            with self.lock:
+                self.planned[(backend, query)] = (keyword, modifier or '', city or '')
+            # Exploitation : combinaison déjà essayée, retenue pour son rendement plus que pour son bonus
+            self.stats['exploit' if exploit else 'explore'] += 1
+        return queries
+
+    def arm(self, query, backend='web'):
+        """Composantes (mot-clé, modificateur, ville) d'une requête planifiée, None si inconnue"""
+        return self.planned.get((backend, query))
+
+    def assign(self, query, backend, arm):
+        """Rattache à ses composantes une requête planifiée par un autre processus (worker.py)"""
+        with self.lock:
+            self.planned[(backend, query)] = tuple(arm)
+
+    def requested(self, query, backend='web'):
+        """Une requête réseau envoyée (les réponses servies par le cache ne comptent pas)"""
+        with self.lock:
+            self.pending.setdefault((backend, query), [0, 0])[0] += 1
+            self.stats['requests'] += 1
+
+    def credit(self, item, min_score=RELEVANT_SCORE):
+        """Attribue un item à sa requête (`_query`) s'il est nouveau et pertinent ; retourne True si compté"""
+        query = item.get('_query')
+        if not query or not item.get('_new_story', True):
+            return False
+        if item.get('relevance_score', min_score) < min_score:
+            return False
+        backend = 'youtube' if item.get('_collector') == 'youtube' else 'web'
+        with self.lock:
+            self.pending.setdefault((backend, query), [0, 0])[1] += 1
+            self.stats['new_items'] += 1
+        return True
+
+    def save(self):
+        """Amortit les statistiques persistées puis y ajoute les mesures de l'exécution"""
+        now = time.time()
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            rows = []
+            for (backend, query), (requests, new_items) in pending.items():
+                keyword, modifier, city = self.planned.get((backend, query), (query, '', ''))
+                rows.append((backend, query, keyword, modifier, city, requests, new_items, now))
+        metrics.set_gauge('lynx_query_yield', self.yield_rate())
+        self.decay({row[0] for row in rows})
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO arms (backend, query, keyword, modifier, city, requests, new_items, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(backend, query) DO UPDATE SET"
+                " requests = requests + excluded.requests, new_items = new_items + excluded.new_items,"
+                " last_used = excluded.last_used",
+                rows
+            )
+
+    def decay(self, backends):
+        """Amortit les statistiques persistées des moteurs donnés (une fois par exécution)"""
+        with self.db:
+            self.db.executemany("UPDATE arms SET requests = requests * ?, new_items = new_items * ? WHERE backend = ?",
+                                [(self.discount, self.discount, backend) for backend in backends])
+
+    def yield_rate(self):
+        return self.stats['new_items'] / self.stats['requests'] if self.stats['requests'] else 0.0
+
+    def report(self):
+        """Ligne de bilan : rendement de l'exécution (items nouveaux et pertinents par requête réseau)"""
+        return (f"🎰 Planificateur: {self.stats['requests']} requête(s) réseau, {self.stats['new_items']} "
+                f"item(s) nouveau(x) et pertinent(s), rendement {self.yield_rate():.2f}/requête "
+                f"({self.stats['exploit']} exploitée(s), {self.stats['explore']} explorée(s))")
+
+    def close(self):
+        self.db.close()
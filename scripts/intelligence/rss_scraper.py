@@ -2,110 +2,534 @@
 RSS Feed Scraper for Lynx Eye
 Scrape directement les flux RSS des médias gabonais
 Plus rapide et plus fiable que DuckDuckGo pour les sources connues
+Les sites sans flux RSS sont collectés dans la même exécution par html_crawler.py
+
+Chaque flux a un watermark (feed_state.py) : le traitement s'arrête à la première
+entrée déjà vue. Si toute la première page est nouvelle (panne, publication
+intense), les pages suivantes (?paged=N de WordPress) sont parcourues en parallèle
+jusqu'au watermark (rattrapage, repris à l'exécution suivante s'il est interrompu).
 """
 
 import os
 import sys
+import time
+import argparse
 import feedparser
 from datetime import datetime
-from dotenv import load_dotenv
-from supabase import create_client
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 
 try:
-    from sources import get_all_rss_feeds, PRESS_URLS, get_all_hashtags_flat
-    from keywords import PRIORITY_KEYWORDS
+    from sources import get_rss_sources
+    from fetcher import iter_fetch, get_timeout, DEFAULT_MAX_WORKERS, DEFAULT_TIMEOUT, DEFAULT_DEADLINE
+    from feed_state import FeedStateStore, content_hash, unseen_entries, entry_guid
+    from matcher import get_matcher
+    from supabase_sink import DEFAULT_BATCH_SIZE
+    from seen_index import SeenIndex
+    from dedup import StoryClusterer
+    from spool import Spool, SpoolFlusher
+    from pipeline import Pipeline, SpoolSink, SupabaseSink, PrintSink, dedup_stage, scoring_stage, trend_stage, archive_stage
+    from scoring import RelevanceScorer
+    from clients import get_supabase
+    from state import state_path
+    from html_crawler import iter_html_items, CrawlState, DEFAULT_MAX_LINKS
+    from health import HealthStore, DEFAULT_FILENAME as HEALTH_FILENAME
+    from trends import TrendDetector, DEFAULT_FILENAME as TRENDS_FILENAME
+    import metrics
 except ImportError:
-    print("⚠️  Modules sources.py ou keywords.py non trouvés")
+    print("⚠️  Modules du dossier scripts/intelligence non trouvés (sources.py, keywords.py, matcher.py...)")
     sys.exit(1)
 
-load_dotenv()
+def parse_feed(feed_url, source_name, content=None):
+    """
+    Parse un flux RSS (None en cas d'erreur)
+    Si content (octets déjà téléchargés) est fourni, feedparser ne fait aucun accès réseau
+    """
+    try:
+        return feedparser.parse(content if content is not None else feed_url)
+    except Exception as e:
+        print(f"  ✗ Erreur RSS pour {source_name}: {e}")
+        return None
 
-# Configuration Supabase
-SUPABASE_URL = os.getenv('SUPABASE_URL')
-SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+# Entrées traitées d'un flux sans watermark (première exécution, sans cache)
+FIRST_RUN_ENTRIES = 10
+# Rattrapage : pages parcourues au plus par flux, et téléchargées ensemble par vague
+DEFAULT_BACKFILL_PAGES = 10
+BACKFILL_PAGES_PER_WAVE = 3
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("❌ Erreur: Variables SUPABASE requises dans .env")
-    sys.exit(1)
+def items_from_feed(feed, source_name, entries=None):
+    """Items d'un flux parsé contenant au moins un mot-clé prioritaire (entries : entrées à examiner)"""
+    results = []
+    matcher = get_matcher()
+    
+    for entry in (feed.entries[:FIRST_RUN_ENTRIES] if entries is None else entries):
+        # Filtrer par mots-clés prioritaires
+        text = f"{entry.get('title', '')} {entry.get('summary', '')}"
+        
+        # Vérifier si au moins un mot-clé prioritaire est présent
+        if matcher.has_priority(text):
+            results.append({
+                'content': f"{entry.get('title', '')} - {entry.get('summary', '')}",
+                'author': source_name,
+                'external_id': entry.get('link', entry.get('id', '')),
+                'published_at': entry.get('published', datetime.now().isoformat())
+            })
+    
+    return results
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+def is_feed(feed):
+    """Faux pour une page HTML ou un contenu illisible servi à la place du flux"""
+    return bool(feed.entries) or not feed.get('bozo')
 
-def scrape_rss_feed(feed_url, source_name):
+def scrape_rss_feed(feed_url, source_name, content=None):
     """Scrape un flux RSS spécifique"""
-    results = []
+    feed = parse_feed(feed_url, source_name, content)
+    return items_from_feed(feed, source_name) if feed is not None else []
+
+def page_url(feed_url, page):
+    """URL de la page `page` d'un flux WordPress (?paged=N)"""
+    parts = urlsplit(feed_url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != 'paged']
+    return urlunsplit(parts._replace(query=urlencode(query + [('paged', page)])))
+
+def new_entries(feed_state, feed_url, feed, backfill=False):
+    """
+    Entrées d'un flux à traiter, arrêtées au watermark, qui est ensuite avancé.
+    Si le watermark n'est pas atteint sur cette page, un rattrapage est planifié
+    (sans watermark : seulement si backfill, la première exécution reste limitée)
+    """
+    watermark = feed_state.watermark(feed_url)
+    if watermark is None and not backfill:
+        entries = feed.entries[:FIRST_RUN_ENTRIES]
+    else:
+        entries, reached = unseen_entries(feed.entries, watermark)
+        if not reached and feed.entries and feed_url not in feed_state.pending_backfill():
+            feed_state.set_backfill(feed_url, watermark or {})
+    feed_state.advance_watermark(feed_url, feed.entries if watermark is None else entries)
+    return entries
+
+def iter_backfill(feed_state, by_url, max_pages=DEFAULT_BACKFILL_PAGES, max_workers=DEFAULT_MAX_WORKERS,
+                  timeout=DEFAULT_TIMEOUT, deadline=DEFAULT_DEADLINE):
+    """
+    Rattrapage des flux en retard : pages 2, 3... téléchargées par vagues (tous les flux
+    en parallèle) jusqu'à la première entrée antérieure au watermark d'avant la panne
+    """
+    pending = {url: watermark for url, watermark in feed_state.pending_backfill().items() if url in by_url}
+    if not pending:
+        return
+    print(f"\n   ⏪ Rattrapage de {len(pending)} flux (jusqu'à {max_pages} pages, ?paged=N)...")
+    next_page = {url: 2 for url in pending}
+    seen = {url: set((feed_state.watermark(url) or {}).get('guids', ())) for url in pending}
+    counts = {url: 0 for url in pending}
+    last_page = {url: 1 for url in pending}
     
-    try:
-        feed = feedparser.parse(feed_url)
+    while next_page:
+        wave = {}
+        for url, first in next_page.items():
+            for page in range(first, min(first + BACKFILL_PAGES_PER_WAVE, max_pages + 1)):
+                wave[page_url(url, page)] = (url, page)
+        fetched = {fetch['url']: fetch for fetch in iter_fetch(list(wave), max_workers=max_workers,
+                                                                timeout=timeout, deadline=deadline)}
         
-        for entry in feed.entries[:10]:  # Limiter aux 10 derniers articles
-            # Filtrer par mots-clés prioritaires
-            content = f"{entry.get('title', '')} {entry.get('summary', '')}".lower()
+        for url in list(next_page):
+            category, source_name = by_url[url]
+            status = None
+            page = next_page[url]
+            while page < next_page[url] + BACKFILL_PAGES_PER_WAVE and status is None:
+                if page > max_pages:
+                    status = f"limite de {max_pages} pages atteinte"
+                    break
+                fetch = fetched[page_url(url, page)]
+                last_page[url] = page
+                metrics.observe('lynx_fetch_seconds', fetch['elapsed'], source=source_name)
+                metrics.inc('lynx_backfill_pages_total', source=source_name)
+                if fetch['error']:
+                    # Page au-delà de la dernière : fin normale ; autre erreur : reprise plus tard
+                    status = "fin du flux" if fetch['status'] in (404, 410) else f"interrompu ({fetch['error']})"
+                    break
+                with metrics.timer('lynx_parse_seconds', source=source_name):
+                    feed = parse_feed(url, source_name, content=fetch['content'])
+                if feed is None or not feed.entries:
+                    status = "fin du flux"
+                    break
+                guids = [entry_guid(entry) for entry in feed.entries]
+                entries, reached = unseen_entries(feed.entries, pending[url])
+                if not entries and reached:
+                    status = "watermark atteint"
+                    break
+                if all(guid in seen[url] for guid in guids):
+                    # Le site ignore ?paged=N et renvoie toujours la première page
+                    status = "pagination non prise en charge"
+                    break
+                seen[url].update(guids)
+                results = items_from_feed(feed, f"{source_name} ({category})", entries)
+                metrics.inc('lynx_filter_entries_total', len(entries), collector='rss', source=source_name)
+                metrics.inc('lynx_filter_matches_total', len(results), collector='rss', source=source_name)
+                counts[url] += len(entries)
+                yield from results
+                if reached:
+                    status = "watermark atteint"
+                page += 1
             
-            # Vérifier si au moins un mot-clé prioritaire est présent
-            if any(kw.lower() in content for kw in PRIORITY_KEYWORDS):
-                results.append({
-                    'content': f"{entry.get('title', '')} - {entry.get('summary', '')}",
-                    'author': source_name,
-                    'external_id': entry.get('link', entry.get('id', '')),
-                    'published_at': entry.get('published', datetime.now().isoformat())
-                })
-        
-        return results
-        
-    except Exception as e:
-        print(f"  ✗ Erreur RSS pour {source_name}: {e}")
-        return []
+            if status is None:
+                next_page[url] = page
+                continue
+            del next_page[url]
+            if not status.startswith("interrompu"):
+                feed_state.set_backfill(url, None)
+            print(f"    ⏪ [{category.upper()}] {source_name}: {counts[url]} entrée(s) rattrapée(s) "
+                  f"(pages 2-{last_page[url]}), {status}")
 
-def scrape_all_rss_feeds():
-    """Scrape tous les flux RSS configurés"""
-    all_results = []
+def iter_rss_items(concurrent=True, max_workers=DEFAULT_MAX_WORKERS,
+                   timeout=DEFAULT_TIMEOUT, deadline=DEFAULT_DEADLINE, feed_state=None,
+                   rss_sources=None, on_feed=None, backfill=False, backfill_pages=DEFAULT_BACKFILL_PAGES,
+                   health=None, persist=True):
+    """
+    Source RSS du pipeline : génère les items de chaque flux dès qu'il est téléchargé et parsé
+    En mode concurrent, les flux sont téléchargés en parallèle et parsés dans l'ordre d'arrivée.
+    Avec un feed_state (FeedStateStore), les requêtes sont conditionnelles, les flux
+    inchangés (304 ou contenu identique) ne sont pas reparsés, seules les entrées plus
+    récentes que le watermark sont traitées et les flux en retard sont rattrapés page par page.
+    rss_sources : sous-ensemble de get_rss_sources() à interroger (tous par défaut)
+    on_feed(url, feed, error) est appelé pour chaque flux (feed None si inchangé ou en erreur)
+    backfill : rattraper aussi les flux sans watermark (jusqu'à backfill_pages pages)
+    health : HealthStore ; les flux dont le disjoncteur est ouvert ne sont pas interrogés et
+    le timeout de lecture des flux rapides est calé sur leur latence
+    persist : enregistrer feed_state en fin de collecte ; False si l'appelant l'enregistre
+    lui-même (worker.py : save(urls=...) limité à ses flux, sans écraser les autres workers)
+    """
+    rss_sources = rss_sources if rss_sources is not None else get_rss_sources()
+    by_url = {url: (category, name) for category, name, url in rss_sources}
     
     print("📰 Scraping des flux RSS...")
     
-    for category, sources in PRESS_URLS.items():
-        print(f"\n  [{category.upper()}]")
-        
-        for source_name, feed_url in sources.items():
-            if '/feed/' in feed_url or '/rss' in feed_url:
-                results = scrape_rss_feed(feed_url, f"{source_name} ({category})")
-                all_results.extend(results)
-                print(f"    ✓ {source_name}: {len(results)} articles")
+    to_poll = list(by_url)
+    if health is not None:
+        to_poll = [url for url in by_url if health.allow('feed', url)]
+        for url in by_url:
+            if url not in to_poll:
+                category, source_name = by_url[url]
+                print(f"    ⏸  [{category.upper()}] {source_name}: disjoncteur ouvert, {health.describe('feed', url)}")
+                if on_feed:
+                    on_feed(url, None, "disjoncteur ouvert")
     
-    return all_results
-
-def save_to_supabase(items):
-    """Save items to Supabase intelligence_items table"""
-    saved_count = 0
+    started = time.monotonic()
+    timings = []
+    cache_stats = {'not_modified': 0, 'unchanged': 0, 'miss': 0}
+    
+    if concurrent:
+        print(f"   Mode parallèle: {max_workers} workers, timeout {timeout[0]}s/{timeout[1]}s, deadline {deadline}s")
+        timeout_for = None
+        if health is not None:
+            timeout_for = lambda url: health.read_timeout('feed', url, get_timeout(url, timeout))
+        fetches = iter_fetch(to_poll, max_workers=max_workers, timeout=timeout, deadline=deadline,
+                             headers_for=feed_state.conditional_headers if feed_state else None,
+                             timeout_for=timeout_for)
+    else:
+        fetches = ({'url': url} for url in to_poll)
     
-    for item in items:
-        try:
-            supabase.table('intelligence_items').upsert(item, on_conflict='external_id').execute()
-            saved_count += 1
-        except Exception as e:
-            print(f"  ✗ Erreur sauvegarde: {e}")
+    for fetch in fetches:
+        feed_url = fetch['url']
+        category, source_name = by_url[feed_url]
+        label = f"[{category.upper()}] {source_name}"
+        
+        if concurrent:
+            metrics.observe('lynx_fetch_seconds', fetch['elapsed'], source=source_name)
+            if fetch['error']:
+                metrics.inc('lynx_fetch_total', source=source_name, status='error')
+                print(f"    ✗ {label}: {fetch['error']} ({fetch['elapsed']:.2f}s)")
+                if health is not None and health.failure('feed', feed_url, fetch['error'], fetch['elapsed'],
+                                                         label=source_name):
+                    print(f"    🔌 {label}: disjoncteur ouvert, {health.describe('feed', feed_url)}")
+                timings.append((source_name, fetch['elapsed']))
+                if on_feed:
+                    on_feed(feed_url, None, fetch['error'])
+                continue
+            elapsed = fetch['elapsed']
+            
+            if feed_state is not None:
+                if fetch['status'] == 304:
+                    cache_stats['not_modified'] += 1
+                    metrics.inc('lynx_fetch_total', source=source_name, status='not_modified')
+                    if health is not None:
+                        health.success('feed', feed_url, elapsed, label=source_name)
+                    feed_state.update_validators(feed_url, fetch['etag'], fetch['last_modified'])
+                    timings.append((source_name, elapsed))
+                    print(f"    ↺ {label}: non modifié (304, cache hit) ({elapsed:.2f}s)")
+                    if on_feed:
+                        on_feed(feed_url, None, None)
+                    continue
+                
+                digest = content_hash(fetch['content'])
+                if feed_state.is_unchanged(feed_url, digest):
+                    cache_stats['unchanged'] += 1
+                    metrics.inc('lynx_fetch_total', source=source_name, status='unchanged')
+                    if health is not None:
+                        health.success('feed', feed_url, elapsed, label=source_name)
+                    feed_state.update_validators(feed_url, fetch['etag'], fetch['last_modified'])
+                    timings.append((source_name, elapsed))
+                    print(f"    ↺ {label}: contenu identique (cache hit) ({elapsed:.2f}s)")
+                    if on_feed:
+                        on_feed(feed_url, None, None)
+                    continue
+                cache_stats['miss'] += 1
+            metrics.inc('lynx_fetch_total', source=source_name, status='ok')
+            
+            with metrics.timer('lynx_parse_seconds', source=source_name):
+                feed = parse_feed(feed_url, source_name, content=fetch['content'])
+            
+            # Un contenu non RSS n'est pas mis en cache : il resterait sinon "inchangé" et sain
+            if feed_state is not None and feed is not None and is_feed(feed):
+                feed_state.update_validators(feed_url, fetch['etag'], fetch['last_modified'])
+                feed_state.update_content(feed_url, digest)
+        else:
+            feed_started = time.monotonic()
+            with metrics.timer('lynx_parse_seconds', source=source_name):
+                feed = parse_feed(feed_url, source_name)
+            elapsed = time.monotonic() - feed_started
+        
+        if feed is not None and not is_feed(feed):
+            # Page HTML (erreur, redirection vers l'accueil...) servie à la place du flux
+            print(f"    ✗ {label}: contenu non RSS ({elapsed:.2f}s)")
+            feed = None
+            if health is not None and health.failure('feed', feed_url, "contenu non RSS", elapsed, label=source_name):
+                print(f"    🔌 {label}: disjoncteur ouvert, {health.describe('feed', feed_url)}")
+        elif health is not None:
+            if feed is None:
+                health.failure('feed', feed_url, "flux illisible", elapsed, label=source_name)
+            else:
+                health.success('feed', feed_url, elapsed, label=source_name)
+        
+        entries = None
+        if feed is not None and feed_state is not None:
+            entries = new_entries(feed_state, feed_url, feed, backfill=backfill)
+        results = items_from_feed(feed, f"{source_name} ({category})", entries) if feed is not None else []
+        if feed is not None:
+            examined = len(feed.entries[:FIRST_RUN_ENTRIES] if entries is None else entries)
+            metrics.inc('lynx_filter_entries_total', examined, collector='rss', source=source_name)
+            metrics.inc('lynx_filter_matches_total', len(results), collector='rss', source=source_name)
+        if on_feed:
+            on_feed(feed_url, feed, None if feed is not None else "flux illisible")
+        timings.append((source_name, elapsed))
+        if feed is not None:
+            print(f"    ✓ {label}: {len(results)} articles ({elapsed:.2f}s)")
+        yield from results
+    
+    if timings:
+        slowest_name, slowest = max(timings, key=lambda t: t[1])
+        total = sum(t[1] for t in timings)
+        print(f"\n   ⏱  Durée totale: {time.monotonic() - started:.2f}s "
+              f"(cumul des flux: {total:.2f}s, plus lent: {slowest_name} {slowest:.2f}s)")
     
-    return saved_count
+    if feed_state is not None and concurrent:
+        yield from iter_backfill(feed_state, by_url, max_pages=backfill_pages, max_workers=max_workers,
+                                 timeout=timeout, deadline=deadline)
+        hits = cache_stats['not_modified'] + cache_stats['unchanged']
+        print(f"   💾 Cache flux: {hits} hits (304: {cache_stats['not_modified']}, "
+              f"inchangés: {cache_stats['unchanged']}), {cache_stats['miss']} miss")
+        if persist:
+            feed_state.save()
+
+def scrape_all_rss_feeds(concurrent=True, max_workers=DEFAULT_MAX_WORKERS,
+                         timeout=DEFAULT_TIMEOUT, deadline=DEFAULT_DEADLINE, feed_state=None):
+    """Scrape tous les flux RSS configurés et retourne la liste complète des items"""
+    return list(iter_rss_items(concurrent=concurrent, max_workers=max_workers, timeout=timeout,
+                               deadline=deadline, feed_state=feed_state))
+
+DEFAULT_FLUSH_TIMEOUT = 120
+METRICS_FILENAME = 'metrics_rss.prom'
+
+def start_flusher(batch_size=DEFAULT_BATCH_SIZE, seen_index=True):
+    """Démarre le vidage du spool en arrière-plan (y compris les items laissés par une exécution précédente)"""
+    # Client Supabase créé dans le thread de vidage : la collecte démarre sans l'attendre
+    flusher = SpoolFlusher(client_factory=get_supabase, batch_size=batch_size,
+                           seen_index_factory=SeenIndex if seen_index else None)
+    flusher.start()
+    return flusher
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Lynx Eye - RSS Feed Scraper")
+    parser.add_argument('--sequential', action='store_true',
+                        help="Télécharger les flux un par un (ancien comportement)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS,
+                        help="Nombre de flux téléchargés simultanément")
+    parser.add_argument('--connect-timeout', type=float, default=DEFAULT_TIMEOUT[0],
+                        help="Timeout de connexion par requête (secondes)")
+    parser.add_argument('--read-timeout', type=float, default=DEFAULT_TIMEOUT[1],
+                        help="Timeout de lecture par requête (secondes)")
+    parser.add_argument('--deadline', type=float, default=DEFAULT_DEADLINE,
+                        help="Durée maximale de l'ensemble des téléchargements (secondes)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignorer le cache ETag/Last-Modified et reparser tous les flux")
+    parser.add_argument('--backfill', action='store_true',
+                        help="Rattraper aussi les flux sans watermark en parcourant leurs pages (?paged=N)")
+    parser.add_argument('--backfill-pages', type=int, default=DEFAULT_BACKFILL_PAGES,
+                        help="Pages parcourues au plus par flux lors d'un rattrapage")
+    parser.add_argument('--no-health', action='store_true',
+                        help="Ignorer les disjoncteurs et interroger toutes les sources (health.py)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Nombre d'items par requête d'upsert Supabase")
+    parser.add_argument('--no-seen-index', action='store_true',
+                        help="Renvoyer tous les items, même ceux déjà enregistrés")
+    parser.add_argument('--no-dedup', action='store_true',
+                        help="Ne pas regrouper les reprises d'une même histoire entre médias")
+    parser.add_argument('--no-spool', action='store_true',
+                        help="Enregistrer directement dans Supabase, sans file locale")
+    parser.add_argument('--flush-timeout', type=float, default=DEFAULT_FLUSH_TIMEOUT,
+                        help="Durée maximale de vidage du spool en fin d'exécution (secondes)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Collecter et afficher les items sans rien enregistrer (ni Supabase, ni état local)")
+    parser.add_argument('--no-html', action='store_true',
+                        help="Ne pas crawler les sites sans flux RSS (html_crawler.py)")
+    parser.add_argument('--max-links', type=int, default=DEFAULT_MAX_LINKS,
+                        help="Articles HTML téléchargés au maximum par site et par exécution")
+    parser.add_argument('--min-score', type=float, default=0.0,
+                        help="Score de pertinence minimal (0-100) pour enregistrer un item")
+    parser.add_argument('--top-k', type=int, default=None,
+                        help="Ne garder que les k items les mieux notés de chaque lot du pipeline "
+                             "(jusqu'à 100 items ou 2s de collecte), pas de toute l'exécution")
+    parser.add_argument('--no-scoring', action='store_true',
+                        help="Ne pas calculer de score de pertinence (colonne relevance_score)")
+    parser.add_argument('--no-trends', action='store_true',
+                        help="Ne pas surveiller les pics de mots-clés (trends.py)")
+    parser.add_argument('--no-archive', action='store_true',
+                        help="Ne pas ajouter les items à l'archive locale (archive.py, Parquet)")
+    parser.add_argument('--metrics-file', default=None,
+                        help=f"Fichier de métriques Prometheus (défaut: .state/{METRICS_FILENAME})")
+    parser.add_argument('--profile', action='store_true',
+                        help="Profiler l'exécution (CPU et mémoire par module)")
+    parser.add_argument('--profile-output', default=None,
+                        help="Fichier pstats du profil (avec --profile)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    started = time.time()
+    metrics.REGISTRY.reset()
+    profiler = metrics.Profiler().start() if args.profile else None
+    if args.dry_run:
+        # Aucun état modifié : pas de cache de flux, pas d'index des histoires, pas de spool
+        args.no_cache = args.no_dedup = args.no_spool = args.no_archive = True
+    
     print("=" * 70)
     print("🦅 LYNX EYE - RSS FEED SCRAPER (Sources Officielles)")
     print("=" * 70)
     print(f"⏰ Exécution: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print()
     
-    # Scraping RSS
-    rss_results = scrape_all_rss_feeds()
-    print(f"\n✓ RSS: {len(rss_results)} items collectés")
-    print()
+    flusher = None if args.no_spool else start_flusher(args.batch_size, seen_index=not args.no_seen_index)
     
-    # Sauvegarde
-    if rss_results:
-        print(f"💾 Enregistrement dans Supabase...")
-        saved = save_to_supabase(rss_results)
-        print(f"✅ {saved}/{len(rss_results)} items sauvegardés avec succès")
+    # Pipeline : flux RSS → filtre → regroupement des reprises → spool (ou Supabase)
+    feed_state = None if args.no_cache else FeedStateStore()
+    # Sans cache, le crawl HTML repart d'un état vide (en mémoire)
+    crawl_state = None if args.no_html else CrawlState(':memory:' if args.no_cache else None)
+    clusterer = None if args.no_dedup else StoryClusterer()
+    # En dry-run, l'état de santé existant est consulté mais pas modifié
+    health = None
+    if not args.no_health:
+        health_path = state_path(HEALTH_FILENAME)
+        health = HealthStore(':memory:' if args.dry_run and not os.path.exists(health_path) else health_path)
+    spool = None
+    if flusher is not None:
+        spool = Spool()
+        sink = SpoolSink(spool, flusher)
+    elif args.dry_run:
+        sink = PrintSink()
+    else:
+        sink = SupabaseSink(get_supabase(), batch_size=args.batch_size,
+                            seen_index=None if args.no_seen_index else SeenIndex())
+    
+    sources = {
+        'rss': lambda: iter_rss_items(
+            concurrent=not args.sequential,
+            max_workers=args.workers,
+            timeout=(args.connect_timeout, args.read_timeout),
+            deadline=args.deadline,
+            feed_state=feed_state,
+            backfill=args.backfill,
+            backfill_pages=args.backfill_pages,
+            health=health
+        ),
+    }
+    if crawl_state is not None:
+        sources['html'] = lambda: iter_html_items(
+            crawl_state,
+            max_workers=args.workers,
+            timeout=(args.connect_timeout, args.read_timeout),
+            deadline=args.deadline,
+            max_links=args.max_links,
+            health=health
+        )
+    
+    scorer = None if args.no_scoring else RelevanceScorer()
+    stages = [dedup_stage(clusterer)] if clusterer else []
+    if scorer is not None:
+        stages.append(scoring_stage(scorer, min_score=args.min_score, top_k=args.top_k))
+    # En dry-run, l'historique des tendances est consulté mais ni modifié ni alimenté en alertes
+    trends = None
+    if not args.no_trends:
+        trends_path = state_path(TRENDS_FILENAME)
+        trends = TrendDetector(':memory:' if args.dry_run and not os.path.exists(trends_path) else trends_path,
+                               record=not args.dry_run)
+        if trends.enabled:
+            stages.append(trend_stage(trends))
+    archive = None
+    if not args.no_archive:
+        from archive import ArchiveWriter   # pyarrow : chargé seulement si l'archive est utilisée
+        archive = ArchiveWriter()
+    if archive is not None and archive.enabled:
+        stages.append(archive_stage(archive))
+    pipeline = Pipeline(sink, stages=stages)
+    try:
+        pipeline.run(sources)
+        if health is not None and not args.dry_run:
+            health.save()
+        if trends is not None:
+            trends.save()
+    finally:
+        if health is not None:
+            health.close()
+        if crawl_state is not None:
+            crawl_state.close()
+        if clusterer is not None:
+            clusterer.close()
+        if spool is not None:
+            spool.close()
+        if archive is not None:
+            archive.close()
+    
+    print(f"\n✓ RSS: {pipeline.stats['sources']['rss']['items']} items collectés")
+    if 'html' in pipeline.stats['sources']:
+        print(f"✓ Sites HTML: {pipeline.stats['sources']['html']['items']} items collectés")
+    print()
+    print(pipeline.report())
+    if clusterer is not None:
+        print(f"📚 Histoires: {clusterer.stats['items']} items, {clusterer.stats['new_stories']} nouvelle(s), "
+              f"{clusterer.stats['merged']} reprise(s) regroupée(s)")
+    if scorer is not None:
+        print(scorer.report())
+    if health is not None:
+        print(health.report())
+    if trends is not None:
+        print(trends.report())
+    if archive is not None:
+        print(archive.report())
+    if pipeline.stats['sunk']:
+        print(sink.report())
     else:
         print("⚠️  Aucun résultat à sauvegarder")
     
+    if flusher is not None:
+        print(f"⏳ Vidage du spool (max {args.flush_timeout:.0f}s)...")
+        flusher.stop(timeout=args.flush_timeout)
+        print(flusher.report())
+    
+    metrics.record_run('rss', started)
+    print(metrics.stage_report())
+    if not args.dry_run:
+        metrics.write_textfile(args.metrics_file or state_path(METRICS_FILENAME))
+    if profiler is not None:
+        print(profiler.stop(args.profile_output))
+    
     print()
     print("=" * 70)
     print("✅ SCRAPING RSS TERMINÉ")
@@ -0,0 +1,155 @@
+"""
+Search Executor for Lynx Eye
+Exécution concurrente des requêtes de recherche (DuckDuckGo, YouTube) avec une
+session réutilisée, un limiteur de débit à jetons et un backoff sur rate limiting.
+Les résultats sont restitués au fil de l'eau, dans l'ordre d'arrivée.
+Avec un HealthStore, chaque tentative alimente le disjoncteur du moteur : une fois
+ouvert, les requêtes restantes échouent immédiatement au lieu d'enchaîner les backoffs.
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import metrics
+from health import CircuitOpenError, BACKEND_FAILURE_THRESHOLD
+
+DEFAULT_MAX_WORKERS = 6
+DEFAULT_RATE = 2.0        # requêtes par seconde en régime établi
+DEFAULT_BURST = 4         # requêtes autorisées d'affilée
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 5.0     # secondes, doublé à chaque rate limiting consécutif
+MAX_BACKOFF = 120.0
+
+
+class TokenBucket:
+    """Limiteur de débit partagé entre threads, avec pause globale en cas de throttling"""
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Bloque jusqu'à obtention d'un jeton"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now >= self.paused_until:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    wait = self.paused_until - now
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Suspend toutes les requêtes (réponse de rate limiting du moteur)"""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self.updated = self.paused_until
+
+
+def is_rate_limited(error):
+    """RatelimitException de duckduckgo_search, ou HTTP 429 d'un autre backend"""
+    return 'ratelimit' in type(error).__name__.lower() or '429' in str(error)
+
+
+class SearchExecutor:
+    """
+    search(session, query, max_results) -> liste de résultats
+    session_factory() -> session partagée par tous les threads (recréée après une erreur,
+    car un client DDGS refuse toute requête après une exception)
+    backend : nom du moteur dans les métriques et dans health
+    health : HealthStore (disjoncteur du moteur), facultatif
+    """
+
+    def __init__(self, search, session_factory=None, max_workers=DEFAULT_MAX_WORKERS,
+                 rate=DEFAULT_RATE, burst=DEFAULT_BURST, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff=DEFAULT_BACKOFF, backend='search', health=None):
+        self.search_fn = search
+        self.backend = backend
+        self.health = health
+        self.session_factory = session_factory
+        self.max_workers = max_workers
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.session = None
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.consecutive_limits = 0
+        self.stats = {'requests': 0, 'rate_limited': 0, 'errors': 0}
+
+    def get_session(self):
+        with self.lock:
+            if self.session is None and self.session_factory is not None:
+                self.session = self.session_factory()
+                self.generation += 1
+            return self.session, self.generation
+
+    def reset_session(self, generation):
+        """Remplace la session défaillante (une seule fois par génération)"""
+        with self.lock:
+            if generation == self.generation:
+                self.session = None
+
+    def search(self, query, max_results):
+        """Une requête avec limiteur de débit, retries et backoff exponentiel"""
+        for attempt in range(self.max_retries + 1):
+            if self.health is not None and self.health.is_open('backend', self.backend):
+                raise CircuitOpenError(f"disjoncteur {self.backend} ouvert")
+            self.bucket.acquire()
+            with self.lock:
+                self.stats['requests'] += 1
+            generation = self.generation
+            started = time.perf_counter()
+            try:
+                session, generation = self.get_session()
+                results = self.search_fn(session, query, max_results)
+                metrics.observe('lynx_search_seconds', time.perf_counter() - started, backend=self.backend)
+                metrics.inc('lynx_search_total', backend=self.backend, status='ok')
+                if self.health is not None:
+                    self.health.success('backend', self.backend, time.perf_counter() - started)
+                with self.lock:
+                    self.consecutive_limits = 0
+                return results
+            except Exception as e:
+                elapsed = time.perf_counter() - started
+                metrics.observe('lynx_search_seconds', elapsed, backend=self.backend)
+                metrics.inc('lynx_search_total', backend=self.backend,
+                            status='rate_limited' if is_rate_limited(e) else 'error')
+                self.reset_session(generation)
+                if self.health is not None:
+                    self.health.failure('backend', self.backend, e, elapsed, threshold=BACKEND_FAILURE_THRESHOLD)
+                    if self.health.is_open('backend', self.backend):
+                        raise
+                if attempt == self.max_retries:
+                    raise
+                if is_rate_limited(e):
+                    with self.lock:
+                        self.stats['rate_limited'] += 1
+                        self.consecutive_limits += 1
+                        delay = min(MAX_BACKOFF, self.backoff * 2 ** (self.consecutive_limits - 1))
+                    self.bucket.pause(delay)
+                else:
+                    with self.lock:
+                        self.stats['errors'] += 1
+
+    def run(self, queries, max_results):
+        """Générateur (requête, résultats, erreur), dans l'ordre de complétion"""
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="search") as executor:
+            futures = {executor.submit(self.search, query, max_results): query for query in queries}
+            for future in as_completed(futures):
+                query = futures[future]
+                try:
+                    yield query, future.result(), None
+                except Exception as e:
+                    yield query, [], e
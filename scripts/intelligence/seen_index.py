@@ -0,0 +1,91 @@
+"""
+Seen Items Index for Lynx Eye
+Index local persistant des items déjà enregistrés dans intelligence_items
+
+Consulté avant l'upsert Supabase : un item déjà vu (même URL normalisée ou même
+external_id) avec le même contenu n'est pas renvoyé. Les entrées non revues
+depuis max_age_days sont évincées. Partagé par les chemins RSS, web et YouTube.
+"""
+
+import sqlite3
+import hashlib
+import time
+
+from state import state_path
+from urls import normalize_url
+
+DEFAULT_FILENAME = 'seen_index.sqlite3'
+DEFAULT_MAX_AGE_DAYS = 30
+
+
+def item_key(item):
+    """Clé d'index : URL normalisée, ou external_id brut (vidéos YouTube...)"""
+    return normalize_url(item.get('external_id') or '')
+
+
+def item_digest(item):
+    """Empreinte du contenu (et des sources regroupées) : un article modifié sera renvoyé"""
+    digest = hashlib.sha1((item.get('content') or '').encode('utf-8'))
+    for source in item.get('story_sources') or ():
+        digest.update(f"\n{source.get('external_id')}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class SeenIndex:
+    """Ensemble clé -> (empreinte, dernière observation) stocké en SQLite"""
+
+    def __init__(self, path=None, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        self.path = path or state_path(DEFAULT_FILENAME)
+        self.max_age = max_age_days * 86400
+        self.stats = {'checked': 0, 'skipped': 0, 'marked': 0, 'evicted': 0}
+        self.db = sqlite3.connect(self.path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            " key TEXT PRIMARY KEY, digest TEXT NOT NULL, seen_at REAL NOT NULL)"
+        )
+        self.evict()
+
+    def evict(self):
+        """Supprime les entrées plus anciennes que max_age"""
+        with self.db:
+            cursor = self.db.execute("DELETE FROM seen WHERE seen_at < ?", (time.time() - self.max_age,))
+        self.stats['evicted'] += cursor.rowcount
+
+    def filter_new(self, items):
+        """Retourne les items nouveaux ou modifiés ; les autres sont comptés comme évités"""
+        now = time.time()
+        fresh = []
+        touched = []
+        for item in items:
+            key = item_key(item)
+            self.stats['checked'] += 1
+            if not key:
+                fresh.append(item)
+                continue
+            row = self.db.execute("SELECT digest FROM seen WHERE key = ?", (key,)).fetchone()
+            if row and row[0] == item_digest(item):
+                self.stats['skipped'] += 1
+                touched.append((now, key))
+            else:
+                fresh.append(item)
+
+        # Un item toujours présent dans les flux reste dans l'index
+        if touched:
+            with self.db:
+                self.db.executemany("UPDATE seen SET seen_at = ? WHERE key = ?", touched)
+        return fresh
+
+    def mark(self, items):
+        """Enregistre des items comme vus (à appeler après un enregistrement réussi)"""
+        now = time.time()
+        rows = [(key, item_digest(item), now) for item in items if (key := item_key(item))]
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO seen (key, digest, seen_at) VALUES (?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET digest = excluded.digest, seen_at = excluded.seen_at",
+                rows
+            )
+        self.stats['marked'] += len(rows)
+
+    def close(self):
+        self.db.close()
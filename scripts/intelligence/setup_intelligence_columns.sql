@@ -0,0 +1,20 @@
+-- ============================================
+-- Colonnes complémentaires de intelligence_items
+-- ============================================
+-- Colonnes alimentées par les collecteurs Python (scripts/intelligence).
+-- À exécuter une fois dans le SQL Editor Supabase avant de déployer
+-- les versions des scrapers qui les renseignent.
+--
+
+-- Sources d'une même histoire reprise par plusieurs médias (dedup.py)
+-- Format: [{"author": "Gabon Review (national)", "external_id": "https://..."}, ...]
+ALTER TABLE public.intelligence_items
+    ADD COLUMN IF NOT EXISTS story_sources JSONB;
+
+-- Score de pertinence 0-100 calculé avant l'enregistrement (scoring.py)
+-- Mots-clés pondérés par catégorie, poids de la source, fraîcheur, reprises
+ALTER TABLE public.intelligence_items
+    ADD COLUMN IF NOT EXISTS relevance_score REAL;
+
+CREATE INDEX IF NOT EXISTS intelligence_items_relevance_score_idx
+    ON public.intelligence_items (relevance_score DESC);
@@ -127,14 +127,31 @@ MONITORING_CONFIG = {
     ]
 }
 
+def is_rss_url(url):
+    """Indique si une URL de presse pointe vers un flux RSS"""
+    return '/feed/' in url or '/rss' in url
+
+def get_rss_sources():
+    """Retourne les flux RSS sous forme de tuples (catégorie, nom, url)"""
+    return [
+        (category, name, url)
+        for category, sources in PRESS_URLS.items()
+        for name, url in sources.items()
+        if is_rss_url(url)
+    ]
+
+def get_html_sources():
+    """Sites sans flux RSS (collectés par html_crawler.py), tuples (catégorie, nom, url)"""
+    return [
+        (category, name, url)
+        for category, sources in PRESS_URLS.items()
+        for name, url in sources.items()
+        if not is_rss_url(url)
+    ]
+
 def get_all_rss_feeds():
     """Retourne toutes les URLs RSS pour scraping direct"""
-    feeds = []
-    for category, sources in PRESS_URLS.items():
-        for name, url in sources.items():
-            if '/feed/' in url or '/rss' in url:
-                feeds.append(url)
-    return feeds
+    return [url for _, _, url in get_rss_sources()]
 
 def get_all_hashtags_flat():
     """Retourne tous les hashtags sous forme de liste plate"""
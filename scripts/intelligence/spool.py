@@ -0,0 +1,268 @@
+"""
+Write-Ahead Spool for Lynx Eye
+File locale durable des items collectés, vidée vers Supabase en arrière-plan
+
+Les scrapers écrivent les items dans un spool SQLite (mode WAL) : l'écriture est
+locale et immédiate, quelle que soit la latence ou la disponibilité de Supabase.
+Un flusher (thread) draine le spool par gros lots via supabase_sink.save_items.
+Une ligne n'est supprimée qu'après un upsert réussi : après un crash, le flusher
+reprend là où il s'était arrêté (l'upsert sur external_id est idempotent).
+Les lignes rejetées par Supabase sont réessayées avec backoff, puis placées en dead
+letter ; une indisponibilité (réseau, 5xx, timeout) ne compte pas dans ces tentatives :
+les lignes attendent la fin de la panne (backoff plafonné) pour être rattrapées.
+"""
+
+import json
+import time
+import sqlite3
+import threading
+
+from state import state_path
+from supabase_sink import save_items, is_transient, DEFAULT_BATCH_SIZE
+
+DEFAULT_FILENAME = 'spool.sqlite3'
+DEFAULT_FLUSH_BATCH = 1000   # lignes lues par passe du flusher
+DEFAULT_INTERVAL = 2.0       # attente entre deux passes quand le spool est vide (secondes)
+DEFAULT_MAX_ATTEMPTS = 8
+DEFAULT_RETRY_BACKOFF = 30.0
+MAX_RETRY_BACKOFF = 3600.0
+MAX_OUTAGE_BACKOFF = 600.0   # pendant une panne : nouvel essai au moins toutes les 10 min
+MAX_FLUSH_BACKOFF = 300.0    # passe du flusher en échec (client, Supabase) : attente plafonnée
+
+
+def row_key(item):
+    """Identifie un item dans le rapport de save_items (external_id, sinon contenu complet)"""
+    return item.get('external_id') or json.dumps(item, sort_keys=True, ensure_ascii=False, default=str)
+
+
+class Spool:
+    """File SQLite append-only : spool (à envoyer) et dead_letter (abandonnés)"""
+
+    def __init__(self, path=None, max_attempts=DEFAULT_MAX_ATTEMPTS, retry_backoff=DEFAULT_RETRY_BACKOFF):
+        self.path = path or state_path(DEFAULT_FILENAME)
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        # Une connexion par thread : le flusher ouvre la sienne
+        self.db = sqlite3.connect(self.path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(
+            "CREATE TABLE IF NOT EXISTS spool ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, enqueued_at REAL NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL DEFAULT 0, last_error TEXT,"
+            " outages INTEGER NOT NULL DEFAULT 0);"
+            "CREATE INDEX IF NOT EXISTS spool_next_attempt ON spool (next_attempt_at, id);"
+            "CREATE TABLE IF NOT EXISTS dead_letter ("
+            " id INTEGER PRIMARY KEY, payload TEXT NOT NULL, enqueued_at REAL NOT NULL,"
+            " attempts INTEGER NOT NULL, last_error TEXT, failed_at REAL NOT NULL);"
+        )
+        # Spools créés avant le comptage séparé des pannes
+        if 'outages' not in {row[1] for row in self.db.execute("PRAGMA table_info(spool)")}:
+            with self.db:
+                self.db.execute("ALTER TABLE spool ADD COLUMN outages INTEGER NOT NULL DEFAULT 0")
+
+    def append(self, items):
+        """Ajoute des items (champs internes "_" exclus) ; retourne le nombre de lignes écrites"""
+        now = time.time()
+        rows = [
+            (json.dumps({k: v for k, v in item.items() if not k.startswith('_')},
+                        ensure_ascii=False, default=str), now)
+            for item in items
+        ]
+        with self.db:
+            self.db.executemany("INSERT INTO spool (payload, enqueued_at) VALUES (?, ?)", rows)
+        return len(rows)
+
+    def pending(self, limit=DEFAULT_FLUSH_BATCH):
+        """Lignes éligibles (hors backoff), dans l'ordre d'arrivée : [(id, item)]"""
+        rows = self.db.execute(
+            "SELECT id, payload FROM spool WHERE next_attempt_at <= ? ORDER BY id LIMIT ?",
+            (time.time(), limit)
+        ).fetchall()
+        return [(row_id, json.loads(payload)) for row_id, payload in rows]
+
+    def ack(self, ids):
+        """Supprime les lignes enregistrées dans Supabase"""
+        with self.db:
+            self.db.executemany("DELETE FROM spool WHERE id = ?", [(i,) for i in ids])
+
+    def retry(self, ids, error, transient=None):
+        """
+        Reporte les lignes en échec (backoff exponentiel) ; retourne le nombre mis en dead letter
+        Une erreur transitoire (panne de Supabase) ne consomme pas de tentative : backoff plafonné à
+        MAX_OUTAGE_BACKOFF, jamais de dead letter
+        """
+        if transient is None:
+            transient = is_transient(error)
+        now = time.time()
+        dead = 0
+        with self.db:
+            for row_id in ids:
+                row = self.db.execute(
+                    "SELECT payload, enqueued_at, attempts, outages FROM spool WHERE id = ?", (row_id,)
+                ).fetchone()
+                if row is None:
+                    continue
+                if transient:
+                    outages = row[3] + 1
+                    delay = min(MAX_OUTAGE_BACKOFF, self.retry_backoff * 2 ** min(outages - 1, 16))
+                    self.db.execute(
+                        "UPDATE spool SET outages = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                        (outages, now + delay, str(error), row_id)
+                    )
+                    continue
+                attempts = row[2] + 1
+                if attempts >= self.max_attempts:
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO dead_letter (id, payload, enqueued_at, attempts, last_error, failed_at)"
+                        " VALUES (?, ?, ?, ?, ?, ?)", (row_id, row[0], row[1], attempts, str(error), now)
+                    )
+                    self.db.execute("DELETE FROM spool WHERE id = ?", (row_id,))
+                    dead += 1
+                else:
+                    delay = min(MAX_RETRY_BACKOFF, self.retry_backoff * 2 ** (attempts - 1))
+                    self.db.execute(
+                        "UPDATE spool SET attempts = ?, outages = 0, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                        (attempts, now + delay, str(error), row_id)
+                    )
+        return dead
+
+    def requeue_dead(self):
+        """Remet les lignes de dead letter dans le spool (après correction) ; retourne leur nombre"""
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT INTO spool (payload, enqueued_at) SELECT payload, enqueued_at FROM dead_letter ORDER BY id"
+            )
+            self.db.execute("DELETE FROM dead_letter")
+        return cursor.rowcount
+
+    def counts(self):
+        """{'pending': lignes à envoyer, 'dead': lignes abandonnées}"""
+        return {
+            'pending': self.db.execute("SELECT COUNT(*) FROM spool").fetchone()[0],
+            'dead': self.db.execute("SELECT COUNT(*) FROM dead_letter").fetchone()[0],
+        }
+
+    def close(self):
+        self.db.close()
+
+
+class SpoolFlusher(threading.Thread):
+    """
+    Thread de vidage du spool vers Supabase.
+    stop(timeout) demande l'arrêt après vidage des lignes éligibles, dans la limite du délai :
+    ce qui reste est envoyé à la prochaine exécution.
+    client_factory (à la place de client) crée le client dans le thread de vidage, en parallèle
+    de la collecte, pour ne pas retarder le démarrage.
+    """
+
+    def __init__(self, client=None, path=None, flush_batch=DEFAULT_FLUSH_BATCH, batch_size=DEFAULT_BATCH_SIZE,
+                 interval=DEFAULT_INTERVAL, max_attempts=DEFAULT_MAX_ATTEMPTS, seen_index_factory=None,
+                 client_factory=None):
+        super().__init__(name="spool-flusher", daemon=True)
+        self.client = client
+        self.client_factory = client_factory
+        self.path = path
+        self.flush_batch = flush_batch
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.seen_index_factory = seen_index_factory
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.deadline = None
+        self.stats = {'saved': 0, 'skipped': 0, 'retried': 0, 'dead': 0, 'passes': 0, 'requests': 0, 'errors': 0}
+        self.remaining = None
+
+    def notify(self):
+        """Signale de nouvelles lignes dans le spool"""
+        self.wakeup.set()
+
+    def run(self):
+        spool = Spool(self.path, max_attempts=self.max_attempts)
+        seen_index = self.seen_index_factory() if self.seen_index_factory else None
+        failures = 0
+        try:
+            while True:
+                if self.stopping.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+                    break
+                try:
+                    if self.client is None:
+                        self.client = self.client_factory()
+                    flushed = self.flush_once(spool, seen_index)
+                except Exception as e:
+                    # Les lignes restent dans le spool : le thread survit et réessaie avec backoff
+                    failures += 1
+                    self.stats['errors'] += 1
+                    delay = min(MAX_FLUSH_BACKOFF, self.interval * 2 ** min(failures - 1, 16))
+                    print(f"  ✗ Vidage du spool en échec ({failures} de suite), nouvel essai dans {delay:.0f}s: "
+                          f"{type(e).__name__}: {e}")
+                    if not self.stopping.is_set():
+                        self.stopping.wait(delay)
+                    elif self.deadline is None:
+                        break
+                    else:
+                        time.sleep(min(delay, max(0.0, self.deadline - time.monotonic())))
+                    continue
+                failures = 0
+                if flushed:
+                    continue
+                if self.stopping.is_set():
+                    break
+                self.wakeup.wait(self.interval)
+                self.wakeup.clear()
+            self.remaining = spool.counts()
+        finally:
+            if seen_index is not None:
+                seen_index.close()
+            spool.close()
+
+    def flush_once(self, spool, seen_index=None):
+        """Une passe : envoie un lot de lignes éligibles ; retourne le nombre de lignes traitées"""
+        rows = spool.pending(self.flush_batch)
+        if not rows:
+            return 0
+        self.stats['passes'] += 1
+        report = save_items(self.client, [item for _, item in rows], batch_size=self.batch_size,
+                            seen_index=seen_index)
+        self.stats['saved'] += report['saved']
+        self.stats['skipped'] += report['skipped']
+        self.stats['requests'] += report['requests']
+
+        failed = dict(zip(map(row_key, report['failed_items']), report['failed_errors']))
+        spool.ack([row_id for row_id, item in rows if row_key(item) not in failed])
+        # Une erreur par groupe de lignes (lot entier ou ligne isolée par bissection) : chaque ligne garde
+        # la sienne ; pannes et rejets séparés, seuls les rejets rapprochent une ligne de la dead letter
+        groups = {}
+        for row_id, item in rows:
+            key = row_key(item)
+            if key in failed:
+                error = failed[key]
+                groups.setdefault(id(error), (error, []))[1].append(row_id)
+        for error, retry_ids in groups.values():
+            dead = spool.retry(retry_ids, error, transient=is_transient(error))
+            self.stats['retried'] += len(retry_ids) - dead
+            self.stats['dead'] += dead
+        return len(rows)
+
+    def stop(self, timeout=None):
+        """Vide les lignes éligibles puis s'arrête (au plus `timeout` secondes)"""
+        if timeout is not None:
+            self.deadline = time.monotonic() + timeout
+        self.stopping.set()
+        self.wakeup.set()
+        self.join(timeout)
+        return not self.is_alive()
+
+    def report(self):
+        """Ligne de bilan pour la sortie d'exécution"""
+        line = (f"📤 Spool: {self.stats['saved']} item(s) enregistré(s) en {self.stats['requests']} requête(s), "
+                f"{self.stats['skipped']} déjà connu(s), {self.stats['retried']} reporté(s), "
+                f"{self.stats['dead']} en dead letter")
+        if self.stats['errors']:
+            line += f", {self.stats['errors']} passe(s) en échec"
+        if self.remaining is not None:
+            line += f" — reste {self.remaining['pending']} en file, {self.remaining['dead']} en dead letter"
+        else:
+            line += " — vidage interrompu, reprise à la prochaine exécution"
+        return line
@@ -0,0 +1,18 @@
+"""
+Local State Directory for Lynx Eye
+Emplacement des fichiers d'état persistants des collecteurs (caches, index, spool...)
+"""
+
+import os
+
+# Surchargeable via la variable d'environnement LYNX_STATE_DIR
+STATE_DIR = os.getenv(
+    'LYNX_STATE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.state')
+)
+
+
+def state_path(name):
+    """Retourne le chemin d'un fichier d'état (crée le répertoire si besoin)"""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    return os.path.join(STATE_DIR, name)
@@ -0,0 +1,128 @@
+"""
+Supabase Sink for Lynx Eye
+Enregistrement groupé des items dans intelligence_items (un upsert par lot)
+Partagé par rss_scraper.py et web_scraper.py
+
+- dédoublonnage sur external_id avant envoi (PostgREST refuse deux fois la même clé dans un upsert)
+- retries avec backoff exponentiel sur les erreurs transitoires (réseau, 429, 5xx)
+- bissection d'un lot rejeté pour isoler précisément les lignes invalides
+- index local optionnel (seen_index.SeenIndex) : les items déjà enregistrés ne partent pas
+"""
+
+import time
+
+import metrics
+
+DEFAULT_TABLE = 'intelligence_items'
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+
+# Codes HTTP et PostgREST/PostgreSQL considérés comme transitoires
+TRANSIENT_CODES = {
+    '408', '425', '429', '500', '502', '503', '504',
+    'PGRST000', 'PGRST001', 'PGRST002', 'PGRST003',  # connexion à la base
+    '40001', '40P01', '53300', '57014',  # sérialisation, deadlock, connexions, timeout
+}
+
+
+def is_transient(error):
+    """Indique si une erreur d'upsert mérite un nouvel essai"""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    # Erreurs httpx (transport, timeouts) sans importer httpx
+    if type(error).__module__.startswith(('httpx', 'httpcore')):
+        return True
+    code = getattr(error, 'code', None)
+    return code is not None and str(code) in TRANSIENT_CODES
+
+
+def prepare_rows(items):
+    """
+    Retire les champs internes (préfixe "_") et dédoublonne sur external_id
+    (la dernière occurrence l'emporte, l'ordre d'arrivée est conservé).
+    Retourne (lignes, nombre de doublons)
+    """
+    rows = {}
+    anonymous = []
+    for item in items:
+        row = {k: v for k, v in item.items() if not k.startswith('_')}
+        key = row.get('external_id')
+        if key:
+            rows.pop(key, None)
+            rows[key] = row
+        else:
+            anonymous.append(row)
+    prepared = list(rows.values()) + anonymous
+    return prepared, len(items) - len(prepared)
+
+
+def chunked(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def save_items(client, items, table=DEFAULT_TABLE, batch_size=DEFAULT_BATCH_SIZE,
+               max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF, on_conflict='external_id',
+               seen_index=None):
+    """
+    Upsert groupé des items. client : client Supabase (ou tout objet exposant
+    table(...).upsert(...).execute()).
+    Avec un seen_index, seuls les items nouveaux ou modifiés sont envoyés, puis marqués.
+    Retourne un rapport {saved, failed, duplicates, skipped, requests, errors, failed_items, failed_errors}
+    (failed_errors[i] : erreur définitive de failed_items[i])
+    """
+    skipped = 0
+    if seen_index is not None:
+        fresh = seen_index.filter_new(items)
+        skipped = len(items) - len(fresh)
+        items = fresh
+
+    rows, duplicates = prepare_rows(items)
+    report = {'saved': 0, 'failed': 0, 'duplicates': duplicates, 'skipped': skipped, 'requests': 0,
+              'errors': [], 'failed_items': [], 'failed_errors': []}
+    saved_rows = []
+
+    def upsert(batch):
+        """Un envoi avec retries ; retourne None si succès, sinon l'erreur définitive"""
+        for attempt in range(max_retries + 1):
+            report['requests'] += 1
+            started = time.perf_counter()
+            try:
+                client.table(table).upsert(batch, on_conflict=on_conflict).execute()
+                metrics.observe('lynx_upsert_seconds', time.perf_counter() - started, table=table)
+                return None
+            except Exception as e:
+                metrics.observe('lynx_upsert_seconds', time.perf_counter() - started, table=table)
+                metrics.inc('lynx_upsert_errors_total', table=table, transient=str(is_transient(e)).lower())
+                if not is_transient(e) or attempt == max_retries:
+                    return e
+                time.sleep(backoff * (2 ** attempt))
+
+    def send(batch):
+        error = upsert(batch)
+        if error is None:
+            report['saved'] += len(batch)
+            saved_rows.extend(batch)
+        elif len(batch) == 1 or is_transient(error):
+            # Ligne invalide isolée, ou indisponibilité persistante : inutile de bisecter
+            report['failed'] += len(batch)
+            report['failed_items'].extend(batch)
+            report['failed_errors'].extend([error] * len(batch))
+            report['errors'].append((batch[0].get('external_id') if len(batch) == 1 else None, error))
+            print(f"  ✗ Erreur sauvegarde ({len(batch)} item(s)): {error}")
+        else:
+            middle = len(batch) // 2
+            send(batch[:middle])
+            send(batch[middle:])
+
+    for batch in chunked(rows, max(1, batch_size)):
+        send(batch)
+
+    if seen_index is not None and saved_rows:
+        seen_index.mark(saved_rows)
+    for status in ('saved', 'failed', 'skipped'):
+        if report[status]:
+            metrics.inc('lynx_upsert_rows_total', report[status], table=table, status=status)
+
+    return report
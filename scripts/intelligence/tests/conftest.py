@@ -0,0 +1,21 @@
+"""
+Fixtures communes des tests (Lynx Eye)
+Les modules de scripts/intelligence sont importés à plat, comme par les collecteurs ;
+chaque test écrit ses fichiers d'état dans un répertoire temporaire.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import state  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    """Répertoire .state/ isolé pour chaque test"""
+    monkeypatch.setattr(state, 'STATE_DIR', str(tmp_path))
+    return tmp_path
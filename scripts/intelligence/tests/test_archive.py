@@ -0,0 +1,65 @@
+"""Tests de archive.py : écriture Parquet par jour, lecteurs (mots-clés, sources) et compaction"""
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+import archive
+from archive import ArchiveWriter, keyword_counts, source_volume, compact
+from matcher import KeywordMatcher
+
+DAY1 = 1_751_371_200            # 2025-07-01 12:00 UTC
+DAY2 = DAY1 + 31 * 86400        # 2025-08-01
+
+MATCHER = KeywordMatcher([('grève', 'social', True), ('seeg', 'infrastructures', False),
+                          ('libreville', 'ville', False)])
+
+
+def item(i, content, author="Gabon Review (national)", score=50.0):
+    return {'external_id': f"https://gabonreview.com/{i}", 'content': content, 'author': author,
+            'published_at': '2025-07-01T08:00:00Z', 'relevance_score': score}
+
+
+@pytest.fixture
+def root(state_dir):
+    writer = ArchiveWriter(matcher=MATCHER)
+    writer.append([item(1, "Grève à la SEEG"), item(2, "Libreville : grève générale", score=30.0)], now=DAY1)
+    writer.flush()
+    writer.append([item(3, "Coupure SEEG", author="L'Union (national)", score=10.0),
+                   {'external_id': 'yt', 'content': "Grève", '_collector': 'youtube', 'relevance_score': 20.0}],
+                  now=DAY1 + 60)
+    writer.flush()
+    writer.append([item(4, "Libreville sous la pluie", score=5.0)], now=DAY2)
+    writer.close()
+    assert writer.stats['rows'] == 5 and writer.stats['files'] == 3
+    return str(state_dir / archive.DEFAULT_DIRNAME)
+
+
+def test_keyword_counts(root):
+    assert keyword_counts(root=root) == [('grève', 3), ('seeg', 2), ('libreville', 2)]
+    assert keyword_counts(until='2025-07-31', top=1, root=root) == [('grève', 3)]
+    assert keyword_counts(by='month', root=root) == [
+        ('2025-07', 'grève', 3), ('2025-07', 'seeg', 2), ('2025-07', 'libreville', 1), ('2025-08', 'libreville', 1)]
+
+
+def test_source_volume(root):
+    assert source_volume(since='2025-07-01', until='2025-07-01', root=root) == [
+        ('national', 3, pytest.approx(30.0)), ('youtube', 1, pytest.approx(20.0))]
+    authors = dict((author, count) for author, count, _ in source_volume(by_author=True, root=root))
+    assert authors == {"Gabon Review (national)": 3, "L'Union (national)": 1, None: 1}
+
+
+def test_compact_keeps_rows(root):
+    assert archive.info(root)[:3] == (2, 3, 5)
+    before = keyword_counts(root=root)
+    assert compact(root) == 1
+    assert archive.info(root)[:3] == (2, 2, 5)
+    assert keyword_counts(root=root) == before
+    assert compact(root) == 0
+
+
+def test_keywords_found_upstream_are_reused(state_dir):
+    writer = ArchiveWriter(matcher=MATCHER)
+    writer.append([{'external_id': 'a', 'content': "texte sans rapport", '_keywords': ['seeg']}], now=DAY1)
+    writer.close()
+    assert keyword_counts(root=str(state_dir / archive.DEFAULT_DIRNAME)) == [('seeg', 1)]
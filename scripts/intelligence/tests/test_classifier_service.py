@@ -0,0 +1,68 @@
+"""Tests de classifier_service.py : classification par lot et API HTTP (/classify, /health)"""
+
+import json
+import http.client
+
+import pytest
+
+import classifier_service
+from classifier_service import BatchClassifier, serve
+
+
+@pytest.fixture(scope='module')
+def server():
+    server = serve(port=0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, method, path, body=None):
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+    try:
+        connection.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def classify(server, messages):
+    return request(server, 'POST', '/classify', json.dumps({'messages': messages}).encode('utf-8'))
+
+
+def test_modifiers_alone_are_not_relevant():
+    results = BatchClassifier().classify(["URGENT : annonce", "Urgent, grève à Libreville", None])
+    assert not results[0]['relevant'] and results[0]['categories'] == ['modificateur']
+    assert results[1]['relevant'] and results[1]['priority'] and results[1]['cities'] == ['libreville']
+    assert results[2] == {'relevant': False, 'keywords': [], 'categories': [], 'priority': False, 'cities': []}
+
+
+def test_classify_passes_ids_through(server):
+    status, payload = classify(server, [{'id': 'wamid.1', 'text': "Coupure d'eau à Owendo"},
+                                        {'id': 'wamid.2', 'text': "urgent"},
+                                        {'text': "Bonne fête"}])
+    assert status == 200
+    results = payload['results']
+    assert [result.get('id') for result in results] == ['wamid.1', 'wamid.2', None]
+    assert [result['relevant'] for result in results] == [True, False, False]
+
+
+@pytest.mark.parametrize('body', [b'pas du json', b'{"messages": "texte"}', b'{"messages": [{"text": 42}]}', b'[]'])
+def test_bad_body_is_rejected(server, body):
+    status, payload = request(server, 'POST', '/classify', body)
+    assert status == 400 and payload['error']
+
+
+def test_oversized_body_is_rejected(server, monkeypatch):
+    monkeypatch.setattr(classifier_service, 'MAX_BODY_BYTES', 64)
+    status, payload = classify(server, [{'id': str(i), 'text': "grève"} for i in range(10)])
+    assert status == 413
+
+
+def test_health_reports_stats(server):
+    classify(server, [{'text': "grève"}])
+    status, payload = request(server, 'GET', '/health')
+    assert status == 200 and payload['status'] == 'ok'
+    assert payload['terms'] > 0 and payload['messages'] >= 1
+    assert request(server, 'GET', '/inconnu')[0] == 404
@@ -0,0 +1,94 @@
+"""Tests de dedup.py : signatures MinHash, LSH et regroupement des reprises entre médias"""
+
+from dedup import StoryClusterer, minhash, compact, similarity
+
+DISPATCH = ("Le gouvernement de transition a annoncé mardi à Libreville la réouverture des frontières "
+            "terrestres avec le Cameroun et la Guinée équatoriale, fermées depuis trois semaines, "
+            "après une réunion du conseil des ministres consacrée à la sécurité des postes frontaliers")
+REWRITE = ("Libreville : le gouvernement de transition a annoncé mardi la réouverture des frontières "
+           "terrestres avec le Cameroun et la Guinée équatoriale, fermées depuis trois semaines, "
+           "après une réunion du conseil des ministres consacrée à la sécurité des postes frontaliers.")
+OTHER = ("La SEEG prévoit des coupures d'eau et d'électricité à Port-Gentil jeudi et vendredi pour "
+         "des travaux de maintenance sur le réseau de distribution du quartier Grand Village")
+
+
+def item(ext_id, content, author):
+    return {'external_id': f"https://{ext_id}", 'content': content, 'author': author}
+
+
+def test_similarity_estimates_jaccard():
+    assert similarity(compact(minhash(DISPATCH)), compact(minhash(DISPATCH))) == 1.0
+    assert similarity(compact(minhash(DISPATCH)), compact(minhash(REWRITE))) > 0.7
+    assert similarity(compact(minhash(DISPATCH)), compact(minhash(OTHER))) < 0.2
+    assert minhash("") is None
+
+
+def test_reprints_collapse_into_one_story():
+    clusterer = StoryClusterer()
+    stories = clusterer.collapse([
+        item('gabonreview.com/a', DISPATCH, 'Gabon Review (national)'),
+        item('gabonmediatime.com/b', REWRITE, 'Gabon Media Time (national)'),
+        item('union.ga/c', OTHER, "L'Union (national)"),
+    ])
+    assert len(stories) == 2
+    story = next(s for s in stories if s['external_id'] == 'https://gabonreview.com/a')
+    assert [source['external_id'] for source in story['story_sources']] == [
+        'https://gabonreview.com/a', 'https://gabonmediatime.com/b']
+    assert story['_new_story']
+    assert clusterer.stats == {'items': 3, 'new_stories': 2, 'merged': 1}
+    clusterer.close()
+
+
+def test_clusters_persist_between_runs():
+    first = StoryClusterer()
+    first.collapse([item('gabonreview.com/a', DISPATCH, 'Gabon Review (national)')])
+    first.save()
+    first.close()
+
+    second = StoryClusterer()
+    stories = second.collapse([item('gabonmediatime.com/b', REWRITE, 'Gabon Media Time (national)')])
+    # L'histoire existante est renvoyée avec sa nouvelle source, sous l'identifiant du premier article
+    assert len(stories) == 1
+    assert stories[0]['external_id'] == 'https://gabonreview.com/a'
+    assert len(stories[0]['story_sources']) == 2
+    assert not stories[0]['_new_story']
+    second.close()
+
+
+def test_items_without_words_pass_through():
+    clusterer = StoryClusterer()
+    stories = clusterer.collapse([item('youtube.com/x', '', 'YouTube'), item('youtube.com/y', '…', 'YouTube')])
+    assert len(stories) == 2
+    clusterer.close()
+
+
+def test_refresh_reads_stories_of_other_processes():
+    # Deux workers ouverts en même temps sur la même base
+    first, second = StoryClusterer(), StoryClusterer()
+    first.collapse([item('gabonreview.com/a', DISPATCH, 'Gabon Review (national)')])
+    first.save()
+
+    assert second.refresh() == 1
+    stories = second.collapse([item('gabonmediatime.com/b', REWRITE, 'Gabon Media Time (national)')])
+    assert stories[0]['external_id'] == 'https://gabonreview.com/a'
+    assert not stories[0]['_new_story']
+    second.save()
+
+    # La nouvelle source revient au premier worker sans doublon de la sienne
+    first.refresh()
+    cluster_id = next(iter(first.clusters))
+    assert [source['external_id'] for source in first.clusters[cluster_id]['sources']] == [
+        'https://gabonreview.com/a', 'https://gabonmediatime.com/b']
+    assert first.refresh() == 0
+    first.close()
+    second.close()
+
+
+def test_known_source_is_not_indexed_again():
+    clusterer = StoryClusterer()
+    article = item('gabonreview.com/a', DISPATCH, 'Gabon Review (national)')
+    for _ in range(3):
+        stories = clusterer.collapse([dict(article)])
+        assert len(stories) == 1 and 'story_sources' not in stories[0]
+    assert len(clusterer.entries) == len(clusterer.new_entries) == 1
+    clusterer.close()
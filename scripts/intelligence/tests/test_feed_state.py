@@ -0,0 +1,53 @@
+"""Tests de feed_state.py : requêtes conditionnelles, empreinte du contenu, watermark et rythme"""
+
+import time
+
+from feed_state import FeedStateStore, content_hash, unseen_entries
+
+URL = 'https://www.gabonreview.com/feed/'
+
+
+def entry(guid, published):
+    return {'id': guid, 'published_parsed': time.gmtime(published)}
+
+
+def test_validators_are_persisted_and_sent_back():
+    store = FeedStateStore()
+    assert store.conditional_headers(URL) == {}
+    store.update_validators(URL, '"abc"', 'Tue, 01 Jul 2025 10:00:00 GMT')
+    store.update_content(URL, content_hash(b'<rss/>'))
+    store.save()
+
+    reloaded = FeedStateStore()
+    assert reloaded.conditional_headers(URL) == {'If-None-Match': '"abc"',
+                                                 'If-Modified-Since': 'Tue, 01 Jul 2025 10:00:00 GMT'}
+    assert reloaded.is_unchanged(URL, content_hash(b'<rss/>'))
+    assert not reloaded.is_unchanged(URL, content_hash(b'<rss>nouveau</rss>'))
+
+
+def test_unseen_entries_stop_at_watermark():
+    store = FeedStateStore()
+    old = [entry('a', 1000), entry('b', 900)]
+    store.advance_watermark(URL, old)
+    feed = [entry('d', 1200), entry('c', 1100), entry('a', 1000), entry('b', 900)]
+    fresh, reached = unseen_entries(feed, store.watermark(URL))
+    assert [e['id'] for e in fresh] == ['d', 'c'] and reached
+    assert unseen_entries(feed, None) == (feed, False)
+
+
+def test_entry_older_than_watermark_counts_as_seen():
+    store = FeedStateStore()
+    store.advance_watermark(URL, [entry('a', 1000)])
+    fresh, reached = unseen_entries([entry('z', 1500), entry('y', 800)], store.watermark(URL))
+    assert [e['id'] for e in fresh] == ['z'] and reached
+
+
+def test_publication_rate_is_learned():
+    store = FeedStateStore()
+    now = 100 * 3600
+    # 5 articles sur 4h : 1 article par heure
+    assert store.record_entries(URL, [now - h * 3600 for h in range(5)], now=now) == 5
+    assert abs(store.get(URL)['rate'] - 1.0) < 1e-9
+    # 6h plus tard, aucun nouvel article : le rythme baisse
+    assert store.record_entries(URL, [now - h * 3600 for h in range(5)], now=now + 6 * 3600) == 0
+    assert store.get(URL)['rate'] < 1.0
@@ -0,0 +1,81 @@
+"""Tests de health.py : disjoncteur (ouverture, sonde, backoff, fermeture) et budgets des sources lentes"""
+
+from health import HealthStore, FAILURE_THRESHOLD, OPEN_SECONDS, MAX_OPEN_SECONDS, OPEN
+
+FEED = ('feed', 'https://www.gabonreview.com/feed/')
+
+
+def open_circuit(store, now):
+    """Enregistre FAILURE_THRESHOLD échecs consécutifs ; retourne le résultat du dernier"""
+    for _ in range(FAILURE_THRESHOLD - 1):
+        assert not store.failure(*FEED, "timeout", now=now)
+    return store.failure(*FEED, "timeout", now=now)
+
+
+def test_circuit_opens_after_threshold_and_blocks():
+    store = HealthStore()
+    assert store.allow(*FEED, now=1000)
+    assert open_circuit(store, now=1000)
+    assert store.is_open(*FEED)
+    assert not store.allow(*FEED, now=1000 + OPEN_SECONDS - 1)
+    assert store.stats['skipped'] == 1
+    store.close()
+
+
+def test_half_open_allows_a_single_probe():
+    store = HealthStore()
+    open_circuit(store, now=1000)
+    assert store.allow(*FEED, now=1000 + OPEN_SECONDS)
+    assert store.is_probing(*FEED) and not store.is_open(*FEED)
+    # Une seule sonde à la fois
+    assert not store.allow(*FEED, now=1000 + OPEN_SECONDS)
+    assert store.stats['probes'] == 1
+    store.close()
+
+
+def test_failed_probe_doubles_pause_up_to_cap():
+    store = HealthStore()
+    now = 1000
+    open_circuit(store, now=now)
+    pauses = []
+    for _ in range(12):
+        now = store.records[FEED]['open_until']
+        assert store.allow(*FEED, now=now)
+        assert store.failure(*FEED, "HTTP 503", now=now)
+        pauses.append(store.records[FEED]['open_until'] - now)
+    assert pauses[:3] == [2 * OPEN_SECONDS, 4 * OPEN_SECONDS, 8 * OPEN_SECONDS]
+    assert pauses[-1] == MAX_OPEN_SECONDS
+    assert store.records[FEED]['state'] == OPEN
+    store.close()
+
+
+def test_successful_probe_resets_circuit():
+    store = HealthStore()
+    open_circuit(store, now=1000)
+    assert store.allow(*FEED, now=1000 + OPEN_SECONDS)
+    store.success(*FEED, latency=0.4)
+    record = store.records[FEED]
+    assert not store.is_open(*FEED) and not store.is_probing(*FEED)
+    assert (record['failures'], record['open_seconds'], record['open_until']) == (0, 0.0, 0.0)
+    assert store.allow(*FEED, now=1000 + OPEN_SECONDS + 1)
+    # Un nouvel échec isolé ne rouvre pas le disjoncteur
+    assert not store.failure(*FEED, "timeout", now=1000 + OPEN_SECONDS + 2)
+    assert store.stats['closed'] == 1
+    store.close()
+
+
+def test_state_persists_and_slow_sources_get_smaller_budget():
+    store = HealthStore()
+    open_circuit(store, now=1000)
+    for latency in (8.0, 9.0, 7.5, 8.2, 8.9):
+        store.success('backend', 'ddg', latency=latency)
+    store.save()
+    store.close()
+
+    reopened = HealthStore()
+    assert reopened.is_open(*FEED)
+    assert not reopened.allow(*FEED, now=1001)
+    assert reopened.workers('backend', 'ddg', 8) == 4
+    assert reopened.read_timeout('backend', 'ddg', (5, 30)) == (5, 27.0)
+    assert reopened.workers('backend', 'yt', 8) == 8
+    reopened.close()
@@ -0,0 +1,104 @@
+"""Tests de html_crawler.py : liens d'articles, sitemaps, extraction de l'en-tête et état du crawl"""
+
+from html_crawler import CrawlState, is_article_link, parse_sitemap, extract_article, sitemap_urls, DEFAULT_MAX_ATTEMPTS
+
+HOST = 'union.sonapresse.com'
+
+ARTICLE_HEAD = """<!DOCTYPE html>
+<html lang="fr"><head>
+<meta charset="iso-8859-1">
+<title>Titre de secours | L'Union</title>
+<meta property="og:title" content="Libreville :  coupures d'eau   à Nzeng-Ayong">
+<meta name="description" content="La SEEG annonce des travaux sur le réseau.">
+<meta property="article:published_time" content="2025-07-01T08:30:00+01:00">
+</head><body><p>Corps de l'article, jamais lu</p></body></html>""".encode('iso-8859-1')
+
+JSONLD_HEAD = b"""<html><head><title>Gr\xc3\xa8ve des enseignants</title>
+<script type="application/ld+json">{"@type": "NewsArticle", "datePublished": "2025-06-30T10:00:00Z"}</script>
+</head>"""
+
+SITEMAP_INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://www.agpgabon.ga/post-sitemap2.xml</loc><lastmod>2025-07-01T09:00:00+00:00</lastmod></sitemap>
+  <sitemap><loc>https://www.agpgabon.ga/post-sitemap1.xml</loc></sitemap>
+</sitemapindex>"""
+
+URLSET = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc> https://www.agpgabon.ga/societe/la-seeg-annonce-des-travaux/ </loc><lastmod>2025-07-01</lastmod></url>
+  <url><lastmod>2025-07-01</lastmod></url>
+</urlset>"""
+
+
+def fetch(url, status=200, content=b'<html></html>', etag=None, last_modified=None, error=None):
+    return {'url': url, 'status': status, 'content': content, 'etag': etag,
+            'last_modified': last_modified, 'error': error}
+
+
+def test_article_links():
+    assert is_article_link('https://www.union.sonapresse.com/gabon/greve-des-enseignants-a-libreville', HOST)
+    assert is_article_link('https://union.sonapresse.com/2025/07/01/seeg/', HOST)
+    assert is_article_link('https://union.sonapresse.com/politique/article-12345', HOST)
+    assert not is_article_link('https://union.sonapresse.com/category/politique-gabon-actualite-jour', HOST)
+    assert not is_article_link('https://union.sonapresse.com/wp-content/uploads/2025/07/photo.jpg', HOST)
+    assert not is_article_link('https://autre-site.ga/gabon/greve-des-enseignants-a-libreville', HOST)
+    assert not is_article_link('mailto:redaction@union.sonapresse.com', HOST)
+    assert not is_article_link('https://union.sonapresse.com/politique', HOST, section='/politique/')
+
+
+def test_parse_sitemap_index_and_urlset():
+    assert parse_sitemap(SITEMAP_INDEX) == ('index', [
+        ('https://www.agpgabon.ga/post-sitemap2.xml', '2025-07-01T09:00:00+00:00'),
+        ('https://www.agpgabon.ga/post-sitemap1.xml', None)])
+    assert parse_sitemap(URLSET) == ('urlset', [('https://www.agpgabon.ga/societe/la-seeg-annonce-des-travaux/',
+                                                 '2025-07-01')])
+    assert parse_sitemap(b'<html>pas un sitemap') == (None, [])
+    assert sitemap_urls("User-agent: *\nDisallow: /wp-admin/\nSitemap: https://www.agpgabon.ga/sitemap_index.xml\n") == [
+        'https://www.agpgabon.ga/sitemap_index.xml']
+
+
+def test_extract_article_reads_head_only():
+    article = extract_article(ARTICLE_HEAD)
+    assert article == {'title': "Libreville : coupures d'eau à Nzeng-Ayong",
+                       'summary': "La SEEG annonce des travaux sur le réseau.",
+                       'published': '2025-07-01T08:30:00+01:00'}
+    # Sans balises meta : <title> et date JSON-LD ; en-tête tronqué toléré
+    assert extract_article(JSONLD_HEAD) == {'title': "Grève des enseignants", 'summary': '',
+                                            'published': '2025-06-30T10:00:00+00:00'}
+
+
+def test_conditional_requests_and_unchanged_pages():
+    state = CrawlState()
+    home = 'https://www.union.sonapresse.com/'
+    assert state.page_headers(home) == {}
+    assert state.page_changed(fetch(home, etag='"v1"', last_modified='Tue, 01 Jul 2025 08:00:00 GMT'))
+    assert state.page_headers(home) == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Tue, 01 Jul 2025 08:00:00 GMT'}
+    # 304, puis 200 au contenu identique : aucun nouveau lien à chercher
+    assert not state.page_changed(fetch(home, status=304, content=None))
+    assert not state.page_changed(fetch(home))
+    assert state.page_changed(fetch(home, content=b'<html>nouvelle une</html>', etag='"v2"'))
+    assert state.page_headers(home)['If-None-Match'] == '"v2"'
+    state.close()
+
+
+def test_is_new_follows_visits_and_lastmod():
+    state = CrawlState()
+    url = 'https://www.agpgabon.ga/societe/la-seeg-annonce-des-travaux/'
+    assert state.is_new(url)
+    state.queue([(url, '2025-07-01')], 'AGP')
+    assert state.pending('AGP') == [(url, '2025-07-01')] and state.is_new(url)
+
+    state.mark(url, 'AGP', fetch(url, etag='"a1"'), lastmod='2025-07-01')
+    assert not state.is_new(url, '2025-07-01')
+    assert state.is_new(url, '2025-07-02T10:00:00Z')
+    assert state.pending('AGP') == []
+    # Même article sous une autre forme d'URL : validateurs de la visite précédente
+    assert state.page_headers('https://agpgabon.ga/societe/la-seeg-annonce-des-travaux?utm_source=fb') == {
+        'If-None-Match': '"a1"'}
+
+    failing = 'https://www.agpgabon.ga/politique/conseil-des-ministres-du-30-juin/'
+    for _ in range(DEFAULT_MAX_ATTEMPTS):
+        assert state.is_new(failing)
+        state.mark(failing, 'AGP', fetch(failing, status=None, content=None, error='timeout'))
+    assert not state.is_new(failing)
+    state.close()
@@ -0,0 +1,135 @@
+"""Tests de leases.py (baux des unités d'un cycle) et de l'état des flux partagé entre workers"""
+
+import threading
+from types import SimpleNamespace
+
+from feed_state import FeedStateStore
+from leases import LeaseTable, cycle_id, PENDING, LEASED, DONE, FAILED
+
+UNITS = [(f"feed:http://site{i}.ga/feed", 'feed', ['national', f"Site{i}", f"http://site{i}.ga/feed"])
+         for i in range(5)]
+
+
+def test_cycle_id_is_shared_within_slice():
+    assert cycle_id(180, now=3 * 3600 + 10) == cycle_id(180, now=5 * 3600) == '19700101T0300Z'
+    assert cycle_id(180, now=6 * 3600) == '19700101T0600Z'
+
+
+def test_publish_only_once_per_cycle():
+    table = LeaseTable()
+    assert table.publish('c1', UNITS)
+    assert not table.publish('c1', UNITS[:1])
+    assert table.progress('c1')[PENDING] == 5
+    table.close()
+
+
+def test_units_are_leased_to_a_single_worker():
+    first, second = LeaseTable(), LeaseTable()
+    first.publish('c1', UNITS)
+    taken = first.acquire('c1', 'w1', 3)
+    others = second.acquire('c1', 'w2', 10)
+    assert [unit for unit, _, _ in taken] == [unit for unit, _, _ in UNITS[:3]]
+    assert [unit for unit, _, _ in others] == [unit for unit, _, _ in UNITS[3:]]
+    assert taken[0][2] == UNITS[0][2]
+    assert second.acquire('c1', 'w2', 10) == []
+    first.close()
+    second.close()
+
+
+def test_expired_lease_is_taken_over_and_late_completion_refused():
+    table = LeaseTable(ttl=10)
+    table.publish('c1', UNITS[:1])
+    unit = table.acquire('c1', 'w1', 1, now=1000)[0][0]
+    assert table.acquire('c1', 'w2', 1, now=1005) == []
+    assert table.acquire('c1', 'w2', 1, now=1011)[0][0] == unit
+    assert table.complete('c1', 'w1', [unit]) == 0
+    assert table.complete('c1', 'w2', [unit]) == 1
+    assert table.progress('c1')[DONE] == 1
+    table.close()
+
+
+def test_renew_keeps_lease():
+    table = LeaseTable(ttl=10)
+    table.publish('c1', UNITS[:1])
+    unit = table.acquire('c1', 'w1', 1, now=1000)[0][0]
+    assert table.renew('c1', 'w1', [unit], now=1008) == 1
+    assert table.acquire('c1', 'w2', 1, now=1012) == []
+    assert table.progress('c1', now=1012)[LEASED] == 1
+    table.close()
+
+
+def test_unit_abandoned_after_max_attempts():
+    table = LeaseTable(ttl=1, max_attempts=2)
+    table.publish('c1', UNITS[:1])
+    assert table.acquire('c1', 'w1', 1, now=1000)
+    assert table.acquire('c1', 'w2', 1, now=1002)
+    assert table.acquire('c1', 'w3', 1, now=1004) == []
+    assert table.progress('c1', now=1004)[FAILED] == 1
+    table.close()
+
+
+def test_release_makes_units_available_again():
+    table = LeaseTable(ttl=100)
+    table.publish('c1', UNITS[:2])
+    units = [unit for unit, _, _ in table.acquire('c1', 'w1', 2, now=1000)]
+    assert table.release('c1', 'w2', units, now=1001) == 0
+    assert table.release('c1', 'w1', units, now=1001) == 2
+    assert len(table.acquire('c1', 'w2', 2, now=1002)) == 2
+    table.close()
+
+
+def test_failed_batch_is_released_not_completed():
+    from worker import Worker
+
+    class FailingWorker(Worker):
+        """Worker sans collecteurs : chaque lot échoue"""
+
+        def __init__(self, leases):
+            self.args = SimpleNamespace(batch=2, lease_ttl=300)
+            self.name = 'w1'
+            self.owner = 'host:1'
+            self.leases = leases
+            self.stop_event = threading.Event()
+            self.held = set()
+            self.stats = {'batches': 0, 'units': 0, 'lost': 0, 'failed': 0, 'items': 0}
+
+        def publish(self, cycle):
+            pass
+
+        def process(self, units):
+            self.stop_event.set()
+            raise ConnectionError("Supabase injoignable")
+
+    table = LeaseTable()
+    table.publish('c1', UNITS[:2])
+    worker = FailingWorker(table)
+    worker.run('c1')
+    progress = table.progress('c1')
+    assert progress[PENDING] == 2 and progress[DONE] == 0
+    assert worker.stats['failed'] == 1 and worker.stats['units'] == 0
+    table.close()
+
+
+def test_two_workers_save_only_their_feeds():
+    # Deux workers chargent le même état, interrogent chacun leurs flux puis enregistrent
+    FeedStateStore().save()
+    first, second = FeedStateStore(), FeedStateStore()
+    first.update_validators('http://a.ga/feed', '"etag-a"', None)
+    second.update_validators('http://b.ga/feed', '"etag-b"', None)
+    second.get('http://a.ga/feed')['etag'] = 'périmé'
+    first.save(urls=['http://a.ga/feed'])
+    second.save(urls=['http://b.ga/feed'])
+
+    feeds = FeedStateStore().feeds
+    assert feeds['http://a.ga/feed']['etag'] == '"etag-a"'
+    assert feeds['http://b.ga/feed']['etag'] == '"etag-b"'
+
+
+def test_rss_source_leaves_saving_to_worker(state_dir):
+    from rss_scraper import iter_rss_items
+
+    store = FeedStateStore()
+    list(iter_rss_items(feed_state=store, rss_sources=[], persist=False))
+    assert not (state_dir / 'feed_state.json').exists()
+    list(iter_rss_items(feed_state=store, rss_sources=[]))
+    assert (state_dir / 'feed_state.json').exists()
@@ -0,0 +1,60 @@
+"""Tests de matcher.py : normalisation, frontières de mots, termes imbriqués et préfixes"""
+
+from matcher import KeywordMatcher, fold, get_matcher
+
+ENTRIES = [
+    ('coupure', 'infrastructures', False),
+    ("coupure d'eau", 'infrastructures', False),
+    ('or', 'economie', False),
+    ('grève', 'social', True),
+    ('gabon*', 'generique', False),
+    ('coup d’État', 'politique', True),
+]
+
+
+def matcher():
+    return KeywordMatcher(ENTRIES)
+
+
+def test_fold_removes_case_accents_and_typography():
+    assert fold("Coup d’État à LIBREVILLE") == "coup d'etat a libreville"
+    assert fold("Grève générale – SEEG") == "greve generale - seeg"
+
+
+def test_word_boundaries_and_simple_plural():
+    m = matcher()
+    assert m.keywords("Le prix de l'or flambe") == ['or']
+    assert m.keywords("Dans l'ordre du jour") == []
+    assert m.keywords("Les grèves continuent") == ['grève']
+
+
+def test_nested_terms_are_both_reported():
+    assert matcher().keywords("Nouvelle coupure d'eau à Owendo") == ["coupure d'eau", 'coupure']
+
+
+def test_prefix_terms():
+    m = matcher()
+    assert m.keywords("Les Gabonais et la Gabonaise") == ['gabon']
+    assert m.keywords("Gabon 24") == ['gabon']
+
+
+def test_find_positions_and_priority():
+    m = matcher()
+    hits = m.find("Tentative de COUP D'ETAT")
+    assert [(hit.keyword, hit.start, hit.end, hit.priority) for hit in hits] == [("coup d’État", 13, 24, True)]
+    assert m.has_priority("la grève est votée")
+    assert not m.has_priority("coupure prévue")
+    assert m.matches("prix de l'or") and not m.matches("rien à signaler")
+
+
+def test_batch_matches_each_text():
+    m = matcher()
+    texts = ["Grève à Libreville", "", "coupure", "Le Gabon en or"]
+    assert m.keywords_batch(texts) == [m.keywords(text) for text in texts]
+
+
+def test_shared_matcher_covers_vocabulary():
+    m = get_matcher()
+    assert m is get_matcher()
+    assert 'seeg' in m.terms and m.terms['seeg']['keyword']
+    assert m.matches("Délestages de la SEEG à Port-Gentil")
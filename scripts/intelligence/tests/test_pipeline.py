@@ -0,0 +1,50 @@
+"""Tests de pipeline.py : lots, étapes, backpressure d'un sink lent et vidage complet"""
+
+import time
+
+import metrics
+from pipeline import Pipeline
+
+
+def blocked(source):
+    return metrics.REGISTRY.values.get(('lynx_pipeline_blocked_total', metrics.label_key({'source': source})), 0)
+
+
+def articles(prefix, count):
+    return lambda: ({'external_id': f"{prefix}/{i}"} for i in range(count))
+
+
+def test_slow_sink_blocks_producers_and_every_item_is_sunk():
+    sunk = []
+
+    def slow_sink(batch):
+        time.sleep(0.01)
+        sunk.extend(batch)
+
+    before = blocked('rss') + blocked('web')
+    pipeline = Pipeline(slow_sink, queue_size=5, batch_size=5, linger=0.5)
+    stats = pipeline.run({'rss': articles('rss', 60), 'web': articles('web', 40)})
+    assert stats['blocked'] > 0
+    assert blocked('rss') + blocked('web') - before == stats['blocked']
+    assert stats['max_queue'] <= 5
+    assert sorted(item['external_id'] for item in sunk) == sorted(
+        [f"rss/{i}" for i in range(60)] + [f"web/{i}" for i in range(40)])
+    assert stats['received'] == stats['sunk'] == 100
+
+
+def test_stages_filter_batches_and_failed_source_is_reported():
+    sunk = []
+
+    def failing():
+        yield {'external_id': 'yt/0'}
+        raise ConnectionError("quota dépassé")
+
+    def keep_even(batch):
+        return [item for item in batch if int(item['external_id'].split('/')[1]) % 2 == 0]
+
+    pipeline = Pipeline(sunk.extend, stages=[keep_even], batch_size=4, linger=0.05)
+    stats = pipeline.run({'rss': articles('rss', 10), 'youtube': failing})
+    assert sorted(item['external_id'] for item in sunk) == ['rss/0', 'rss/2', 'rss/4', 'rss/6', 'rss/8', 'yt/0']
+    assert stats['received'] == 11 and stats['sunk'] == 6
+    assert isinstance(stats['sources']['youtube']['error'], ConnectionError)
+    assert stats['sources']['rss']['items'] == 10
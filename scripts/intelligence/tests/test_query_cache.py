@@ -0,0 +1,49 @@
+"""Tests de query_cache.py : normalisation des requêtes, TTL par moteur et éviction LRU"""
+
+from query_cache import QueryCache, normalize_query
+
+HOUR = 3600
+NOW = 1_000_000.0
+RESULTS = [{'title': "Grève à la SEEG", 'href': 'https://gabonreview.com/greve'}]
+
+
+def test_normalized_query_hits():
+    cache = QueryCache()
+    assert normalize_query("  Grève   SEEG ") == "greve seeg"
+    assert cache.get('ddg', "grève seeg", 5, now=NOW) is None
+    cache.put('ddg', "grève seeg", 5, RESULTS, now=NOW)
+    assert cache.get('ddg', "GREVE  Seeg", 5, now=NOW + 1) == RESULTS
+    # Autre moteur ou autre nombre de résultats : entrée distincte
+    assert cache.get('youtube', "grève seeg", 5, now=NOW + 1) is None
+    assert cache.get('ddg', "grève seeg", 10, now=NOW + 1) is None
+    assert cache.stats['hits'] == 1 and cache.stats['misses'] == 3
+    cache.close()
+
+
+def test_ttl_depends_on_backend():
+    cache = QueryCache(ttls={'ddg': 6, 'youtube': 24})
+    cache.put('ddg', "coupure", 3, RESULTS, now=NOW)
+    cache.put('youtube', "coupure", 3, RESULTS, now=NOW)
+    assert cache.contains('ddg', "coupure", 3, now=NOW + 6 * HOUR)
+    assert not cache.contains('ddg', "coupure", 3, now=NOW + 6 * HOUR + 1)
+    assert cache.get('youtube', "coupure", 3, now=NOW + 12 * HOUR) == RESULTS
+    assert cache.get('youtube', "coupure", 3, now=NOW + 24 * HOUR + 1) is None
+
+    cache.prune(now=NOW + 12 * HOUR)
+    assert cache.stats['evicted'] == 1
+    assert cache.db.execute("SELECT backend FROM results").fetchall() == [('youtube',)]
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = QueryCache(max_entries=2)
+    for i, query in enumerate(["or", "pétrole", "manganèse"]):
+        cache.put('ddg', query, 3, RESULTS, now=NOW + i)
+    # "or" relu : "pétrole" devient le moins récemment utilisé
+    assert cache.get('ddg', "or", 3, now=NOW + 10) == RESULTS
+    cache.prune(now=NOW + 11)
+    assert cache.stats['evicted'] == 1
+    assert not cache.contains('ddg', "petrole", 3, now=NOW + 11)
+    assert cache.contains('ddg', "or", 3, now=NOW + 11)
+    assert cache.contains('ddg', "manganese", 3, now=NOW + 11)
+    cache.close()
@@ -0,0 +1,67 @@
+"""Tests de query_planner.py : exploration des combinaisons, rendement crédité, persistance et budget"""
+
+from query_planner import QueryPlanner, MAX_PER_KEYWORD, DISCOUNT
+
+KEYWORDS = ['seeg', 'grève', 'or']
+
+
+def planner(**kwargs):
+    return QueryPlanner(keywords=KEYWORDS, modifiers=['prix'], cities=['Owendo'], priority=[], **kwargs)
+
+
+def relevant(query):
+    return {'_query': query, '_collector': 'web', 'relevance_score': 50, '_new_story': True}
+
+
+def test_plan_respects_budget_and_keyword_cap():
+    p = planner()
+    assert len(p.plan(2)) == 2
+    queries = p.plan(100)
+    assert len(queries) == len(KEYWORDS) * MAX_PER_KEYWORD
+    assert all(sum(q.split()[0] == keyword for q in queries) == MAX_PER_KEYWORD for keyword in KEYWORDS)
+    p.close()
+
+
+def test_untried_arms_are_explored_before_sterile_ones():
+    p = planner()
+    for _ in range(3):
+        p.requested('seeg')
+    p.save()
+    p.close()
+
+    queries = planner().plan(100)
+    assert 'seeg' not in queries
+    assert 'seeg prix Owendo' in queries
+
+
+def test_credited_yield_raises_rank():
+    p = planner()
+    assert 'or prix' in p.plan(100)
+    p.requested('or prix')
+    assert all(p.credit(relevant('or prix')) for _ in range(4))
+    # Items déjà connus ou peu pertinents ne sont pas crédités
+    assert not p.credit({**relevant('or prix'), '_new_story': False})
+    assert not p.credit({**relevant('or prix'), 'relevance_score': 5})
+    p.save()
+    p.close()
+
+    queries = planner().plan(3)
+    assert queries[0].startswith('or') and 'or prix' in queries[:2]
+
+
+def test_statistics_round_trip_with_decay():
+    p = planner()
+    # Requête planifiée par un autre worker
+    p.assign('grève Owendo', 'web', ('grève', '', 'Owendo'))
+    p.requested('grève Owendo')
+    p.credit(relevant('grève Owendo'))
+    p.save()
+    p.requested('grève Owendo')
+    p.save()
+    p.close()
+
+    reloaded = planner()
+    rows = reloaded.db.execute("SELECT backend, query, keyword, city, requests, new_items FROM arms").fetchall()
+    assert rows == [('web', 'grève Owendo', 'grève', 'Owendo', 1 * DISCOUNT + 1, 1 * DISCOUNT)]
+    assert reloaded.plan(100) == planner().plan(100)
+    reloaded.close()
@@ -0,0 +1,60 @@
+"""Tests de scoring.py : parité NumPy / Python pur, classement et top_k par lot"""
+
+import pytest
+
+from pipeline import scoring_stage
+from scoring import RelevanceScorer, published_timestamp, source_category
+
+NOW = published_timestamp('2025-07-01T12:00:00Z')
+
+
+def items():
+    return [
+        {'external_id': 'a', 'content': "Émeute et barrage routier à Libreville, grève générale annoncée",
+         'author': 'Gabon Review (national)', 'published_at': '2025-07-01T10:00:00Z'},
+        {'external_id': 'b', 'content': "Le prix du pain augmente à Owendo", '_collector': 'web',
+         'published_at': 'Mon, 23 Jun 2025 08:00:00 GMT'},
+        {'external_id': 'c', 'content': "Rien à signaler", 'author': 'RFI (international)'},
+        {'external_id': 'd', 'content': "Manifestation, manifestation et manifestation devant la SEEG",
+         'author': "L'Union (national)", 'published_at': '2025-06-30T12:00:00Z',
+         'story_sources': [{}, {}, {}]},
+        {'external_id': 'e', 'content': ''},
+    ]
+
+
+def test_numpy_and_python_scores_agree():
+    pytest.importorskip('numpy')
+    fast, slow = RelevanceScorer(), RelevanceScorer(use_numpy=False)
+    assert fast.use_numpy and not slow.use_numpy
+    assert fast.score(items(), now=NOW) == slow.score(items(), now=NOW)
+    ranked = [[item['external_id'] for item in scorer.rank(items(), now=NOW)] for scorer in (fast, slow)]
+    assert ranked[0] == ranked[1]
+
+
+def test_scores_are_bounded_and_ranked():
+    scorer = RelevanceScorer(use_numpy=False)
+    batch = items()
+    scores = scorer.score(batch, now=NOW)
+    assert all(0.0 <= score <= 100.0 for score in scores)
+    assert scores[2] == scores[4] == 0.0
+    assert scores[0] > scores[1]
+    ranked = scorer.rank(batch, min_score=1.0, now=NOW)
+    assert [item['relevance_score'] for item in ranked] == sorted(
+        (s for s in scores if s >= 1.0), reverse=True)
+
+
+def test_top_k_applies_per_batch():
+    scorer = RelevanceScorer()
+    stage = scoring_stage(scorer, top_k=2)
+    first, second = stage(items()), stage(items()[1:])
+    assert len(first) == len(second) == 2
+    assert first[0]['external_id'] in ('a', 'd') and 'a' not in [item['external_id'] for item in second]
+    assert scorer.stats == {'scored': 9, 'kept': 4, 'seconds': scorer.stats['seconds']}
+
+
+def test_source_category_and_dates():
+    assert source_category({'author': 'Gabon Review (national)'}) == 'national'
+    assert source_category({'_collector': 'youtube', 'author': 'X (national)'}) == 'youtube'
+    assert source_category({'author': 'Anonyme'}) is None
+    assert published_timestamp('Tue, 01 Jul 2025 12:00:00 GMT') == NOW
+    assert published_timestamp('hier') is None
@@ -0,0 +1,106 @@
+"""Tests de search_executor.py : limiteur à jetons, backoff sur rate limiting, résultats rattachés aux requêtes"""
+
+import threading
+import time
+
+import pytest
+
+import search_executor
+from search_executor import SearchExecutor, TokenBucket, is_rate_limited
+
+
+class FakeClock:
+    """Horloge simulée : sleep() avance le temps au lieu d'attendre"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+        self.lock = threading.Lock()
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        with self.lock:
+            self.sleeps.append(round(seconds, 6))
+            self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(search_executor.time, 'monotonic', fake.monotonic)
+    monkeypatch.setattr(search_executor.time, 'sleep', fake.sleep)
+    return fake
+
+
+class StubSession:
+    """Session de moteur, comptée à chaque création"""
+
+    created = 0
+
+    def __init__(self):
+        StubSession.created += 1
+
+
+def test_bucket_allows_burst_then_refills_at_rate(clock):
+    bucket = TokenBucket(rate=2.0, capacity=2)
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert clock.sleeps == [0.5]
+    # Après une longue inactivité, le seau est plein mais plafonné à sa capacité
+    clock.now += 60
+    bucket.acquire()
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.sleeps == [0.5, 0.5]
+
+
+def test_rate_limiting_pauses_with_exponential_backoff(clock):
+    remaining = {'429': 2}
+
+    def search(session, query, max_results):
+        if remaining['429']:
+            remaining['429'] -= 1
+            raise RuntimeError("HTTP 429 Too Many Requests")
+        return [f"{query} #{i}" for i in range(max_results)]
+
+    StubSession.created = 0
+    executor = SearchExecutor(search, session_factory=StubSession, max_workers=1,
+                              rate=2.0, burst=4, backoff=5.0, backend='test')
+    assert executor.search("grève SEEG", 2) == ["grève SEEG #0", "grève SEEG #1"]
+    # Pause globale de 5 s puis 10 s, suivie à chaque fois du délai d'un jeton
+    assert clock.sleeps == [5.0, 0.5, 10.0, 0.5]
+    assert executor.stats == {'requests': 3, 'rate_limited': 2, 'errors': 0}
+    # Session recréée après chaque erreur
+    assert StubSession.created == 3
+
+
+def test_errors_give_up_after_max_retries(clock):
+    def search(session, query, max_results):
+        raise ValueError("réponse illisible")
+
+    executor = SearchExecutor(search, max_retries=2, backend='test')
+    with pytest.raises(ValueError):
+        executor.search("coupure", 3)
+    assert executor.stats == {'requests': 3, 'rate_limited': 0, 'errors': 2}
+    assert not is_rate_limited(ValueError("réponse illisible"))
+
+
+def test_results_are_keyed_to_their_query():
+    delays = {'a': 0.05, 'b': 0.0, 'c': 0.02, 'd': 0.01}
+
+    def search(session, query, max_results):
+        time.sleep(delays[query])
+        if query == 'c':
+            raise ConnectionError("connexion réinitialisée")
+        return [f"{query}{i}" for i in range(max_results)]
+
+    executor = SearchExecutor(search, max_workers=4, rate=1000.0, burst=10, max_retries=0, backend='test')
+    outcomes = {query: (results, error) for query, results, error in executor.run(list(delays), 2)}
+    assert outcomes['a'] == (['a0', 'a1'], None)
+    assert outcomes['b'] == (['b0', 'b1'], None)
+    assert outcomes['d'] == (['d0', 'd1'], None)
+    assert outcomes['c'][0] == [] and isinstance(outcomes['c'][1], ConnectionError)
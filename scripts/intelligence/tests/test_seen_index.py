@@ -0,0 +1,41 @@
+"""Tests de seen_index.py : items déjà enregistrés écartés avant l'upsert"""
+
+from seen_index import SeenIndex
+
+
+def item(url, content="Coupure SEEG à Libreville"):
+    return {'external_id': url, 'content': content}
+
+
+def test_seen_items_are_skipped_until_content_changes():
+    index = SeenIndex()
+    items = [item('https://www.gabonreview.com/a/'), item('https://gabonreview.com/b')]
+    assert index.filter_new(items) == items
+    index.mark(items)
+
+    # Même article sous une autre forme d'URL (www, slash final, paramètres de suivi)
+    again = [item('https://gabonreview.com/a?utm_source=x'), item('https://gabonreview.com/b', "Mise à jour")]
+    assert index.filter_new(again) == again[1:]
+    assert index.stats['skipped'] == 1
+    index.close()
+
+
+def test_index_persists_and_evicts():
+    index = SeenIndex()
+    index.mark([item('https://union.ga/x')])
+    index.close()
+
+    reopened = SeenIndex()
+    assert reopened.filter_new([item('https://union.ga/x')]) == []
+    reopened.close()
+    with_eviction = SeenIndex(max_age_days=-1)
+    assert with_eviction.stats['evicted'] == 1
+    with_eviction.close()
+
+
+def test_items_without_key_always_pass():
+    index = SeenIndex()
+    items = [{'content': 'sans identifiant'}]
+    index.mark(items)
+    assert index.filter_new(items) == items
+    index.close()
@@ -0,0 +1,170 @@
+"""Tests de spool.py : vidage, reports et dead letter selon la nature de l'erreur"""
+
+import sqlite3
+import time
+
+import pytest
+
+import supabase_sink
+from spool import Spool, SpoolFlusher, MAX_OUTAGE_BACKOFF
+
+
+class RejectedRow(Exception):
+    """Erreur PostgREST non transitoire (ligne invalide)"""
+    code = '22P02'
+
+
+class FakeClient:
+    """Client Supabase minimal : table(...).upsert(...).execute() ; error levée à chaque envoi"""
+
+    def __init__(self):
+        self.error = None
+        self.rows = []
+        self.pending = None
+
+    def table(self, name):
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self.pending = rows
+        return self
+
+    def execute(self):
+        if self.error is not None:
+            raise self.error
+        self.rows.extend(self.pending)
+
+
+class PickyClient(FakeClient):
+    """Rejette chaque lot contenant une ligne "invalide", avec une erreur propre à cette ligne"""
+
+    def execute(self):
+        for row in self.pending:
+            if row['content'].startswith('invalide'):
+                raise RejectedRow(f"invalid input syntax: {row['external_id']}")
+        self.rows.extend(self.pending)
+
+
+def items(count):
+    return [{'external_id': f"rss:{i}", 'content': f"item {i}", '_score': 1} for i in range(count)]
+
+
+def flush(spool, client, max_attempts=3):
+    flusher = SpoolFlusher(client=client, max_attempts=max_attempts, batch_size=10)
+    # Toutes les lignes redeviennent éligibles immédiatement
+    with spool.db:
+        spool.db.execute("UPDATE spool SET next_attempt_at = 0")
+    flusher.flush_once(spool)
+    return flusher.stats
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    """Retries de save_items sans attente"""
+    monkeypatch.setattr(supabase_sink.time, 'sleep', lambda seconds: None)
+
+
+@pytest.fixture
+def spool():
+    spool = Spool(max_attempts=3, retry_backoff=1.0)
+    yield spool
+    spool.close()
+
+
+def test_flush_sends_and_acks(spool):
+    client = FakeClient()
+    assert spool.append(items(5)) == 5
+    stats = flush(spool, client)
+    assert stats['saved'] == 5
+    assert spool.counts() == {'pending': 0, 'dead': 0}
+    assert all('_score' not in row for row in client.rows)
+
+
+def test_outage_never_dead_letters(spool):
+    client = FakeClient()
+    client.error = ConnectionError("supabase injoignable")
+    spool.append(items(3))
+    for _ in range(10):
+        flush(spool, client)
+    assert spool.counts() == {'pending': 3, 'dead': 0}
+    attempts, delay = spool.db.execute(
+        "SELECT MAX(attempts), MAX(next_attempt_at) - strftime('%s', 'now') FROM spool").fetchone()
+    assert attempts == 0
+    assert delay <= MAX_OUTAGE_BACKOFF + 1
+
+    client.error = None
+    flush(spool, client)
+    assert spool.counts() == {'pending': 0, 'dead': 0}
+
+
+def test_rejected_rows_go_to_dead_letter_then_requeue(spool):
+    client = FakeClient()
+    client.error = RejectedRow("invalid input syntax")
+    spool.append(items(2))
+    for _ in range(3):
+        flush(spool, client)
+    assert spool.counts() == {'pending': 0, 'dead': 2}
+
+    assert spool.requeue_dead() == 2
+    client.error = None
+    flush(spool, client)
+    assert spool.counts() == {'pending': 0, 'dead': 0}
+    assert len(client.rows) == 2
+
+
+def test_outage_does_not_consume_rejection_attempts(spool):
+    spool.append(items(1))
+    (row_id, _), = spool.pending(10)
+    assert spool.retry([row_id], RejectedRow("invalid")) == 0
+    for _ in range(5):
+        assert spool.retry([row_id], TimeoutError("timeout")) == 0
+    assert spool.retry([row_id], RejectedRow("invalid")) == 0
+    assert spool.retry([row_id], RejectedRow("invalid")) == 1
+    assert spool.counts() == {'pending': 0, 'dead': 1}
+
+
+def test_each_row_keeps_its_own_error(spool):
+    spool.append([{'external_id': f"rss:{i}", 'content': 'invalide' if i in (1, 3) else f"item {i}"}
+                  for i in range(4)])
+    stats = flush(spool, PickyClient())
+    assert stats['saved'] == 2 and stats['retried'] == 2
+    errors = [error for error, in spool.db.execute("SELECT last_error FROM spool ORDER BY id")]
+    assert errors == ["invalid input syntax: rss:1", "invalid input syntax: rss:3"]
+
+
+def test_flusher_survives_failing_client_factory(spool):
+    calls = []
+    client = FakeClient()
+
+    def client_factory():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionError("DNS indisponible")
+        return client
+
+    spool.append(items(3))
+    flusher = SpoolFlusher(client_factory=client_factory, interval=0.01)
+    flusher.start()
+    deadline = time.monotonic() + 5
+    while flusher.stats['saved'] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert flusher.stop(timeout=5)
+    assert flusher.stats['errors'] == 1 and flusher.stats['saved'] == 3
+    assert flusher.remaining == {'pending': 0, 'dead': 0}
+
+
+def test_opens_spool_created_without_outages_column(state_dir):
+    path = str(state_dir / 'old.sqlite3')
+    db = sqlite3.connect(path)
+    db.execute(
+        "CREATE TABLE spool (id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, enqueued_at REAL NOT NULL,"
+        " attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL DEFAULT 0, last_error TEXT)")
+    db.execute("INSERT INTO spool (payload, enqueued_at) VALUES ('{\"external_id\": \"rss:1\"}', 0)")
+    db.commit()
+    db.close()
+
+    spool = Spool(path)
+    (row_id, item), = spool.pending(10)
+    assert item == {'external_id': 'rss:1'}
+    assert spool.retry([row_id], ConnectionError("down")) == 0
+    spool.close()
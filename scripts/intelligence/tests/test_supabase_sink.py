@@ -0,0 +1,113 @@
+"""Tests de supabase_sink.py : upsert groupé, retries, bissection des lots rejetés"""
+
+import pytest
+
+import supabase_sink
+from supabase_sink import save_items, prepare_rows, is_transient
+
+
+class APIError(Exception):
+    """Erreur PostgREST (code PostgreSQL ou HTTP)"""
+
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.code = code
+
+
+class FakeClient:
+    """
+    Client Supabase minimal : un lot contenant une ligne "invalide" est rejeté en entier,
+    comme par PostgREST ; outages : nombre d'envois en échec transitoire avant rétablissement
+    """
+
+    def __init__(self, outages=0):
+        self.outages = outages
+        self.calls = []
+        self.stored = {}
+        self.pending = None
+
+    def table(self, name):
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self.pending = rows
+        return self
+
+    def execute(self):
+        rows = self.pending
+        self.calls.append(len(rows))
+        if self.outages:
+            self.outages -= 1
+            raise APIError("service unavailable", 503)
+        if any(row.get('content') == 'invalide' for row in rows):
+            raise APIError("invalid input syntax", '22P02')
+        self.stored.update((row['external_id'], row) for row in rows)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(supabase_sink.time, 'sleep', lambda seconds: None)
+
+
+def items(count, invalid=()):
+    return [{'external_id': f"https://site.ga/{i}", 'content': 'invalide' if i in invalid else f"article {i}",
+             '_collector': 'rss'} for i in range(count)]
+
+
+def test_prepare_rows_strips_internal_fields_and_duplicates():
+    rows, duplicates = prepare_rows([{'external_id': 'a', 'content': '1', '_score': 3},
+                                     {'external_id': 'b', 'content': '2'},
+                                     {'external_id': 'a', 'content': '3'}])
+    assert duplicates == 1
+    assert rows == [{'external_id': 'b', 'content': '2'}, {'external_id': 'a', 'content': '3'}]
+
+
+def test_is_transient():
+    assert is_transient(ConnectionError())
+    assert is_transient(APIError("timeout", '57014'))
+    assert not is_transient(APIError("invalid", '22P02'))
+    assert not is_transient(ValueError("bug"))
+
+
+def test_one_request_per_batch():
+    client = FakeClient()
+    report = save_items(client, items(450), batch_size=200)
+    assert client.calls == [200, 200, 50]
+    assert report['saved'] == 450 and report['failed'] == 0
+    assert all('_collector' not in row for row in client.stored.values())
+
+
+def test_bisection_isolates_invalid_rows():
+    client = FakeClient()
+    report = save_items(client, items(16, invalid={3, 12}), batch_size=16)
+    assert report['saved'] == 14
+    assert [item['external_id'] for item in report['failed_items']] == ["https://site.ga/3", "https://site.ga/12"]
+    assert len(report['failed_errors']) == 2
+    assert [ext_id for ext_id, _ in report['errors']] == ["https://site.ga/3", "https://site.ga/12"]
+    # 1 lot + 2 moitiés + 4 quarts + 4 huitièmes + 4 lignes isolées
+    assert report['requests'] == len(client.calls) == 15
+
+
+def test_transient_errors_are_retried_not_bisected():
+    client = FakeClient(outages=2)
+    report = save_items(client, items(10), batch_size=10, max_retries=3)
+    assert report['saved'] == 10
+    assert client.calls == [10, 10, 10]
+
+    client = FakeClient(outages=10)
+    report = save_items(client, items(10), batch_size=10, max_retries=2)
+    assert report['failed'] == 10 and report['requests'] == 3
+    assert all(is_transient(error) for error in report['failed_errors'])
+
+
+def test_seen_index_skips_saved_items():
+    from seen_index import SeenIndex
+
+    index = SeenIndex()
+    client = FakeClient()
+    first = save_items(client, items(5, invalid={4}), seen_index=index)
+    assert first['saved'] == 4
+    second = save_items(client, items(5, invalid={4}), seen_index=index)
+    # Seul l'item en échec est renvoyé
+    assert second['skipped'] == 4 and client.calls[-1] == 1
+    index.close()
@@ -0,0 +1,86 @@
+"""Tests de trends.py : count-min sketch par heure, détection des pics, fusion entre workers"""
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from trends import TrendDetector, TrendSketch, columns, recent_alerts, BUCKET_SECONDS, MIN_HISTORY_BUCKETS
+
+START = 480000                 # tranche (heure) de départ des scénarios
+
+
+def hour(offset):
+    return (START + offset) * BUCKET_SECONDS + 60
+
+
+def items(count, text="Nouvelle coupure d'eau de la SEEG"):
+    return [{'external_id': f"rss:{i}", 'content': text} for i in range(count)]
+
+
+def observed(detector, keyword):
+    """Mentions d'un mot-clé sur la fenêtre du détecteur"""
+    key = next(key for key, info in detector.matcher.terms.items() if info['keyword'] == keyword)
+    counts, _, _ = detector.scores([key])
+    return int(counts[0])
+
+
+def test_sketch_never_underestimates():
+    import numpy as np
+
+    sketch = TrendSketch(width=64)
+    sketch.advance(START)
+    keys = [f"terme{i}" for i in range(200)]
+    truth = {key: i % 7 + 1 for i, key in enumerate(keys)}
+    cells = np.array([columns(key, width=64) for key in keys for _ in range(truth[key])])
+    sketch.add(START, cells)
+    estimated, _, _ = sketch.estimate(np.array([columns(key, width=64) for key in keys]))
+    assert all(value >= truth[key] for key, value in zip(keys, estimated))
+
+
+def test_no_alert_without_history():
+    detector = TrendDetector(':memory:', record=False)
+    assert detector.observe(items(50), now=hour(0)) == []
+    assert observed(detector, 'seeg') == 50
+
+
+def test_burst_raises_one_alert_after_history():
+    detector = TrendDetector(':memory:', record=False)
+    for offset in range(MIN_HISTORY_BUCKETS + 12):
+        assert detector.observe(items(1), now=hour(offset)) == []
+
+    burst_hour = MIN_HISTORY_BUCKETS + 12
+    alerts = detector.observe(items(20), now=hour(burst_hour))
+    assert 'seeg' in {alert['keyword'] for alert in alerts}
+    alert = next(alert for alert in alerts if alert['keyword'] == 'seeg')
+    assert alert['count'] >= 20 and alert['z'] >= 4.0
+    assert alert['examples'][0]['external_id'] == 'rss:0'
+    # Terme en sourdine le temps d'une fenêtre
+    assert detector.observe(items(20), now=hour(burst_hour + 1)) == []
+
+
+def test_old_articles_do_not_count_in_window():
+    detector = TrendDetector(':memory:', record=False)
+    detector.observe(items(1), now=hour(10))
+    old = [{'external_id': 'rss:old', 'content': "Coupure SEEG", 'published_at': '2001-01-01T00:00:00Z'}]
+    detector.observe(old, now=hour(10))
+    assert detector.stats['stale'] > 0
+    assert detector.stats['mentions'] > 0
+
+
+def test_workers_counts_are_merged_on_save(state_dir):
+    path = str(state_dir / 'trends.npz')
+    first, second = TrendDetector(path), TrendDetector(path)
+    first.observe(items(3), now=hour(0))
+    second.observe(items(5), now=hour(0))
+    first.save()
+    second.save()
+    merged = TrendDetector(path, record=False)
+    assert observed(merged, 'seeg') == 8
+
+
+def test_alerts_are_recorded(state_dir):
+    detector = TrendDetector(str(state_dir / 'trends.npz'))
+    for offset in range(MIN_HISTORY_BUCKETS + 6):
+        detector.observe(items(1), now=hour(offset))
+    detector.observe(items(25), now=hour(MIN_HISTORY_BUCKETS + 6))
+    assert 'seeg' in {alert['keyword'] for alert in recent_alerts()}
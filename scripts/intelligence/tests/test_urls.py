@@ -0,0 +1,35 @@
+"""Tests de urls.py : redirections des moteurs de recherche et forme canonique des URLs"""
+
+from urls import normalize_url, unwrap_redirect
+
+
+def test_unwrap_duckduckgo_redirect():
+    url = "https://duckduckgo.com/l/?uddg=https%3A%2F%2Fwww.gabonreview.com%2Farticle%2F&rut=abc"
+    assert unwrap_redirect(url) == "https://www.gabonreview.com/article/"
+
+
+def test_unwrap_keeps_encoded_characters_of_target():
+    # %2525 -> %25 une seule fois : la cible garde son échappement
+    url = "https://duckduckgo.com/l/?uddg=https%3A%2F%2Fsite.ga%2Fa%252Fb%3Fq%3D100%2525"
+    assert unwrap_redirect(url) == "https://site.ga/a%2Fb?q=100%25"
+
+
+def test_unwrap_ignores_other_hosts():
+    url = "https://www.gabonreview.com/?uddg=https%3A%2F%2Fexample.com"
+    assert unwrap_redirect(url) == url
+
+
+def test_normalize_strips_tracking_www_and_trailing_slash():
+    assert (normalize_url("HTTP://www.Gabonreview.com/politique/?utm_source=x&fbclid=1&b=2&a=1#top")
+            == "https://gabonreview.com/politique?a=1&b=2")
+
+
+def test_normalize_same_article_behind_redirect():
+    direct = normalize_url("https://www.gabonmediatime.com/seeg-coupure/")
+    redirected = normalize_url("https://duckduckgo.com/l/?uddg=https%3A%2F%2Fgabonmediatime.com%2Fseeg-coupure")
+    assert direct == redirected
+
+
+def test_normalize_leaves_non_urls_untouched():
+    assert normalize_url(" whatsapp:12345 ") == "whatsapp:12345"
+    assert normalize_url(None) == ""
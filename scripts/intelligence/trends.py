@@ -0,0 +1,404 @@
+"""
+Keyword Trends for Lynx Eye
+Détection en flux des pics de mots-clés (coupure, émeute, grève...) en mémoire bornée
+
+Chaque mention d'un mot-clé de INTELLIGENCE_KEYWORDS, de PRIORITY_KEYWORDS ou d'une
+ville de CITIES est comptée dans un count-min sketch (DEPTH lignes × WIDTH compteurs) de l'heure de
+publication de l'item. Les WINDOW_BUCKETS dernières heures forment un anneau de
+sketches : leur somme donne le nombre de mentions de chaque terme sur la fenêtre
+glissante. Une heure qui sort de la fenêtre est versée dans deux sketches à
+décroissance exponentielle (moyenne et moyenne des carrés par heure, demi-vie
+7 jours, corrigées du démarrage à zéro) qui tiennent lieu d'historique de chaque terme.
+
+Un terme est en pic quand ses mentions de la fenêtre dépassent nettement son
+historique (écart réduit z, rapport au volume attendu, nombre minimal) ; l'alerte
+est écrite dans .state/trend_alerts.jsonl au passage du lot, puis le terme est
+mis en sourdine le temps d'une fenêtre. La mémoire ne dépend ni du vocabulaire ni
+du volume : environ 0,8 Mo pour 6 h de fenêtre. Le count-min surestime au pire un
+compteur de e/WIDTH du total des mentions de la fenêtre (collisions), jamais ne le
+sous-estime.
+
+L'état (.state/trends.npz) est fusionné sous verrou à l'enregistrement : les
+comptes étant additifs, plusieurs workers (worker.py) alimentent le même état.
+NumPy est requis (importé à la création du premier sketch, comme dans scoring.py) ;
+sans lui, la détection est désactivée.
+
+Usage:
+python trends.py [--top 15] [--alerts 10]
+"""
+
+import os
+import json
+import time
+import hashlib
+import argparse
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import metrics
+from state import state_path
+from matcher import fold, get_matcher
+from keywords import KEYWORD_CATEGORIES
+from scoring import published_timestamp, load_numpy
+
+DEFAULT_FILENAME = 'trends.npz'
+ALERTS_FILENAME = 'trend_alerts.jsonl'
+
+DEPTH = 4                      # lignes du count-min sketch (fonctions de hachage)
+WIDTH = 4096                   # compteurs par ligne
+BUCKET_SECONDS = 3600          # une tranche par heure
+WINDOW_BUCKETS = 6             # fenêtre glissante comparée à l'historique (6h)
+HALF_LIFE_BUCKETS = 7 * 24     # demi-vie de l'historique (7 jours)
+MIN_HISTORY_BUCKETS = 24       # historique minimal avant toute alerte
+Z_THRESHOLD = 4.0              # écart réduit minimal
+MIN_RATIO = 3.0                # mentions / mentions attendues
+MIN_COUNT = 8                  # mentions minimales sur la fenêtre
+MAX_EXAMPLES = 3               # items cités dans une alerte
+
+# Catégories suivies : INTELLIGENCE_KEYWORDS (catégories de keywords.py), PRIORITY_KEYWORDS et CITIES
+TRACKED_CATEGORIES = frozenset(KEYWORD_CATEGORIES) | {'prioritaire', 'ville'}
+
+np = None                      # NumPy, importé à la demande par _numpy()
+
+
+def _numpy():
+    global np
+    np = load_numpy()
+    return np
+
+
+@lru_cache(maxsize=8192)
+def columns(key, depth=DEPTH, width=WIDTH):
+    """Colonne du terme dans chaque ligne du sketch (double hachage sur un blake2b de 64 bits)"""
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    first, second = int.from_bytes(digest[:4], 'little'), int.from_bytes(digest[4:], 'little') | 1
+    return tuple((first + row * second) % width for row in range(depth))
+
+
+class TrendSketch:
+    """Anneau de count-min sketches par heure et historique à décroissance exponentielle"""
+
+    def __init__(self, depth=DEPTH, width=WIDTH, window=WINDOW_BUCKETS, half_life=HALF_LIFE_BUCKETS):
+        _numpy()
+        self.depth, self.width, self.window = depth, width, window
+        self.keep = 2 ** (-1 / half_life)
+        self.counts = np.zeros((window, depth, width), dtype=np.uint32)
+        self.bucket_ids = np.full(window, -1, dtype=np.int64)
+        self.mean = np.zeros((depth, width))
+        self.square = np.zeros((depth, width))
+        self.alerted = np.full((depth, width), -1, dtype=np.int64)   # tranche de la dernière alerte
+        self.horizon = None     # plus ancienne tranche de la fenêtre
+        self.history = 0        # tranches versées dans l'historique
+
+    def params(self):
+        return np.array([self.depth, self.width, self.window, self.keep])
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """État enregistré, ou None s'il n'existe pas ou a été créé avec d'autres paramètres"""
+        sketch = cls(**kwargs)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                if not np.allclose(data['params'], sketch.params()):
+                    print(f"⚠️  {path}: paramètres des sketches modifiés, historique des tendances réinitialisé")
+                    return None
+                sketch.counts = data['counts']
+                sketch.bucket_ids = data['bucket_ids']
+                sketch.mean = data['mean']
+                sketch.square = data['square']
+                sketch.alerted = data['alerted']
+                horizon, sketch.history = (int(value) for value in data['position'])
+                sketch.horizon = horizon if horizon >= 0 else None
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️  {path} illisible ({e}), historique des tendances réinitialisé")
+            return None
+        return sketch
+
+    def write(self, path):
+        """Écriture atomique (fichier temporaire puis renommage)"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, params=self.params(), counts=self.counts, bucket_ids=self.bucket_ids,
+                                mean=self.mean, square=self.square, alerted=self.alerted,
+                                position=np.array([-1 if self.horizon is None else self.horizon, self.history]))
+        os.replace(tmp_path, path)
+
+    def advance(self, current):
+        """Fait glisser la fenêtre jusqu'à la tranche `current` ; les tranches sorties alimentent l'historique"""
+        oldest = current - self.window + 1
+        if self.horizon is None:
+            self.horizon = oldest
+            return
+        steps = oldest - self.horizon
+        if steps <= 0:
+            return
+        for bucket in range(self.horizon, self.horizon + min(steps, self.window)):
+            slot = bucket % self.window
+            if self.bucket_ids[slot] == bucket:
+                counts = self.counts[slot].astype(np.float64)
+                self.mean = self.keep * self.mean + (1 - self.keep) * counts
+                self.square = self.keep * self.square + (1 - self.keep) * counts ** 2
+                self.counts[slot] = 0
+                self.bucket_ids[slot] = -1
+            else:
+                self.decay(1)
+        if steps > self.window:
+            self.decay(steps - self.window)     # tranches sans aucune collecte (arrêt prolongé)
+        self.history += steps
+        self.horizon = oldest
+
+    def absorb(self, counts):
+        """Verse directement dans l'historique les comptes d'une tranche déjà sortie de la fenêtre"""
+        counts = counts.astype(np.float64)
+        self.mean += (1 - self.keep) * counts
+        self.square += (1 - self.keep) * counts ** 2
+
+    def decay(self, buckets):
+        factor = self.keep ** buckets
+        self.mean *= factor
+        self.square *= factor
+
+    def slot(self, bucket):
+        """Emplacement de la tranche dans l'anneau (remis à zéro s'il contenait une tranche sortie)"""
+        slot = bucket % self.window
+        if self.bucket_ids[slot] != bucket:
+            self.counts[slot] = 0
+            self.bucket_ids[slot] = bucket
+        return slot
+
+    def add(self, bucket, cells, counts=None):
+        """Ajoute des mentions : cells (n, depth) colonnes des termes, ou une matrice de comptes"""
+        slot = self.slot(bucket)
+        if counts is not None:
+            self.counts[slot] += counts
+        else:
+            np.add.at(self.counts[slot], (np.arange(self.depth), cells), 1)
+
+    def estimate(self, cells):
+        """(mentions sur la fenêtre, moyenne par heure, variance par heure) de chaque terme"""
+        rows = np.arange(self.depth)
+        observed = self.counts.sum(axis=0)[rows, cells].min(axis=1)
+        # Moyennes parties de zéro : poids réel de l'historique (1 - keep^history)
+        weight = 1 - self.keep ** self.history if self.history else 1.0
+        mean = self.mean[rows, cells].min(axis=1) / weight
+        square = self.square[rows, cells].min(axis=1) / weight
+        # Variance de Poisson au minimum : un terme rare ne s'emballe pas pour deux mentions
+        return observed, mean, np.maximum(square - mean ** 2, mean)
+
+
+class TrendDetector:
+    """Étape de détection des pics : compte les mentions d'un lot et écrit les alertes"""
+
+    def __init__(self, path=None, alerts_path=None, record=True, matcher=None):
+        self.path = path or state_path(DEFAULT_FILENAME)
+        self.alerts_path = alerts_path or state_path(ALERTS_FILENAME)
+        self.record = record
+        self.enabled = _numpy() is not None
+        self.matcher = matcher or get_matcher()
+        self.pending = {}       # tranche -> mentions ajoutées depuis le dernier enregistrement (save() le vide)
+        self.alerts = []
+        self.stats = {'items': 0, 'mentions': 0, 'stale': 0, 'alerts': 0, 'seconds': 0.0}
+        self.sketch = None
+        if not self.enabled:
+            print("⚠️  numpy non installé : détection des tendances désactivée (pip install numpy)")
+            return
+        if self.path != ':memory:':
+            self.sketch = TrendSketch.load(self.path)
+        self.sketch = self.sketch or TrendSketch()
+
+    def tracked(self, key):
+        return not TRACKED_CATEGORIES.isdisjoint(self.matcher.terms[key]['categories'])
+
+    def observe(self, items, now=None):
+        """
+        Compte les mentions du lot (tranche de l'heure de publication, heure courante à défaut)
+        et retourne les alertes levées ; item['_keywords'] reçoit les termes trouvés
+        """
+        if not self.enabled or not items:
+            return []
+        started = time.perf_counter()
+        now = now or time.time()
+        current = int(now // BUCKET_SECONDS)
+        sketch = self.sketch
+        sketch.advance(current)
+
+        found = self.matcher.scan_batch([fold(item.get('content') or '') for item in items])
+        mentions = {}           # tranche -> colonnes des termes mentionnés
+        examples = {}           # terme -> items de la fenêtre qui le mentionnent
+        for item, keys in zip(items, found):
+            item['_keywords'] = keys
+            keys = [key for key in keys if self.tracked(key)]
+            if not keys:
+                continue
+            published = published_timestamp(item.get('published_at'))
+            bucket = current if published is None else min(current, int(published // BUCKET_SECONDS))
+            if bucket < sketch.horizon:
+                self.stats['stale'] += len(keys)     # article ancien : ne compte pas dans la fenêtre
+                continue
+            cells = mentions.setdefault(bucket, [])
+            for key in keys:
+                cells.append(columns(key))
+                examples.setdefault(key, []).append(item)
+        for bucket, cells in mentions.items():
+            cells = np.array(cells, dtype=np.int64)
+            sketch.add(bucket, cells)
+            if bucket not in self.pending:
+                self.pending[bucket] = np.zeros((sketch.depth, sketch.width), dtype=np.uint32)
+            np.add.at(self.pending[bucket], (np.arange(sketch.depth), cells), 1)
+            self.stats['mentions'] += len(cells)
+        self.stats['items'] += len(items)
+
+        alerts = self.detect(list(examples), current, examples) if examples else []
+        self.stats['seconds'] += time.perf_counter() - started
+        return alerts
+
+    def scores(self, keys):
+        """(mentions, mentions attendues, écart réduit z) de chaque terme sur la fenêtre"""
+        cells = np.array([columns(key) for key in keys], dtype=np.int64)
+        observed, mean, variance = self.sketch.estimate(cells)
+        expected = mean * self.sketch.window
+        z = (observed - expected) / np.sqrt(variance * self.sketch.window + 1.0)
+        return observed, expected, z
+
+    def detect(self, keys, current, examples):
+        """Alertes des termes du lot en pic, hors sourdine"""
+        sketch = self.sketch
+        if sketch.history < MIN_HISTORY_BUCKETS:
+            return []
+        observed, expected, z = self.scores(keys)
+        rows = np.arange(sketch.depth)
+        cells = np.array([columns(key) for key in keys], dtype=np.int64)
+        muted = sketch.alerted[rows, cells].min(axis=1) > current - sketch.window
+        bursts = (observed >= MIN_COUNT) & (observed >= MIN_RATIO * expected) & (z >= Z_THRESHOLD) & ~muted
+        alerts = []
+        for index in np.flatnonzero(bursts):
+            key = keys[index]
+            info = self.matcher.terms[key]
+            sketch.alerted[rows, cells[index]] = current
+            alerts.append({
+                'detected_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'keyword': info['keyword'],
+                'categories': [category for category in info['categories'] if category in TRACKED_CATEGORIES],
+                'window_hours': sketch.window * BUCKET_SECONDS / 3600,
+                'count': int(observed[index]),
+                'expected': round(float(expected[index]), 2),
+                'z': round(float(z[index]), 1),
+                'examples': [{'external_id': item.get('external_id'), 'author': item.get('author'),
+                              'content': (item.get('content') or '')[:140]}
+                             for item in examples[key][:MAX_EXAMPLES]],
+            })
+        for alert in alerts:
+            print(f"📈 Pic: '{alert['keyword']}' {alert['count']} mention(s) en {alert['window_hours']:.0f}h "
+                  f"(attendu {alert['expected']:.1f}, z={alert['z']:.1f})")
+            metrics.inc('lynx_trend_alerts_total', keyword=alert['keyword'])
+        if alerts and self.record:
+            with open(self.alerts_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(alert, ensure_ascii=False) + '\n' for alert in alerts))
+        self.alerts.extend(alerts)
+        self.stats['alerts'] += len(alerts)
+        return alerts
+
+    @contextmanager
+    def file_lock(self):
+        """Verrou exclusif entre processus (workers d'une même machine, voir worker.py)"""
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def save(self):
+        """
+        Fusionne les mentions ajoutées depuis le dernier enregistrement avec l'état sur disque
+        (écrit entre-temps par d'autres workers), puis l'écrit
+        """
+        if not self.enabled or not self.record or self.path == ':memory:':
+            return
+        # Tranche courante du dernier lot observé
+        current = (int(time.time() // BUCKET_SECONDS) if self.sketch.horizon is None
+                   else self.sketch.horizon + self.sketch.window - 1)
+        with self.file_lock():
+            merged = TrendSketch.load(self.path)
+            if merged is None:
+                merged = TrendSketch()
+                merged.advance(current)
+            # Tranches rejouées dans l'ordre : chacune entre dans la fenêtre avant d'en sortir vers l'historique
+            for bucket in sorted(self.pending):
+                merged.advance(bucket)
+                if bucket >= merged.horizon:
+                    merged.add(bucket, None, counts=self.pending[bucket])
+                else:
+                    merged.absorb(self.pending[bucket])     # déjà sortie chez un autre worker
+            merged.advance(current)
+            np.maximum(merged.alerted, self.sketch.alerted, out=merged.alerted)
+            merged.write(self.path)
+        self.sketch = merged
+        self.pending = {}
+
+    def report(self):
+        """Ligne de bilan pour la sortie d'exécution"""
+        if not self.enabled:
+            return "📈 Tendances: désactivées (numpy non installé)"
+        rate = self.stats['items'] / self.stats['seconds'] if self.stats['seconds'] else 0
+        warmup = (f", historique {self.sketch.history}h/{MIN_HISTORY_BUCKETS}h avant les premières alertes"
+                  if self.sketch.history < MIN_HISTORY_BUCKETS else "")
+        return (f"📈 Tendances: {self.stats['mentions']} mention(s) comptée(s) ({rate:.0f} items/s), "
+                f"{self.stats['stale']} trop ancienne(s), {self.stats['alerts']} pic(s){warmup}")
+
+
+def recent_alerts(path=None, limit=10):
+    """Dernières alertes enregistrées (les plus récentes en dernier)"""
+    path = path or state_path(ALERTS_FILENAME)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in deque(f, maxlen=limit) if line.strip()]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Lynx Eye - tendances des mots-clés")
+    parser.add_argument('--top', type=int, default=15, help="Termes affichés, par écart réduit décroissant")
+    parser.add_argument('--alerts', type=int, default=10, help="Dernières alertes affichées")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if _numpy() is None:
+        print("❌ numpy non installé (pip install numpy)")
+        return
+    path = state_path(DEFAULT_FILENAME)
+    detector = TrendDetector(path if os.path.exists(path) else ':memory:', record=False)
+    sketch = detector.sketch
+    sketch.advance(int(time.time() // BUCKET_SECONDS))
+    keys = [key for key in detector.matcher.terms if detector.tracked(key)]
+    observed, expected, z = detector.scores(keys)
+    warmup = f" (pas d'alerte avant {MIN_HISTORY_BUCKETS}h d'historique)" if sketch.history < MIN_HISTORY_BUCKETS else ""
+    print(f"📈 Fenêtre {sketch.window}h, historique {sketch.history}h{warmup}, {len(keys)} terme(s) suivi(s)")
+    ranked = sorted((index for index in range(len(keys)) if observed[index]), key=lambda index: -z[index])
+    for index in ranked[:args.top]:
+        print(f"   {detector.matcher.terms[keys[index]]['keyword']:<20} {observed[index]:>6} mention(s)  "
+              f"attendu {expected[index]:>6.1f}  z={z[index]:>5.1f}")
+    alerts = recent_alerts(limit=args.alerts)
+    if alerts:
+        print(f"\n🚨 {len(alerts)} dernière(s) alerte(s):")
+    for alert in alerts:
+        print(f"   {alert['detected_at']}  {alert['keyword']:<20} {alert['count']} mention(s) "
+              f"(attendu {alert['expected']}, z={alert['z']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+URL Helpers for Lynx Eye
+Normalisation des URLs d'articles : les liens DuckDuckGo, les paramètres de
+tracking ou un simple "/" final ne doivent pas faire passer un article pour nouveau
+"""
+
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Paramètres de suivi sans effet sur le contenu
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid',
+    'igshid', 'ref', 'ref_src', 'amp', 'outputtype', 'xtor', 'at_medium', 'at_campaign',
+}
+TRACKING_PREFIXES = ('utm_', 'at_', 'pk_')
+
+# Redirections des moteurs de recherche : l'URL réelle est dans un paramètre
+REDIRECT_PARAMS = {
+    'duckduckgo.com': 'uddg',
+    'www.google.com': 'url',
+    'l.facebook.com': 'u',
+}
+
+
+def unwrap_redirect(url):
+    """Extrait l'URL cible d'un lien de redirection (duckduckgo.com/l/?uddg=...), déjà décodée par parse_qsl"""
+    parts = urlsplit(url)
+    param = REDIRECT_PARAMS.get(parts.netloc.lower())
+    if param:
+        for key, value in parse_qsl(parts.query):
+            if key == param and value:
+                return value
+    return url
+
+
+def normalize_url(url):
+    """
+    Forme canonique d'une URL : cible des redirections, schéma et hôte en minuscules,
+    sans "www.", sans fragment, sans paramètres de tracking, paramètres triés,
+    sans "/" final. Les identifiants qui ne sont pas des URLs sont retournés tels quels.
+    """
+    url = (url or '').strip()
+    if '://' not in url:
+        return url
+
+    parts = urlsplit(unwrap_redirect(url))
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if host.endswith(':80') or host.endswith(':443'):
+        host = host.rsplit(':', 1)[0]
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit(('https' if parts.scheme in ('http', 'https') else parts.scheme,
+                       host, path, urlencode(query), ''))
@@ -9,148 +9,432 @@ pip install supabase duckduckgo-search youtube-search-python python-dotenv
 """
 
 import os
-import sys
+import time
 import random
+import argparse
 from datetime import datetime
-from dotenv import load_dotenv
-from supabase import create_client
-from duckduckgo_search import DDGS
-from youtubesearchpython import VideosSearch
+from itertools import chain
+import metrics
+from state import state_path
+from search_executor import SearchExecutor, DEFAULT_MAX_WORKERS, DEFAULT_RATE
+from health import HealthStore, CircuitOpenError, BACKEND_FAILURE_THRESHOLD, DEFAULT_FILENAME as HEALTH_FILENAME
+# Pipeline, spool, score, planificateur... (et donc keywords.py via matcher.py) : importés
+# dans main() ; les sources (iter_web_news, iter_youtube) restent utilisables par les workers
+# et le daemon, avec le repli ci-dessous si keywords.py est absent
 
 # Importer le module keywords
 try:
     from keywords import get_daily_keywords, generate_search_queries, PRIORITY_KEYWORDS
+    from matcher import get_context_matcher
+    
+    def is_gabon_context(text):
+        return get_context_matcher().matches(text)
 except ImportError:
     print("⚠️  keywords.py non trouvé, utilisation de mots-clés de base")
     PRIORITY_KEYWORDS = ["gabon", "oligui", "libreville"]
     get_daily_keywords = lambda count: PRIORITY_KEYWORDS
     generate_search_queries = lambda kw, max_q: kw
+    is_gabon_context = lambda text: 'gabon' in text.lower()
 
-load_dotenv()
-
-# Configuration Supabase
-SUPABASE_URL = os.getenv('SUPABASE_URL')
-SUPABASE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("❌ Erreur: Variables SUPABASE_URL et SUPABASE_SERVICE_ROLE_KEY requises dans .env")
-    sys.exit(1)
+def ddg_text(ddgs, query, max_results):
+    """Une recherche DuckDuckGo sur la session partagée"""
+    return list(ddgs.text(query, max_results=max_results))
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+def web_items(search_results, query=None):
+    """Convertit des résultats DuckDuckGo en items, hors contexte gabonais exclus (query : requête d'origine)"""
+    items = []
+    metrics.inc('lynx_filter_entries_total', len(search_results), collector='web', source='ddg')
+    for result in search_results:
+        if is_gabon_context(f"{result.get('title', '')} {result.get('body', '')}"):
+            items.append({
+                'content': f"{result.get('title', '')} - {result.get('body', '')}",
+                'author': result.get('link', 'Unknown'),
+                'external_id': result.get('link', ''),
+                'published_at': datetime.now().isoformat(),
+                '_collector': 'web',
+                '_query': query
+            })
+    metrics.inc('lynx_filter_matches_total', len(items), collector='web', source='ddg')
+    return items
 
-def scrape_web_news(queries, max_results_per_query=3):
-    """Scrape web news using DuckDuckGo avec rotation intelligente"""
-    results = []
+def iter_web_news(queries, max_results_per_query=3, max_workers=DEFAULT_MAX_WORKERS, rate=DEFAULT_RATE,
+                  cache=None, budget=None, session_factory=None, planner=None, health=None):
+    """
+    Source web du pipeline : génère les items DuckDuckGo au fil des réponses
+    Les requêtes partent en parallèle sur une seule session DDGS, sous limiteur de débit
+    Avec un cache, les requêtes récentes sont servies localement et seules `budget`
+    requêtes non cachées partent sur le réseau
+    session_factory : client de recherche (DDGS par défaut, importé à la demande)
+    planner : QueryPlanner auquel chaque requête réseau est signalée
+    health : HealthStore ; disjoncteur ouvert = aucune requête réseau, moteur lent = moitié des workers
+    """
+    if session_factory is None:
+        from duckduckgo_search import DDGS as session_factory
+    pending = list(queries)
     
-    print(f"🌐 Scraping Web pour {len(queries)} requêtes...")
+    if cache is not None:
+        pending = []
+        for query in queries:
+            cached = cache.get('ddg', query, max_results_per_query)
+            if cached is None:
+                pending.append(query)
+            else:
+                metrics.inc('lynx_search_total', backend='ddg', status='cache')
+                yield from web_items(cached)
+        print(f"🗄  {len(queries) - len(pending)} requête(s) web servie(s) par le cache")
+    if budget is not None:
+        pending = pending[:budget]
     
-    for i, query in enumerate(queries, 1):
-        try:
-            with DDGS() as ddgs:
-                search_results = list(ddgs.text(query, max_results=max_results_per_query))
-                
-                for result in search_results:
-                    # Filtrer les résultats hors contexte gabonais
-                    if 'gabon' in result.get('body', '').lower() or 'gabon' in result.get('title', '').lower():
-                        results.append({
-                            'content': f"{result.get('title', '')} - {result.get('body', '')}",
-                            'author': result.get('link', 'Unknown'),
-                            'external_id': result.get('link', ''),
-                            'published_at': datetime.now().isoformat()
-                        })
-                
-            print(f"  [{i}/{len(queries)}] {query}: {len(search_results)} résultats")
-                
-        except Exception as e:
-            print(f"  ✗ Erreur pour '{query}': {e}")
+    if health is not None and pending:
+        if not health.allow('backend', 'ddg'):
+            print(f"⏸  DuckDuckGo: disjoncteur ouvert, {health.describe('backend', 'ddg')}")
+            return
+        max_workers = health.workers('backend', 'ddg', max_workers)
+    executor = SearchExecutor(ddg_text, session_factory=session_factory, max_workers=max_workers, rate=rate,
+                              backend='ddg', health=health)
     
-    return results
-
-def scrape_youtube(queries, max_results_per_query=2):
-    """Scrape YouTube videos avec filtre Gabon"""
-    results = []
+    print(f"🌐 Scraping Web pour {len(pending)} requêtes ({max_workers} workers, {rate} req/s)...")
     
+    # Sonde d'un disjoncteur ouvert : une première requête seule ; si elle échoue, les
+    # suivantes sont refusées sans requête réseau
+    if health is not None and health.is_probing('backend', 'ddg'):
+        results = chain(executor.run(pending[:1], max_results_per_query),
+                        executor.run(pending[1:], max_results_per_query))
+    else:
+        results = executor.run(pending, max_results_per_query)
+    
+    refused = 0
+    for i, (query, search_results, error) in enumerate(results, 1):
+        if isinstance(error, CircuitOpenError):
+            refused += 1
+            continue
+        if planner is not None:
+            planner.requested(query, 'web')
+        if error:
+            print(f"  ✗ Erreur pour '{query}': {error}")
+            continue
+        
+        if cache is not None:
+            cache.put('ddg', query, max_results_per_query, search_results)
+        print(f"  [{i}/{len(pending)}] {query}: {len(search_results)} résultats")
+        # Filtrer les résultats hors contexte gabonais
+        yield from web_items(search_results, query=query)
+    
+    stats = executor.stats
+    print(f"  {stats['requests']} requête(s) DuckDuckGo, {stats['rate_limited']} rate limiting, "
+          f"{stats['errors']} erreur(s) réessayée(s)")
+    if refused:
+        print(f"  ⏸  {refused} requête(s) non envoyée(s) : disjoncteur DuckDuckGo ouvert")
+
+def scrape_web_news(queries, max_results_per_query=3, max_workers=DEFAULT_MAX_WORKERS, rate=DEFAULT_RATE,
+                    cache=None, budget=None, session_factory=None):
+    """Scrape web news using DuckDuckGo et retourne la liste complète des items"""
+    return list(iter_web_news(queries, max_results_per_query=max_results_per_query, max_workers=max_workers,
+                              rate=rate, cache=cache, budget=budget, session_factory=session_factory))
+
+def iter_youtube(queries, max_results_per_query=2, cache=None, videos_search=None, planner=None, health=None):
+    """
+    Source YouTube du pipeline, avec filtre Gabon (requêtes récentes servies par le cache)
+    videos_search : classe de recherche (VideosSearch par défaut, importée à la demande)
+    health : HealthStore ; les requêtes réseau s'arrêtent dès que le disjoncteur YouTube est ouvert
+    """
+    if videos_search is None:
+        from youtubesearchpython import VideosSearch as videos_search
     print(f"📺 Scraping YouTube pour {len(queries)} requêtes...")
+    network = health is None or health.allow('backend', 'youtube')
+    if not network:
+        print(f"⏸  YouTube: disjoncteur ouvert, {health.describe('backend', 'youtube')} (cache seul)")
     
     for i, query in enumerate(queries, 1):
+        results = []
         try:
             # Ajouter "Gabon" si pas déjà présent
             search_query = query if 'gabon' in query.lower() else f"{query} Gabon"
             
-            videos_search = VideosSearch(search_query, limit=max_results_per_query)
-            search_results = videos_search.result()
+            videos = cache.get('youtube', search_query, max_results_per_query) if cache is not None else None
+            source = "cache"
+            if videos is None:
+                if not network or (health is not None and health.is_open('backend', 'youtube')):
+                    continue
+                started = time.perf_counter()
+                try:
+                    videos = videos_search(search_query, limit=max_results_per_query).result().get('result', [])
+                except Exception as e:
+                    if health is not None:
+                        health.failure('backend', 'youtube', e, time.perf_counter() - started,
+                                       threshold=BACKEND_FAILURE_THRESHOLD)
+                    raise
+                finally:
+                    metrics.observe('lynx_search_seconds', time.perf_counter() - started, backend='youtube')
+                if health is not None:
+                    health.success('backend', 'youtube', time.perf_counter() - started)
+                source = "réseau"
+                if planner is not None:
+                    planner.requested(query, 'youtube')
+                if cache is not None:
+                    cache.put('youtube', search_query, max_results_per_query, videos)
             
-            for video in search_results.get('result', []):
+            for video in videos:
                 results.append({
                     'content': f"{video.get('title', '')} - {video.get('descriptionSnippet', [{}])[0].get('text', '')}",
                     'author': video.get('channel', {}).get('name', 'Unknown'),
                     'external_id': video.get('id', ''),
-                    'published_at': datetime.now().isoformat()
+                    'published_at': datetime.now().isoformat(),
+                    '_collector': 'youtube',
+                    '_query': query if source == "réseau" else None
                 })
             
-            print(f"  [{i}/{len(queries)}] {search_query}: {len(search_results.get('result', []))} vidéos")
+            metrics.inc('lynx_search_total', backend='youtube', status='cache' if source == "cache" else 'ok')
+            print(f"  [{i}/{len(queries)}] {search_query}: {len(videos)} vidéos ({source})")
                 
         except Exception as e:
+            metrics.inc('lynx_search_total', backend='youtube', status='error')
             print(f"  ✗ Erreur pour '{query}': {e}")
-    
-    return results
+        
+        yield from results
 
-def save_to_supabase(items):
-    """Save items to Supabase intelligence_items table"""
-    saved_count = 0
-    
-    for item in items:
-        try:
-            # Upsert (insert or update if external_id exists)
-            supabase.table('intelligence_items').upsert(item, on_conflict='external_id').execute()
-            saved_count += 1
-        except Exception as e:
-            print(f"  ✗ Erreur sauvegarde: {e}")
+def scrape_youtube(queries, max_results_per_query=2, cache=None, videos_search=None):
+    """Scrape YouTube videos et retourne la liste complète des items"""
+    return list(iter_youtube(queries, max_results_per_query=max_results_per_query, cache=cache,
+                             videos_search=videos_search))
+
+def web_sources(max_queries=15, workers=DEFAULT_MAX_WORKERS, rate=DEFAULT_RATE, cache=None,
+                web=True, youtube=True, planner=None, health=None):
+    """
+    Sources web et YouTube du pipeline pour une exécution :
+    requêtes choisies par le planificateur (rendement observé), sinon mots-clés du jour tirés au hasard
+    """
+    # Avec le cache, on génère plus de candidats : les requêtes cachées ne consomment
+    # pas de budget, qui revient aux requêtes non vues
+    pool_size = max_queries if cache is None else max_queries * 3
+    if planner is not None:
+        print("🎰 Planification des requêtes selon leur rendement...")
+        search_queries = planner.plan(pool_size, 'web') if web else []
+        youtube_queries = planner.plan(5, 'youtube') if youtube else []
+    else:
+        # Sélection intelligente des mots-clés
+        print("🎯 Sélection des mots-clés du jour...")
+        daily_keywords = get_daily_keywords(count=20)
+        print(f"   Keywords sélectionnés: {len(daily_keywords)}")
+        print(f"   Prioritaires: {', '.join(PRIORITY_KEYWORDS[:5])}...")
+        print()
+        
+        # Génération des requêtes optimisées
+        print("🔧 Génération des requêtes de recherche...")
+        search_queries = generate_search_queries(daily_keywords, max_queries=pool_size)
+        youtube_queries = random.sample(search_queries, min(5, len(search_queries)))
+    print(f"   Requêtes générées: {len(search_queries)}")
+    print(f"   Exemples: {', '.join(search_queries[:3])}...")
+    print()
     
-    return saved_count
+    sources = {}
+    if web:
+        sources['web'] = lambda: iter_web_news(search_queries, max_results_per_query=3, max_workers=workers,
+                                               rate=rate, cache=cache, budget=max_queries, planner=planner,
+                                               health=health)
+    if youtube:
+        sources['youtube'] = lambda: iter_youtube(youtube_queries, max_results_per_query=2, cache=cache,
+                                                  planner=planner, health=health)
+    return sources
+
+DEFAULT_FLUSH_TIMEOUT = 120
+METRICS_FILENAME = 'metrics_web.prom'
+
+def start_flusher(seen_index=True):
+    """Démarre le vidage du spool en arrière-plan (y compris les items laissés par une exécution précédente)"""
+    from spool import SpoolFlusher
+    from seen_index import SeenIndex
+    from clients import get_supabase
 
-def main():
+    # Client Supabase créé dans le thread de vidage : la collecte démarre sans l'attendre
+    flusher = SpoolFlusher(client_factory=get_supabase, seen_index_factory=SeenIndex if seen_index else None)
+    flusher.start()
+    return flusher
+
+def parse_args(argv=None):
+    from query_cache import DEFAULT_TTLS
+    from query_planner import RELEVANT_SCORE
+
+    parser = argparse.ArgumentParser(description="Lynx Eye - Web Intelligence Scraper")
+    parser.add_argument('--max-queries', type=int, default=15,
+                        help="Nombre de requêtes web générées")
+    parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS,
+                        help="Requêtes DuckDuckGo simultanées")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help="Débit maximal de requêtes DuckDuckGo par seconde")
+    parser.add_argument('--no-query-cache', action='store_true',
+                        help="Désactive le cache local des résultats de recherche")
+    parser.add_argument('--ddg-ttl', type=float, default=DEFAULT_TTLS['ddg'],
+                        help="Durée de validité du cache DuckDuckGo (heures)")
+    parser.add_argument('--youtube-ttl', type=float, default=DEFAULT_TTLS['youtube'],
+                        help="Durée de validité du cache YouTube (heures)")
+    parser.add_argument('--no-spool', action='store_true',
+                        help="Enregistrer directement dans Supabase, sans file locale")
+    parser.add_argument('--flush-timeout', type=float, default=DEFAULT_FLUSH_TIMEOUT,
+                        help="Durée maximale de vidage du spool en fin d'exécution (secondes)")
+    parser.add_argument('--skip-web', action='store_true', help="Ne pas interroger DuckDuckGo")
+    parser.add_argument('--skip-youtube', action='store_true', help="Ne pas interroger YouTube")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Collecter et afficher les items sans rien enregistrer (ni Supabase, ni état local)")
+    parser.add_argument('--min-score', type=float, default=0.0,
+                        help="Score de pertinence minimal (0-100) pour enregistrer un item")
+    parser.add_argument('--top-k', type=int, default=None,
+                        help="Ne garder que les k items les mieux notés de chaque lot du pipeline "
+                             "(jusqu'à 100 items ou 2s de collecte), pas de toute l'exécution")
+    parser.add_argument('--no-scoring', action='store_true',
+                        help="Ne pas calculer de score de pertinence (colonne relevance_score)")
+    parser.add_argument('--no-trends', action='store_true',
+                        help="Ne pas surveiller les pics de mots-clés (trends.py)")
+    parser.add_argument('--no-archive', action='store_true',
+                        help="Ne pas ajouter les items à l'archive locale (archive.py, Parquet)")
+    parser.add_argument('--no-planner', action='store_true',
+                        help="Tirer les mots-clés au hasard au lieu de planifier selon le rendement des requêtes")
+    parser.add_argument('--no-health', action='store_true',
+                        help="Ignorer les disjoncteurs des moteurs de recherche (health.py)")
+    parser.add_argument('--relevant-score', type=float, default=RELEVANT_SCORE,
+                        help="Score minimal d'un item compté dans le rendement d'une requête")
+    parser.add_argument('--metrics-file', default=None,
+                        help=f"Fichier de métriques Prometheus (défaut: .state/{METRICS_FILENAME})")
+    parser.add_argument('--profile', action='store_true',
+                        help="Profiler l'exécution (CPU et mémoire par module)")
+    parser.add_argument('--profile-output', default=None,
+                        help="Fichier pstats du profil (avec --profile)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    from seen_index import SeenIndex
+    from dedup import StoryClusterer
+    from query_cache import QueryCache
+    from spool import Spool
+    from pipeline import (Pipeline, SpoolSink, SupabaseSink, PrintSink, dedup_stage, scoring_stage, reward_stage,
+                          trend_stage, archive_stage)
+    from scoring import RelevanceScorer
+    from query_planner import QueryPlanner, DEFAULT_FILENAME as PLANNER_FILENAME
+    from clients import get_supabase
+    from trends import TrendDetector, DEFAULT_FILENAME as TRENDS_FILENAME
+
+    args = parse_args(argv)
+    started = time.time()
+    metrics.REGISTRY.reset()
+    profiler = metrics.Profiler().start() if args.profile else None
+    if args.dry_run:
+        args.no_spool = args.no_query_cache = args.no_archive = True
+    
     print("=" * 60)
     print("🦅 LYNX EYE - WEB INTELLIGENCE SCRAPER")
     print("=" * 60)
     print(f"⏰ Exécution: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print()
     
-    # Sélection intelligente des mots-clés
-    print("🎯 Sélection des mots-clés du jour...")
-    daily_keywords = get_daily_keywords(count=20)
-    print(f"   Keywords sélectionnés: {len(daily_keywords)}")
-    print(f"   Prioritaires: {', '.join(PRIORITY_KEYWORDS[:5])}...")
-    print()
+    flusher = None if args.no_spool else start_flusher()
     
-    # Génération des requêtes optimisées
-    print("🔧 Génération des requêtes de recherche...")
-    search_queries = generate_search_queries(daily_keywords, max_queries=15)
-    print(f"   Requêtes générées: {len(search_queries)}")
-    print(f"   Exemples: {', '.join(search_queries[:3])}...")
-    print()
+    cache = None if args.no_query_cache else QueryCache(
+        ttls={'ddg': args.ddg_ttl, 'youtube': args.youtube_ttl})
     
-    # Scraping Web
-    web_results = scrape_web_news(search_queries, max_results_per_query=3)
-    print(f"✓ Web: {len(web_results)} items collectés")
-    print()
+    # En dry-run, l'historique existant guide la planification mais rien n'est enregistré
+    planner = None
+    if not args.no_planner:
+        planner_path = state_path(PLANNER_FILENAME)
+        planner = QueryPlanner(':memory:' if args.dry_run and not os.path.exists(planner_path) else planner_path)
+    health = None
+    if not args.no_health:
+        health_path = state_path(HEALTH_FILENAME)
+        health = HealthStore(':memory:' if args.dry_run and not os.path.exists(health_path) else health_path)
     
-    # Scraping YouTube
-    youtube_queries = random.sample(search_queries, min(5, len(search_queries)))
-    youtube_results = scrape_youtube(youtube_queries, max_results_per_query=2)
-    print(f"✓ YouTube: {len(youtube_results)} items collectés")
-    print()
+    # Pipeline : recherches web et YouTube en parallèle → regroupement des reprises → spool
+    clusterer = None if args.dry_run else StoryClusterer()
+    spool = None
+    if flusher is not None:
+        spool = Spool()
+        sink = SpoolSink(spool, flusher)
+    elif args.dry_run:
+        sink = PrintSink()
+    else:
+        sink = SupabaseSink(get_supabase(), seen_index=SeenIndex())
     
-    # Sauvegarde dans Supabase
-    all_results = web_results + youtube_results
+    # Pipeline : recherches → regroupement des reprises → score de pertinence → sink
+    scorer = None if args.no_scoring else RelevanceScorer()
+    stages = [dedup_stage(clusterer)] if clusterer else []
+    if scorer is not None:
+        stages.append(scoring_stage(scorer, min_score=args.min_score, top_k=args.top_k))
+    if planner is not None:
+        stages.append(reward_stage(planner, min_score=args.relevant_score))
+    trends = None
+    if not args.no_trends:
+        trends_path = state_path(TRENDS_FILENAME)
+        trends = TrendDetector(':memory:' if args.dry_run and not os.path.exists(trends_path) else trends_path,
+                               record=not args.dry_run)
+        if trends.enabled:
+            stages.append(trend_stage(trends))
+    archive = None
+    if not args.no_archive:
+        from archive import ArchiveWriter   # pyarrow : chargé seulement si l'archive est utilisée
+        archive = ArchiveWriter()
+    if archive is not None and archive.enabled:
+        stages.append(archive_stage(archive))
+    pipeline = Pipeline(sink, stages=stages)
+    try:
+        pipeline.run(web_sources(args.max_queries, workers=args.workers, rate=args.rate, cache=cache,
+                                 web=not args.skip_web, youtube=not args.skip_youtube, planner=planner,
+                                 health=health))
+        if planner is not None and not args.dry_run:
+            planner.save()
+        if health is not None and not args.dry_run:
+            health.save()
+        if trends is not None:
+            trends.save()
+    finally:
+        if planner is not None:
+            planner.close()
+        if health is not None:
+            health.close()
+        if clusterer is not None:
+            clusterer.close()
+        if spool is not None:
+            spool.close()
+        if archive is not None:
+            archive.close()
+        if cache is not None:
+            print(cache.report())
+            cache.close()
     
-    if all_results:
-        print(f"💾 Enregistrement dans Supabase...")
-        saved = save_to_supabase(all_results)
-        print(f"✅ {saved}/{len(all_results)} items sauvegardés avec succès")
+    sources = pipeline.stats['sources']
+    if 'web' in sources:
+        print(f"✓ Web: {sources['web']['items']} items collectés")
+    if 'youtube' in sources:
+        print(f"✓ YouTube: {sources['youtube']['items']} items collectés")
+    print()
+    print(pipeline.report())
+    if clusterer is not None:
+        print(f"📚 Histoires: {clusterer.stats['items']} items, {clusterer.stats['new_stories']} nouvelle(s), "
+              f"{clusterer.stats['merged']} reprise(s) regroupée(s)")
+    if scorer is not None:
+        print(scorer.report())
+    if planner is not None:
+        print(planner.report())
+    if health is not None:
+        print(health.report())
+    if trends is not None:
+        print(trends.report())
+    if archive is not None:
+        print(archive.report())
+    if pipeline.stats['sunk']:
+        print(sink.report())
     else:
         print("⚠️  Aucun résultat à sauvegarder")
     
+    if flusher is not None:
+        print(f"⏳ Vidage du spool (max {args.flush_timeout:.0f}s)...")
+        flusher.stop(timeout=args.flush_timeout)
+        print(flusher.report())
+    
+    metrics.record_run('web', started)
+    print(metrics.stage_report())
+    if not args.dry_run:
+        metrics.write_textfile(args.metrics_file or state_path(METRICS_FILENAME))
+    if profiler is not None:
+        print(profiler.stop(args.profile_output))
+    
     print()
     print("=" * 60)
     print("✅ SCRAPING TERMINÉ")
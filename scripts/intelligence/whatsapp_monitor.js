@@ -5,6 +5,13 @@
  * Il se connecte à WhatsApp via QR Code et écoute les messages des groupes.
  * Les messages pertinents sont envoyés à Supabase.
  * 
+ * Les messages sont classés par lots par le service Python local
+ * (classifier_service.py, vocabulaire de keywords.py) : un lot part dès BATCH_SIZE
+ * messages ou après BATCH_DELAY_MS. Si le service ne répond pas, la regex
+ * FALLBACK_KEYWORDS prend le relais pour le lot.
+ * Chaque lot est enregistré en un upsert sur external_id : un message déjà connu
+ * (redémarrage, message relu) est ignoré sans faire échouer le reste du lot.
+ * 
  * Installation:
  * npm install whatsapp-web.js qrcode-terminal @supabase/supabase-js dotenv
  */
@@ -19,8 +26,20 @@ const supabaseUrl = process.env.SUPABASE_URL;
 const supabaseKey = process.env.SUPABASE_SERVICE_ROLE_KEY; // Utiliser la clé Service Role pour écrire
 const supabase = createClient(supabaseUrl, supabaseKey);
 
-// Mots-clés à surveiller (Regex)
-const KEYWORDS = /gabon|libreville|oligui|ctri|grève|économie|route|décret|coupure|eau|seeg/i;
+// Service de classification (python classifier_service.py)
+const CLASSIFIER_URL = process.env.CLASSIFIER_URL || 'http://127.0.0.1:8470/classify';
+const CLASSIFIER_TIMEOUT_MS = 2000;
+const BATCH_SIZE = 50;
+const BATCH_DELAY_MS = 200;
+const SAVE_ATTEMPTS = 3;
+const SAVE_BACKOFF_MS = 1000;
+
+// Mots-clés de secours si le service est indisponible (Regex)
+const FALLBACK_KEYWORDS = /gabon|libreville|oligui|ctri|grève|économie|route|décret|coupure|eau|seeg/i;
+
+let queue = [];
+let flushTimer = null;
+let fallbackActive = false;
 
 // Initialisation du client WhatsApp
 const client = new Client({
@@ -41,6 +60,104 @@ client.on('ready', () => {
     console.log('Listening for messages...');
 });
 
+// Classe un lot via le service ; null si le service est indisponible
+async function classifyBatch(batch) {
+    try {
+        const response = await fetch(CLASSIFIER_URL, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ messages: batch.map(({ msg }) => ({ id: msg.id.id, text: msg.body })) }),
+            signal: AbortSignal.timeout(CLASSIFIER_TIMEOUT_MS)
+        });
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        const { results } = await response.json();
+        if (fallbackActive) {
+            console.log('✅ Service de classification rétabli');
+            fallbackActive = false;
+        }
+        return results;
+    } catch (err) {
+        if (!fallbackActive) {
+            console.error(`⚠️ Service de classification indisponible (${err.message}), regex de secours`);
+            fallbackActive = true;
+        }
+        return null;
+    }
+}
+
+// Upsert d'un lot (doublons ignorés), réessayé avec backoff ; retourne l'erreur définitive ou null
+async function saveRows(rows) {
+    let lastError = null;
+    for (let attempt = 1; attempt <= SAVE_ATTEMPTS; attempt++) {
+        try {
+            const { error } = await supabase
+                .from('intelligence_items')
+                .upsert(rows, { onConflict: 'external_id', ignoreDuplicates: true });
+            if (!error) return null;
+            lastError = error;
+        } catch (err) {
+            lastError = err;
+        }
+        if (attempt < SAVE_ATTEMPTS) {
+            console.error(`⚠️ Erreur Supabase (tentative ${attempt}/${SAVE_ATTEMPTS}): ${lastError.message || lastError}`);
+            await new Promise((resolve) => setTimeout(resolve, SAVE_BACKOFF_MS * 2 ** (attempt - 1)));
+        }
+    }
+    return lastError;
+}
+
+async function flushQueue() {
+    clearTimeout(flushTimer);
+    flushTimer = null;
+    const batch = queue;
+    queue = [];
+    if (batch.length === 0) return;
+
+    const results = (await classifyBatch(batch)) ||
+        batch.map(({ msg }) => ({ relevant: FALLBACK_KEYWORDS.test(msg.body), keywords: [], priority: false }));
+
+    const rows = [];
+    batch.forEach(({ msg, chat }, i) => {
+        const result = results[i];
+        if (!result || !result.relevant) return;
+        console.log(`🚨 Message pertinent détecté dans ${chat.name}${result.priority ? ' (prioritaire)' : ''}`);
+
+        // Anonymisation basique de l'auteur
+        const authorHash = Buffer.from(msg.author || msg.from).toString('base64').substring(0, 10);
+        const keywords = result.keywords.length ? ` — mots-clés: ${result.keywords.join(', ')}` : '';
+
+        rows.push({
+            source_id: null, // À lier si on gère une table de sources dynamique
+            external_id: msg.id.id,
+            content: msg.body,
+            author: `whatsapp_user_${authorHash}`,
+            category: 'rumeur', // Sera re-qualifié par l'IA
+            summary: `Message du groupe ${chat.name}${keywords}`, // Sera écrasé par l'IA
+            published_at: new Date(msg.timestamp * 1000).toISOString()
+        });
+    });
+    if (rows.length === 0) return;
+
+    // Envoi vers Supabase (un upsert par lot)
+    const error = await saveRows(rows);
+    if (error) {
+        const ids = rows.map((row) => row.external_id).join(', ');
+        console.error(`❌ Lot de ${rows.length} message(s) non sauvegardé(s) [${ids}]:`, error);
+    } else {
+        console.log(`✅ ${rows.length} message(s) sauvegardé(s) dans Supabase`);
+    }
+}
+
+function scheduleFlush() {
+    if (queue.length >= BATCH_SIZE) {
+        flushQueue().catch((err) => console.error('Erreur de traitement du lot:', err));
+    } else if (!flushTimer) {
+        flushTimer = setTimeout(() => {
+            flushQueue().catch((err) => console.error('Erreur de traitement du lot:', err));
+        }, BATCH_DELAY_MS);
+    }
+}
+
 client.on('message', async (msg) => {
     try {
         // Ignorer les statuts et les messages médias sans texte
@@ -51,32 +168,8 @@ client.on('message', async (msg) => {
 
         // On s'intéresse surtout aux groupes
         if (chat.isGroup) {
-            // Vérifier si le message contient des mots-clés
-            if (KEYWORDS.test(msg.body)) {
-                console.log(`🚨 Message pertinent détecté dans ${chat.name}`);
-
-                // Anonymisation basique de l'auteur
-                const authorHash = Buffer.from(msg.author || msg.from).toString('base64').substring(0, 10);
-
-                // Envoi vers Supabase
-                const { data, error } = await supabase
-                    .from('intelligence_items')
-                    .insert({
-                        source_id: null, // À lier si on gère une table de sources dynamique
-                        external_id: msg.id.id,
-                        content: msg.body,
-                        author: `whatsapp_user_${authorHash}`,
-                        category: 'rumeur', // Sera re-qualifié par l'IA
-                        summary: `Message du groupe ${chat.name}`, // Sera écrasé par l'IA
-                        published_at: new Date(msg.timestamp * 1000).toISOString()
-                    });
-
-                if (error) {
-                    console.error('❌ Erreur Supabase:', error);
-                } else {
-                    console.log('✅ Sauvegardé dans Supabase');
-                }
-            }
+            queue.push({ msg, chat });
+            scheduleFlush();
         }
     } catch (err) {
         console.error('Erreur de traitement:', err);
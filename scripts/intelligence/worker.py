@@ -0,0 +1,387 @@
+"""
+Lynx Eye Worker
+Collecte répartie entre plusieurs processus ou machines, par baux sur des unités de travail
+
+Chaque cycle (tranche de --cycle-minutes, commune à tous les workers) est découpé en
+unités : un flux RSS de PRESS_URLS, un site sans flux RSS (html_crawler.py), une
+requête web, une requête YouTube. Le premier
+worker du cycle les publie dans la table de baux (leases.py) — requêtes choisies par le
+planificateur, une seule fois pour tout le cycle — puis chaque worker prend des lots
+d'unités libres, les collecte dans son propre pipeline (regroupement, score, spool) et
+les marque terminées. Les baux détenus sont renouvelés pendant le traitement ; ceux
+d'un worker arrêté brutalement expirent et ses unités sont reprises par un autre.
+Un worker s'arrête quand toutes les unités du cycle sont terminées.
+
+--processes N lance N workers sur la machine ; le processus parent vide le spool
+vers Supabase et regroupe les métriques des workers dans .state/metrics_worker.prom
+(chaque worker lui transmet son registre en fin de cycle). Pour répartir sur plusieurs machines, lancer worker.py sur chacune
+avec une table de baux commune (LYNX_STATE_DIR sur un partage).
+
+Usage:
+python worker.py --processes 4
+python worker.py --processes 2 --batch 4 --lease-ttl 120
+"""
+
+import os
+import time
+import queue
+import random
+import signal
+import socket
+import argparse
+import threading
+import traceback
+import multiprocessing
+from datetime import datetime
+
+import metrics
+from state import state_path
+from leases import LeaseTable, cycle_id, DEFAULT_TTL, DEFAULT_CYCLE_MINUTES, PENDING, LEASED, DONE, FAILED
+from sources import get_rss_sources, get_html_sources
+from fetcher import DEFAULT_MAX_WORKERS, DEFAULT_TIMEOUT, DEFAULT_DEADLINE
+from html_crawler import DEFAULT_MAX_LINKS
+
+DEFAULT_PROCESSES = 1
+DEFAULT_BATCH = 8              # unités prises par bail
+DEFAULT_FLUSH_TIMEOUT = 120
+YOUTUBE_QUERIES = 5
+METRICS_FILENAME = 'metrics_worker.prom'
+IDLE_POLL = 1.0                # attente quand toutes les unités restantes sont sous bail (secondes)
+
+
+def cycle_units(max_queries=15, planner=None, feeds=True, html=True, web=True, youtube=True):
+    """Unités d'un cycle : (id, type, données), dans l'ordre de distribution"""
+    from keywords import get_daily_keywords, generate_search_queries
+
+    units = []
+    if feeds:
+        units += [(f"feed:{url}", 'feed', [category, name, url]) for category, name, url in get_rss_sources()]
+    if html:
+        units += [(f"html:{url}", 'html', [category, name, url]) for category, name, url in get_html_sources()]
+    if planner is not None:
+        web_queries = planner.plan(max_queries, 'web') if web else []
+        youtube_queries = planner.plan(YOUTUBE_QUERIES, 'youtube') if youtube else []
+    else:
+        web_queries = generate_search_queries(get_daily_keywords(count=20), max_queries=max_queries)
+        youtube_queries = random.sample(web_queries, min(YOUTUBE_QUERIES, len(web_queries))) if youtube else []
+        web_queries = web_queries if web else []
+    for backend, queries in (('web', web_queries), ('youtube', youtube_queries)):
+        for query in queries:
+            arm = planner.arm(query, backend) if planner is not None else None
+            units.append((f"{backend}:{query}", backend, {'query': query, 'arm': arm}))
+    return units
+
+
+class Worker:
+    """Un worker : prend des lots d'unités sous bail et les collecte jusqu'à la fin du cycle"""
+
+    def __init__(self, args, name='w1'):
+        from rss_scraper import iter_rss_items
+        from html_crawler import iter_html_items, CrawlState
+        from web_scraper import iter_web_news, iter_youtube
+        from feed_state import FeedStateStore
+        from dedup import StoryClusterer
+        from spool import Spool
+        from scoring import RelevanceScorer
+        from health import HealthStore
+        from query_cache import QueryCache
+        from query_planner import QueryPlanner
+        from pipeline import SpoolSink
+        from archive import ArchiveWriter
+        from trends import TrendDetector
+
+        self.args = args
+        self.name = name
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.iter_rss_items = iter_rss_items
+        self.iter_html_items = iter_html_items
+        self.iter_web_news = iter_web_news
+        self.iter_youtube = iter_youtube
+        self.stop_event = threading.Event()
+        self.leases = LeaseTable(ttl=args.lease_ttl)
+        self.feed_state = FeedStateStore()
+        # État de crawl commun aux workers (SQLite en WAL) : chaque site n'est crawlé que par le titulaire de son unité
+        self.crawl_state = None if args.skip_html else CrawlState()
+        self.spool = Spool()
+        self.sink = SpoolSink(self.spool)
+        self.clusterer = StoryClusterer()
+        self.scorer = RelevanceScorer()
+        self.health = HealthStore()
+        # Chaque worker écrit ses propres fichiers (nom avec pid) : pas de verrou entre workers
+        self.archive = None if args.no_archive else ArchiveWriter()
+        # Mentions fusionnées avec celles des autres workers à chaque enregistrement (trends.py)
+        self.trends = None if args.no_trends else TrendDetector()
+        self.cache = None if args.no_query_cache else QueryCache()
+        # Amortissement appliqué une seule fois par cycle, par le worker qui le publie
+        self.planner = None if args.no_planner else QueryPlanner(discount=1.0)
+        self.held = set()
+        self.stats = {'batches': 0, 'units': 0, 'lost': 0, 'failed': 0, 'items': 0}
+
+    def stages(self):
+        from pipeline import dedup_stage, scoring_stage, reward_stage, trend_stage, archive_stage
+        from query_planner import RELEVANT_SCORE
+
+        stages = [dedup_stage(self.clusterer), scoring_stage(self.scorer, min_score=self.args.min_score)]
+        if self.planner is not None:
+            stages.append(reward_stage(self.planner, RELEVANT_SCORE))
+        if self.trends is not None and self.trends.enabled:
+            stages.append(trend_stage(self.trends))
+        if self.archive is not None and self.archive.enabled:
+            stages.append(archive_stage(self.archive))
+        return stages
+
+    def publish(self, cycle):
+        """Publie les unités du cycle si aucun autre worker ne l'a fait"""
+        from query_planner import QueryPlanner
+
+        planner = None if self.args.no_planner else QueryPlanner()
+        try:
+            units = cycle_units(self.args.max_queries, planner=planner, feeds=not self.args.skip_rss,
+                                html=not self.args.skip_html, web=not self.args.skip_web,
+                                youtube=not self.args.skip_youtube)
+            if self.leases.publish(cycle, units):
+                if planner is not None:
+                    planner.decay(('web', 'youtube'))
+                print(f"🧩 [{self.name}] Cycle {cycle} publié: {len(units)} unité(s)")
+        finally:
+            if planner is not None:
+                planner.close()
+
+    def heartbeat(self, cycle):
+        """Renouvelle les baux détenus tant que le lot est en cours"""
+        while not self.stop_event.wait(self.args.lease_ttl / 3):
+            held = list(self.held)
+            if held:
+                self.leases.renew(cycle, self.owner, held)
+
+    def process(self, units):
+        """Collecte un lot d'unités dans un pipeline"""
+        from pipeline import Pipeline
+
+        feeds = [tuple(payload) for _, kind, payload in units if kind == 'feed']
+        sites = [tuple(payload) for _, kind, payload in units if kind == 'html']
+        queries = {'web': [], 'youtube': []}
+        for _, kind, payload in units:
+            if kind in queries:
+                queries[kind].append(payload['query'])
+                if self.planner is not None and payload.get('arm'):
+                    self.planner.assign(payload['query'], kind, payload['arm'])
+
+        # Histoires enregistrées entre-temps par les autres workers : les reprises y sont rattachées
+        self.clusterer.refresh()
+        sources = {}
+        if feeds:
+            # Watermarks et validateurs écrits entre-temps par les autres workers
+            self.feed_state.load()
+            sources['rss'] = lambda: self.iter_rss_items(
+                max_workers=self.args.workers, timeout=DEFAULT_TIMEOUT, deadline=DEFAULT_DEADLINE,
+                feed_state=self.feed_state, rss_sources=feeds, health=self.health, persist=False
+            )
+        if sites and self.crawl_state is not None:
+            sources['html'] = lambda: self.iter_html_items(
+                self.crawl_state, max_workers=self.args.workers, timeout=DEFAULT_TIMEOUT, deadline=DEFAULT_DEADLINE,
+                html_sources=sites, max_links=self.args.max_links, health=self.health
+            )
+        if queries['web']:
+            sources['web'] = lambda: self.iter_web_news(queries['web'], max_results_per_query=3, cache=self.cache,
+                                                        planner=self.planner, health=self.health)
+        if queries['youtube']:
+            sources['youtube'] = lambda: self.iter_youtube(queries['youtube'], max_results_per_query=2,
+                                                           cache=self.cache, planner=self.planner,
+                                                           health=self.health)
+        pipeline = Pipeline(self.sink, stages=self.stages())
+        pipeline.run(sources)
+        if feeds:
+            self.feed_state.save(urls=[url for _, _, url in feeds])
+        self.health.save()
+        if self.trends is not None:
+            self.trends.save()
+        if self.planner is not None:
+            self.planner.save()
+        self.stats['items'] += pipeline.stats['sunk']
+
+    def run(self, cycle):
+        self.publish(cycle)
+        threading.Thread(target=self.heartbeat, args=(cycle,), name="lease-heartbeat", daemon=True).start()
+        while not self.stop_event.is_set():
+            units = self.leases.acquire(cycle, self.owner, self.args.batch)
+            if not units:
+                progress = self.leases.progress(cycle)
+                if progress[PENDING] or progress['expired']:
+                    continue    # unités abandonnées écartées du lot : il en reste d'autres
+                if not progress[LEASED]:
+                    break
+                # Unités restantes sous bail d'autres workers : reprises si leur bail expire
+                next_expiry = self.leases.next_expiry(cycle) or time.time()
+                self.stop_event.wait(min(IDLE_POLL, max(0.1, next_expiry - time.time())))
+                continue
+            self.held = {unit for unit, _, _ in units}
+            counts = {}
+            for _, kind, _ in units:
+                counts[kind] = counts.get(kind, 0) + 1
+            print(f"\n🧩 [{self.name}] [{datetime.now().strftime('%H:%M:%S')}] {len(units)} unité(s): "
+                  + ", ".join(f"{count} {kind}" for kind, count in counts.items()))
+            try:
+                self.process(units)
+            except Exception as e:
+                # Unités rendues aussitôt : reprises par un worker (ou celui-ci), jusqu'à MAX_ATTEMPTS
+                self.leases.release(cycle, self.owner, list(self.held))
+                self.held = set()
+                self.stats['failed'] += 1
+                print(f"✗ [{self.name}] Lot en échec, {len(units)} unité(s) rendue(s): {e}")
+                traceback.print_exc()
+                continue
+            accepted = self.leases.complete(cycle, self.owner, list(self.held))
+            self.held = set()
+            self.stats['batches'] += 1
+            self.stats['units'] += accepted
+            self.stats['lost'] += len(units) - accepted
+
+    def shutdown(self):
+        self.stop_event.set()
+        self.clusterer.close()
+        self.spool.close()
+        self.health.close()
+        if self.crawl_state is not None:
+            self.crawl_state.close()
+        if self.archive is not None:
+            self.archive.close()
+        if self.cache is not None:
+            self.cache.close()
+        if self.planner is not None:
+            self.planner.close()
+        self.leases.close()
+        print(self.report())
+
+    def report(self):
+        lost = f", {self.stats['lost']} bail(s) perdu(s)" if self.stats['lost'] else ""
+        failed = f", {self.stats['failed']} lot(s) en échec" if self.stats['failed'] else ""
+        return (f"🧩 [{self.name}] {self.stats['units']} unité(s) en {self.stats['batches']} lot(s), "
+                f"{self.stats['items']} item(s) en file{lost}{failed}")
+
+
+def run_worker(args, cycle, name, results=None):
+    """
+    Point d'entrée d'un processus worker
+    results : file (multiprocessing) où un worker enfant dépose ses métriques en fin de cycle
+    """
+    worker = Worker(args, name)
+
+    def stop(signum, frame):
+        print(f"\n🛑 [{name}] Signal {signal.Signals(signum).name} reçu, arrêt après le lot en cours")
+        worker.stop_event.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        worker.run(cycle)
+    finally:
+        worker.shutdown()
+        if results is not None:
+            results.put(metrics.REGISTRY.snapshot())
+
+
+def collect_metrics(results, processes):
+    """Fusionne dans le registre du parent les métriques déposées par les workers enfants"""
+    received = 0
+    while received < len(processes):
+        # Vérifié avant l'attente : un worker terminé a déjà déposé ses métriques
+        alive = any(process.is_alive() for process in processes)
+        try:
+            metrics.REGISTRY.merge(results.get(timeout=IDLE_POLL))
+            received += 1
+        except queue.Empty:
+            if not alive:
+                break
+    return received
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Lynx Eye - workers de collecte répartie")
+    parser.add_argument('--processes', type=int, default=DEFAULT_PROCESSES,
+                        help="Nombre de workers lancés sur cette machine")
+    parser.add_argument('--batch', type=int, default=DEFAULT_BATCH,
+                        help="Unités prises par bail")
+    parser.add_argument('--lease-ttl', type=float, default=DEFAULT_TTL,
+                        help="Durée d'un bail (secondes) avant reprise par un autre worker")
+    parser.add_argument('--cycle', default=None,
+                        help="Identifiant du cycle (par défaut : tranche courante de --cycle-minutes)")
+    parser.add_argument('--cycle-minutes', type=int, default=DEFAULT_CYCLE_MINUTES,
+                        help="Durée d'un cycle (minutes)")
+    parser.add_argument('--max-queries', type=int, default=15,
+                        help="Requêtes web par cycle")
+    parser.add_argument('--workers', type=int, default=DEFAULT_MAX_WORKERS,
+                        help="Flux téléchargés simultanément par worker")
+    parser.add_argument('--min-score', type=float, default=0.0,
+                        help="Score de pertinence minimal (0-100) pour enregistrer un item")
+    parser.add_argument('--skip-rss', action='store_true', help="Pas d'unités RSS")
+    parser.add_argument('--skip-html', action='store_true', help="Pas d'unités de sites sans flux RSS")
+    parser.add_argument('--max-links', type=int, default=DEFAULT_MAX_LINKS,
+                        help="Articles téléchargés au maximum par site sans flux RSS")
+    parser.add_argument('--skip-web', action='store_true', help="Pas d'unités web")
+    parser.add_argument('--skip-youtube', action='store_true', help="Pas d'unités YouTube")
+    parser.add_argument('--no-planner', action='store_true',
+                        help="Requêtes tirées au hasard (sans planificateur)")
+    parser.add_argument('--no-query-cache', action='store_true',
+                        help="Désactive le cache local des résultats de recherche")
+    parser.add_argument('--no-trends', action='store_true',
+                        help="Ne pas surveiller les pics de mots-clés (trends.py)")
+    parser.add_argument('--no-archive', action='store_true',
+                        help="Ne pas ajouter les items à l'archive locale (archive.py, Parquet)")
+    parser.add_argument('--flush-timeout', type=float, default=DEFAULT_FLUSH_TIMEOUT,
+                        help="Durée maximale de vidage du spool en fin de cycle (secondes)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from rss_scraper import start_flusher
+
+    args = parse_args(argv)
+    started = time.time()
+    cycle = args.cycle or cycle_id(args.cycle_minutes)
+    print("=" * 60)
+    print(f"🧩 LYNX EYE - COLLECTE RÉPARTIE (cycle {cycle}, {args.processes} worker(s))")
+    print("=" * 60)
+
+    flusher = start_flusher()
+    try:
+        if args.processes <= 1:
+            run_worker(args, cycle, 'w1')
+        else:
+            context = multiprocessing.get_context('spawn')
+            results = context.Queue()
+            processes = [context.Process(target=run_worker, args=(args, cycle, f"w{i + 1}", results),
+                                         name=f"w{i + 1}")
+                         for i in range(args.processes)]
+            for process in processes:
+                process.start()
+
+            def stop(signum, frame):
+                for process in processes:
+                    if process.is_alive():
+                        os.kill(process.pid, signal.SIGTERM)
+
+            signal.signal(signal.SIGTERM, stop)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)   # Ctrl-C est déjà reçu par les workers
+            # Lu avant join : un enfant attend que sa file soit vidée pour se terminer
+            if collect_metrics(results, processes) < len(processes):
+                print("⚠️  Métriques manquantes pour un worker interrompu brutalement")
+            for process in processes:
+                process.join()
+    finally:
+        print(f"\n⏳ Vidage du spool (max {args.flush_timeout:.0f}s)...")
+        flusher.stop(timeout=args.flush_timeout)
+        print(flusher.report())
+
+    leases = LeaseTable()
+    progress = leases.progress(cycle)
+    leases.close()
+    remaining = sum(count for state, count in progress.items() if state not in (DONE, FAILED))
+    print(f"🧩 Cycle {cycle}: {progress[DONE]} unité(s) terminée(s), {progress[FAILED]} abandonnée(s), "
+          f"{remaining} restante(s) — {time.time() - started:.1f}s")
+    metrics.record_run('worker', started)
+    metrics.write_textfile(state_path(METRICS_FILENAME))
+
+
+if __name__ == '__main__':
+    main()